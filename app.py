@@ -1,5 +1,6 @@
 import os
-from flask import Flask, render_template, request, jsonify, send_file
+import threading
+from flask import Flask, Response, render_template, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
@@ -7,7 +8,21 @@ import json
 from datetime import datetime
 
 from src.core.fact_checker import FactChecker
+from src.core.admission import AdmissionController, Saturated
+from src.core.job_manager import JobManager
+from src.api.gemini_client import SLIDE_ORDERS, call_scheduler, circuit_breakers, configure_shared_state
+from src.utils.office_render import office_pool
+from src.utils.scheduler import BULK, DECK, INTERACTIVE
+from src.utils.shared_state import SharedJobs, SharedState
 from src.utils.report_generator import ReportGenerator
+from src.utils.report_store import REPORT_FORMATS, ReportStore, read_report
+from src.utils.upload_store import UploadStore
+from src.utils.metrics import REGISTRY
+from src.utils.budget import BudgetManager, parse_job_limits
+from src.utils.usage_ledger import GROUP_COLUMNS, UsageLedger, api_key_id
+from src.utils.profiler import profile_job, profiling_enabled
+from src.utils.cost_estimator import CostEstimator
+from src.utils.tokenizer import tokenizer_name
 
 load_dotenv()
 
@@ -21,11 +36,69 @@ app.config['OUTPUT_FOLDER'] = './output'
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
 
+upload_store = UploadStore(app.config['UPLOAD_FOLDER'])
+# Compressed reports plus a summary index for listings and dashboards
+report_store = ReportStore(app.config['OUTPUT_FOLDER'])
+
+
+def _backfill_report_store():
+    """Loose output/*.json reports from before the store, then issues saved before the search index"""
+    report_store.import_legacy_reports()
+    report_store.backfill_issues()
+
+
+# Older reports are moved into the index in the background
+threading.Thread(target=_backfill_report_store, daemon=True).start()
+
+# Under a multi-process server (wsgi.py) workers coalesce jobs and model calls
+# and share one request rate limit through FACTCHECK_DATA_DIR/shared.sqlite3
+shared_state = SharedState() if os.getenv('FACTCHECK_SHARED_STATE', '0') == '1' else None
+if shared_state:
+    configure_shared_state(shared_state)
+job_manager = JobManager(shared=SharedJobs(shared_state) if shared_state else None)
+# Refuses new jobs with 429 + Retry-After beyond FACTCHECK_MAX_CONCURRENT_JOBS / FACTCHECK_MAX_QUEUED_SLIDES;
+# readiness follows the circuit of the server's own API key
+admission = AdmissionController(job_manager, circuit_breakers.get(api_key_id(os.getenv('GOOGLE_API_KEY'))))
+# Every model API call, with daily/deck/key/model rollups for cost reports
+usage_ledger = UsageLedger()
+cost_estimator = CostEstimator(ledger=usage_ledger)
+# Spend per job, API key and day, in a SQLite file shared by every worker on the host
+budget_manager = BudgetManager()
+
+# Load the tokenizer in the background so the first cost estimate stays fast
+threading.Thread(target=tokenizer_name, daemon=True).start()
+# Warm the LibreOffice workers (slide rendering, .ppt conversion) when it is installed
+office = office_pool()
+if office:
+    office.start()
+
+UPLOADS = REGISTRY.counter('factcheck_uploads_total', 'Uploaded files', ['deduplicated'])
+REPORT_CACHE = REGISTRY.counter('factcheck_report_cache_requests_total', 'Report cache lookups on /check', ['result'])
+REJECTED = REGISTRY.counter('factcheck_rejected_requests_total', 'Requests refused with 429 while saturated')
+CHECK_JOBS = REGISTRY.counter('factcheck_check_jobs_total', 'Check requests by how they were served', ['mode'])
+REGISTRY.gauge('factcheck_jobs_in_flight', 'Check jobs currently running').set_function(job_manager.in_flight)
+
+
+def _report_cache_hit_ratio():
+    hits = REPORT_CACHE.value(result='hit')
+    total = hits + REPORT_CACHE.value(result='miss')
+    return hits / total if total else 0.0
+
+
+REGISTRY.gauge('factcheck_report_cache_hit_ratio', 'Share of report cache lookups that hit').set_function(
+    _report_cache_hit_ratio)
+
 ALLOWED_EXTENSIONS = {'ppt', 'pptx', 'pdf'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _too_busy(reason, retry_after):
+    REJECTED.inc()
+    response = jsonify({'error': reason, 'retry_after': retry_after})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -39,26 +112,83 @@ def upload_file():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
     
+    # Do not take in more work while the running jobs cannot keep up
+    saturated = admission.saturation()
+    if saturated:
+        return _too_busy(*saturated)
+    
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # Stored once per content hash; the original name is kept in the sidecar
+        stored = upload_store.save_stream(file.stream, os.path.basename(file.filename))
+        UPLOADS.inc(deduplicated=str(stored['deduplicated']).lower())
         
         return jsonify({
             'success': True,
-            'filename': filename,
-            'filepath': filepath
+            'filename': stored['filename'],
+            'filepath': stored['filepath'],
+            'original_filename': stored['original_filename'],
+            'content_hash': stored['content_hash'],
+            'deduplicated': stored['deduplicated']
         }), 200
     
     return jsonify({'error': 'Invalid file type'}), 400
 
+def _run_check_job(job, fact_checker, filepath, filename, content_hash, report_key, profile=False,
+                   budget_limits=None, order=None, deadline=None):
+    """Body of a check job; runs in a JobManager thread"""
+    if deadline:
+        job.cancel_token.set_deadline(deadline['seconds'])
+    budget = budget_manager.for_job(job.job_id, fact_checker.gemini_client.api_key, budget_limits)
+    base_filename = secure_filename(upload_store.display_name(filename)) or filename.rsplit('.', 1)[0]
+    profiler = profile_job(profile, app.config['OUTPUT_FOLDER'], base_filename)
+    
+    with profiler:
+        report = fact_checker.check_presentation(
+            filepath,
+            progress_callback=lambda result: job.publish('slide', result),
+            # Issues are streamed as the model writes them, ahead of their slide's result
+            issue_callback=lambda issue: job.publish('issue', issue),
+            parsed_callback=lambda total: job.publish('parsed', {'total_slides': total}),
+            budget=budget,
+            order=order,
+            cancel=job.cancel_token,
+            degrade_near_deadline=bool(deadline and deadline['degrade']),
+            usage_labels={
+                'deck': filename,
+                'deck_name': upload_store.original_filename(filename),
+                'job_id': job.job_id
+            }
+        )
+        if content_hash:
+            report.file_metadata['content_hash'] = content_hash
+            report.file_metadata['file_name'] = upload_store.original_filename(filename)
+        
+        # Generate reports
+        report_generator = ReportGenerator(app.config['OUTPUT_FOLDER'], store=report_store)
+        # HTML and Markdown are rendered on first download
+        saved_files = report_generator.save_report(report, base_filename, formats=('json',))
+        
+        # Generate improvement suggestions
+        suggestions = report_generator.generate_improvement_suggestions(report)
+    
+    # A report cut short by a budget, cancellation or deadline is not reused for later requests
+    if content_hash and not report.budget_skipped_slides and not report.unchecked_slides:
+        upload_store.record_report(content_hash, report_key, saved_files)
+    if profile:
+        saved_files.update(profiler.saved_files)
+    
+    return {
+        'report': report.model_dump(),
+        'saved_files': saved_files,
+        'suggestions': suggestions
+    }
+
 @app.route('/check/<filename>', methods=['POST'])
 def check_facts(filename):
+    filename = secure_filename(filename)
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     
-    if not os.path.exists(filepath):
+    if not allowed_file(filename) or not os.path.exists(filepath):
         return jsonify({'error': 'File not found'}), 404
     
     try:
@@ -67,28 +197,134 @@ def check_facts(filename):
         if not api_key:
             return jsonify({'error': 'API key is required'}), 400
         
-        fact_checker = FactChecker(gemini_api_key=api_key)
+        # Scheduling: {"priority": "bulk"} for corpus runs, so single decks and
+        # quick checks go first; {"order": "claims"} changes the slide order
+        priority = request.json.get('priority', DECK)
+        if priority not in (DECK, BULK):
+            return jsonify({'error': f"priority must be '{DECK}' or '{BULK}'"}), 400
+        order = request.json.get('order')
+        if order is not None and order not in SLIDE_ORDERS:
+            return jsonify({'error': f"order must be one of {', '.join(SLIDE_ORDERS)}"}), 400
         
-        # Perform fact checking
-        report = fact_checker.check_presentation(filepath)
+        fact_checker = FactChecker(gemini_api_key=api_key, ledger=usage_ledger)
+        fact_checker.gemini_client.priority = priority
         
-        # Generate reports
-        report_generator = ReportGenerator(app.config['OUTPUT_FOLDER'])
-        saved_files = report_generator.save_report(report, os.path.splitext(filename)[0])
+        # Reuse a finished report for the same content, model and prompt version
+        content_hash = upload_store.content_hash_for(filename)
+        report_key = fact_checker.gemini_client.report_key()
+        profile = profiling_enabled(request.json.get('profile'))
+        if content_hash and not request.json.get('force') and not profile:
+            cached = upload_store.find_report(content_hash, report_key)
+            REPORT_CACHE.inc(result='hit' if cached else 'miss')
+            if cached:
+                report = read_report(cached['saved_files']['json'])
+                
+                report_generator = ReportGenerator(app.config['OUTPUT_FOLDER'], store=report_store)
+                return jsonify({
+                    'success': True,
+                    'cached': True,
+                    'report': report.model_dump(),
+                    'saved_files': cached['saved_files'],
+                    'suggestions': report_generator.generate_improvement_suggestions(report)
+                }), 200
         
-        # Generate improvement suggestions
-        suggestions = report_generator.generate_improvement_suggestions(report)
+        # Per-job budget override: {"budget": {"usd": 0.5, "tokens": 200000}}
+        budget_limits = request.json.get('budget') or None
+        if budget_limits is not None:
+            try:
+                budget_limits = parse_job_limits(budget_limits)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        # Deadline: {"deadline_seconds": 60} returns a partial report after 60s;
+        # with "degrade": true slides go text-only on the first tier as it nears
+        deadline = None
+        if request.json.get('deadline_seconds') is not None:
+            try:
+                seconds = float(request.json['deadline_seconds'])
+            except (TypeError, ValueError):
+                seconds = 0
+            if seconds <= 0:
+                return jsonify({'error': 'deadline_seconds must be a positive number'}), 400
+            degrade = request.json.get('degrade', os.getenv('FACTCHECK_DEADLINE_DEGRADE', '0') == '1')
+            deadline = {'seconds': seconds, 'degrade': bool(degrade)}
+        
+        # Concurrent requests for the same content and options share one job;
+        # a profiled, individually budgeted or deadline-bound run never joins another one
+        job_key = f"{content_hash or filename}:{report_key}" + (':profile' if profile else '')
+        if budget_limits:
+            job_key += f":budget={json.dumps(budget_limits, sort_keys=True)}"
+        if deadline:
+            job_key += f":deadline={json.dumps(deadline, sort_keys=True)}"
+        try:
+            job, created = job_manager.get_or_start(
+                job_key,
+                lambda job: _run_check_job(job, fact_checker, filepath, filename, content_hash, report_key, profile,
+                                           budget_limits, order, deadline),
+                admit=admission.admit
+            )
+        except Saturated as e:
+            return _too_busy(e.reason, e.retry_after)
+        CHECK_JOBS.inc(mode='started' if created else 'coalesced')
+        
+        if request.json.get('async'):
+            return jsonify({
+                'success': True,
+                'job_id': job.job_id,
+                'coalesced': not created,
+                'stream_url': f"/jobs/{job.job_id}/stream"
+            }), 202
+        
+        result = job.wait()
         
         return jsonify({
             'success': True,
-            'report': report.model_dump(),
-            'saved_files': saved_files,
-            'suggestions': suggestions
+            'cached': False,
+            'coalesced': not created,
+            'job_id': job.job_id,
+            **result
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    status = job.to_dict()
+    if job.status == 'completed':
+        status.update(job.result)
+    return jsonify(status), 200
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Stop a running job; it completes with a partial report (every attached caller gets it)"""
+    if job_manager.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if not job_manager.cancel(job_id):
+        return jsonify({'error': 'Job is not running'}), 409
+    return jsonify({'success': True, 'job_id': job_id, 'status': 'cancelling'}), 202
+
+@app.route('/jobs/<job_id>/stream', methods=['GET'])
+def job_stream(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def generate():
+        for event in job.iter_events():
+            if event is None:
+                # Keep-alive comment for proxies while a slide is in progress
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/quick-check', methods=['POST'])
 def quick_check():
     text = request.json.get('text', '')
@@ -100,7 +336,10 @@ def quick_check():
         if not api_key:
             return jsonify({'error': 'API key is required'}), 400
         
-        fact_checker = FactChecker(gemini_api_key=api_key)
+        fact_checker = FactChecker(gemini_api_key=api_key, ledger=usage_ledger)
+        fact_checker.gemini_client.usage_labels = {'deck': 'quick-check'}
+        # Ahead of every deck and bulk call waiting for the API
+        fact_checker.gemini_client.priority = INTERACTIVE
         result = fact_checker.quick_check(text)
         
         return jsonify({
@@ -111,14 +350,99 @@ def quick_check():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+REPORT_MIMETYPES = {
+    'json': 'application/json',
+    'html': 'text/html; charset=utf-8',
+    'markdown': 'text/markdown; charset=utf-8'
+}
+
+def _send_report_variant(path, report_format):
+    """Serve a report with a strong ETag, conditional GET, byte ranges and a pre-compressed body"""
+    etag = report_store.etag(path)
+    options = {'mimetype': REPORT_MIMETYPES[report_format], 'as_attachment': True,
+               'download_name': os.path.basename(path), 'conditional': True}
+    
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding] and os.path.exists(path + suffix):
+            # Each encoding is its own representation with its own validator
+            response = send_file(path + suffix, etag=f"{etag}-{encoding}", **options)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_file(path, etag=etag, **options)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
 @app.route('/download/<report_type>/<filename>')
 def download_report(report_type, filename):
-    filepath = os.path.join(app.config['OUTPUT_FOLDER'], filename)
+    filename = secure_filename(filename)
+    
+    report_id = report_store.report_id_for(filename) if report_type in REPORT_FORMATS else None
+    if report_id:
+        path = report_store.variant_path(report_id, report_type)
+        # The stored .json.gz is the gzip variant: plain JSON is only written for clients without gzip
+        if not (report_type == 'json' and request.accept_encodings['gzip']):
+            report_generator = ReportGenerator(app.config['OUTPUT_FOLDER'], store=report_store)
+            path = report_store.ensure_variant(report_id, report_type, report_generator.render)
+        return _send_report_variant(path, report_type)
     
+    # Profiles, dashboards and reports saved before the report store
+    filepath = os.path.join(app.config['OUTPUT_FOLDER'], filename)
     if not os.path.exists(filepath):
         return jsonify({'error': 'File not found'}), 404
     
-    return send_file(filepath, as_attachment=True)
+    return send_file(filepath, as_attachment=True, conditional=True)
+
+@app.route('/reports', methods=['GET'])
+def list_reports():
+    """Saved reports from the summary index, newest first: ?page=&per_page=&file_name=&content_hash="""
+    listing = report_store.list(
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', 50, type=int),
+        file_name=request.args.get('file_name'),
+        content_hash=request.args.get('content_hash')
+    )
+    return jsonify(listing), 200
+
+@app.route('/reports/<report_id>', methods=['GET'])
+def get_report(report_id):
+    report = report_store.load(report_id)
+    if report is None:
+        return jsonify({'error': 'Report not found'}), 404
+    return jsonify(report.model_dump()), 200
+
+@app.route('/search', methods=['GET'])
+def search_issues():
+    """Full-text issue search over every saved report.
+    
+    ?q=BERT&type=numerical_error&severity=high&min_confidence=0.8&deck=<file name or hash>
+    &since=2025-04-01&until=2026-03-31&page=&per_page= (type and severity take comma-separated lists)
+    """
+    def listed(name):
+        value = request.args.get(name)
+        return [item.strip() for item in value.split(',') if item.strip()] if value else None
+    
+    results = report_store.search(
+        query=request.args.get('q'),
+        types=listed('type'),
+        severities=listed('severity'),
+        min_confidence=request.args.get('min_confidence', type=float),
+        deck=request.args.get('deck'),
+        since=request.args.get('since'),
+        until=request.args.get('until'),
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', 50, type=int)
+    )
+    return jsonify(results), 200
+
+@app.route('/dashboard', methods=['GET'])
+def dashboard():
+    """Summary dashboard over every saved report, one page of report cards at a time"""
+    report_generator = ReportGenerator(app.config['OUTPUT_FOLDER'], store=report_store)
+    return report_generator.render_dashboard(
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', 50, type=int)
+    )
 
 @app.route('/cost-estimate', methods=['POST'])
 def estimate_cost():
@@ -126,33 +450,71 @@ def estimate_cost():
     slide_count = data.get('slide_count', 0)
     file_count = data.get('file_count', 1)
     
-    # Rough estimation based on average tokens per slide
-    avg_tokens_per_slide = 500  # Input tokens
-    avg_output_tokens_per_slide = 200  # Output tokens
+    # Rough estimation from average tokens per slide; see /cost-estimate/<filename> for an uploaded file
+    estimate = cost_estimator.estimate_single_file(slide_count * file_count, has_images=True)
+    breakdown = estimate['cost_breakdown']
+    
+    return jsonify({
+        'estimated_cost': round(breakdown['total_cost'], 4),
+        'input_tokens': estimate['tokens']['input'],
+        'output_tokens': estimate['tokens']['output'],
+        'cost_breakdown': {
+            'input_cost': round(breakdown['input_cost'], 4),
+            'output_cost': round(breakdown['output_cost'], 4),
+            'image_cost': round(breakdown['image_cost'], 4)
+        }
+    }), 200
+
+@app.route('/cost-estimate/<filename>', methods=['GET'])
+def estimate_file_cost(filename):
+    """Per-slide estimate for an uploaded file from a cheap text-only parse"""
+    filename = secure_filename(filename)
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     
-    input_price_per_1k = 0.00025
-    output_price_per_1k = 0.0005
+    if not allowed_file(filename) or not os.path.exists(filepath):
+        return jsonify({'error': 'File not found'}), 404
     
-    total_input_tokens = slide_count * avg_tokens_per_slide * file_count
-    total_output_tokens = slide_count * avg_output_tokens_per_slide * file_count
+    try:
+        estimate = cost_estimator.estimate_from_file(filepath)
+        estimate['file_name'] = upload_store.original_filename(filename)
+        return jsonify(estimate), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/usage', methods=['GET'])
+def usage():
+    """Recorded API usage: ?group_by=day|deck|key|model&since=YYYY-MM-DD&until=YYYY-MM-DD[&format=markdown]"""
+    group_by = request.args.get('group_by', 'day')
+    if group_by not in GROUP_COLUMNS:
+        return jsonify({'error': f"group_by must be one of {', '.join(GROUP_COLUMNS)}"}), 400
+    since = request.args.get('since')
+    until = request.args.get('until')
     
-    input_cost = (total_input_tokens / 1000) * input_price_per_1k
-    output_cost = (total_output_tokens / 1000) * output_price_per_1k
-    total_cost = input_cost + output_cost
+    if request.args.get('format') == 'markdown':
+        return Response(cost_estimator.generate_cost_report(since=since, until=until),
+                        mimetype='text/markdown; charset=utf-8')
     
+    baseline = cost_estimator.usage_baseline(since, until)
     return jsonify({
-        'estimated_cost': round(total_cost, 4),
-        'input_tokens': total_input_tokens,
-        'output_tokens': total_output_tokens,
-        'cost_breakdown': {
-            'input_cost': round(input_cost, 4),
-            'output_cost': round(output_cost, 4)
-        }
+        'summary': baseline['usage'],
+        group_by: usage_ledger.rollup(group_by, since, until),
+        'projections': cost_estimator.project_costs(baseline)
     }), 200
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()}), 200
+    """Readiness for load balancers: 503 while saturated or while the model API circuit is open"""
+    health = admission.health()
+    health['scheduler'] = call_scheduler.stats()
+    if office:
+        health['office'] = office.stats()
+    health['timestamp'] = datetime.now().isoformat()
+    return jsonify(health), 200 if health['ready'] else 503
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # Development server only; production runs wsgi.py under gunicorn
+    app.run(debug=os.getenv('FLASK_DEBUG', '').lower() in ('1', 'true'), port=int(os.getenv('PORT', '5000')))
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""Synthetic PPTX/PDF decks for offline benchmarks"""
+
+import os
+import random
+import zlib
+from io import BytesIO
+from typing import List, Optional
+
+from PIL import Image, ImageDraw
+from pptx import Presentation
+from pptx.util import Inches, Pt
+
+
+# Claim-heavy sentence templates, similar to what the lecture decks contain
+SENTENCE_TEMPLATES = [
+    "{model} was introduced in {year} and has {params}B parameters.",
+    "{model} reached {score}% accuracy on the {bench} benchmark.",
+    "The {arch} architecture was proposed by {author} in {year}.",
+    "Training {model} took about {days} days on {gpus} GPUs.",
+    "{model} uses a context window of {ctx} tokens.",
+    "Scaling laws suggest loss decreases as a power law with {factor}x more compute.",
+    "The dataset contains {tokens} billion tokens collected before {year}.",
+]
+
+VOCABULARY = {
+    'model': ['GPT-3', 'BERT', 'T5', 'LLaMA', 'PaLM', 'Chinchilla', 'RoBERTa', 'GPT-4'],
+    'arch': ['Transformer', 'LSTM', 'ResNet', 'Mixture-of-Experts', 'Diffusion'],
+    'bench': ['GLUE', 'SuperGLUE', 'MMLU', 'ImageNet', 'SQuAD', 'HellaSwag'],
+    'author': ['Vaswani et al.', 'Devlin et al.', 'Brown et al.', 'Hoffmann et al.', 'He et al.'],
+}
+
+
+def generate_text(rng: random.Random, words: int) -> str:
+    """Generate roughly `words` words of claim-dense filler text"""
+    sentences = []
+    count = 0
+    while count < words:
+        template = rng.choice(SENTENCE_TEMPLATES)
+        sentence = template.format(
+            model=rng.choice(VOCABULARY['model']),
+            arch=rng.choice(VOCABULARY['arch']),
+            bench=rng.choice(VOCABULARY['bench']),
+            author=rng.choice(VOCABULARY['author']),
+            year=rng.randint(1990, 2024),
+            params=rng.choice([0.1, 1.5, 7, 13, 70, 175, 540]),
+            score=round(rng.uniform(40, 99), 1),
+            days=rng.randint(1, 90),
+            gpus=rng.choice([8, 64, 256, 1024, 2048]),
+            ctx=rng.choice([512, 2048, 4096, 32768, 128000]),
+            factor=rng.choice([2, 4, 10, 100]),
+            tokens=rng.choice([10, 300, 1400, 2000]),
+        )
+        sentences.append(sentence)
+        count += len(sentence.split())
+    return "\n".join(sentences)
+
+
+def generate_image(rng: random.Random, width: int = 640, height: int = 400) -> bytes:
+    """Generate a PNG chart-like image"""
+    img = Image.new('RGB', (width, height), color='white')
+    draw = ImageDraw.Draw(img)
+    bars = rng.randint(3, 8)
+    bar_width = width // (bars * 2)
+    for i in range(bars):
+        bar_height = rng.randint(height // 10, height - 20)
+        x0 = bar_width // 2 + i * bar_width * 2
+        color = tuple(rng.randint(0, 200) for _ in range(3))
+        draw.rectangle([x0, height - bar_height, x0 + bar_width, height - 10], fill=color)
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def generate_pptx(path: str, slides: int = 20, words_per_slide: int = 60,
+                  images_per_slide: int = 1, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    presentation = Presentation()
+    presentation.slide_width = Inches(13.333)
+    presentation.slide_height = Inches(7.5)
+    blank_layout = presentation.slide_layouts[6]
+    
+    for slide_index in range(slides):
+        slide = presentation.slides.add_slide(blank_layout)
+        title = slide.shapes.add_textbox(Inches(0.5), Inches(0.3), Inches(12), Inches(0.8))
+        title.text_frame.text = f"Slide {slide_index + 1}: {rng.choice(VOCABULARY['arch'])} overview"
+        
+        body = slide.shapes.add_textbox(Inches(0.5), Inches(1.2), Inches(7), Inches(5.5))
+        body.text_frame.word_wrap = True
+        body.text_frame.text = generate_text(rng, words_per_slide)
+        for paragraph in body.text_frame.paragraphs:
+            for run in paragraph.runs:
+                run.font.size = Pt(14)
+        
+        for image_index in range(images_per_slide):
+            image_stream = BytesIO(generate_image(rng))
+            top = Inches(1.2 + image_index * 2.2)
+            slide.shapes.add_picture(image_stream, Inches(8), top, width=Inches(4.8))
+    
+    presentation.save(path)
+    return path
+
+
+def _escape_pdf_text(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _wrap(text: str, width: int = 90) -> List[str]:
+    lines = []
+    for paragraph in text.split('\n'):
+        current = ''
+        for word in paragraph.split():
+            if current and len(current) + len(word) + 1 > width:
+                lines.append(current)
+                current = word
+            else:
+                current = f"{current} {word}".strip()
+        if current:
+            lines.append(current)
+    return lines
+
+
+def generate_pdf(path: str, pages: int = 20, words_per_page: int = 60,
+                 images_per_page: int = 1, seed: int = 0) -> str:
+    """Write a slide-like (landscape) PDF with a text layer and raster images.
+    
+    Written by hand so the benchmark suite needs nothing beyond the runtime
+    requirements.
+    """
+    rng = random.Random(seed)
+    page_width, page_height = 842, 595
+    objects: List[Optional[bytes]] = [None, None, None]  # catalog, pages, font
+    page_ids = []
+    
+    objects[2] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    
+    for page_index in range(pages):
+        image_refs = []
+        for image_index in range(images_per_page):
+            img = Image.open(BytesIO(generate_image(rng, 320, 200))).convert('RGB')
+            data = zlib.compress(img.tobytes())
+            header = (f"<< /Type /XObject /Subtype /Image /Width {img.width} /Height {img.height} "
+                      f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode "
+                      f"/Length {len(data)} >>\nstream\n").encode('latin-1')
+            objects.append(header + data + b"\nendstream")
+            image_refs.append((f"Im{image_index}", len(objects)))
+        
+        text = generate_text(rng, words_per_page)
+        lines = [f"Page {page_index + 1}"] + _wrap(text, 60 if images_per_page else 110)
+        content = ["BT /F1 12 Tf 16 TL 40 550 Td"]
+        for line in lines[:30]:
+            content.append(f"({_escape_pdf_text(line)}) Tj T*")
+        content.append("ET")
+        for image_index, (name, _) in enumerate(image_refs):
+            y = 380 - image_index * 190
+            content.append(f"q 320 180 0 0 480 {y} cm /{name} Do Q")
+        stream = "\n".join(content).encode('latin-1')
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode('latin-1') + stream + b"\nendstream")
+        content_id = len(objects)
+        
+        xobjects = " ".join(f"/{name} {obj_id} 0 R" for name, obj_id in image_refs)
+        resources = f"<< /Font << /F1 3 0 R >> /XObject << {xobjects} >> >>"
+        objects.append((f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width} {page_height}] "
+                        f"/Resources {resources} /Contents {content_id} 0 R >>").encode('latin-1'))
+        page_ids.append(len(objects))
+    
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode('latin-1')
+    
+    output = BytesIO()
+    output.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for obj_id, body in enumerate(objects, 1):
+        offsets.append(output.tell())
+        output.write(f"{obj_id} 0 obj\n".encode('latin-1') + body + b"\nendobj\n")
+    xref_offset = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1'))
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode('latin-1'))
+    output.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+                 f"startxref\n{xref_offset}\n%%EOF\n".encode('latin-1'))
+    
+    with open(path, 'wb') as f:
+        f.write(output.getvalue())
+    return path
+
+
+def generate_deck(directory: str, file_type: str = 'pptx', slides: int = 20, words_per_slide: int = 60,
+                  images_per_slide: int = 1, seed: int = 0) -> str:
+    """Generate a deck in `directory` and return its path"""
+    os.makedirs(directory, exist_ok=True)
+    name = f"synthetic_{slides}s_{words_per_slide}w_{images_per_slide}i_{seed}.{file_type}"
+    path = os.path.join(directory, name)
+    if file_type == 'pptx':
+        return generate_pptx(path, slides, words_per_slide, images_per_slide, seed)
+    if file_type == 'pdf':
+        return generate_pdf(path, slides, words_per_slide, images_per_slide, seed)
+    raise ValueError(f"Unsupported deck type: {file_type}")
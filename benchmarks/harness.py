@@ -0,0 +1,88 @@
+"""Measurement helpers shared by the benchmark scenarios"""
+
+import math
+import resource
+import sys
+from typing import Any, Dict, List, Optional
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    if sys.platform == 'darwin':
+        return usage / (1024 * 1024)
+    return usage / 1024
+
+
+def summarize(latencies_s: List[float], items: int, wall_time_s: float, unit: str,
+              extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build the machine-readable result for one scenario"""
+    latencies_ms = [latency * 1000 for latency in latencies_s]
+    result = {
+        'status': 'ok',
+        'unit': unit,
+        'items': items,
+        'samples': len(latencies_ms),
+        'wall_time_s': round(wall_time_s, 4),
+        'throughput_per_s': round(items / wall_time_s, 3) if wall_time_s > 0 else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies_ms, 50), 3),
+            'p95': round(percentile(latencies_ms, 95), 3),
+            'p99': round(percentile(latencies_ms, 99), 3),
+            'mean': round(sum(latencies_ms) / len(latencies_ms), 3) if latencies_ms else 0.0,
+            'max': round(max(latencies_ms), 3) if latencies_ms else 0.0
+        },
+        'peak_rss_mb': round(peak_rss_mb(), 1)
+    }
+    if extra:
+        result.update(extra)
+    return result
+
+
+def skipped(reason: str) -> Dict[str, Any]:
+    return {'status': 'skipped', 'reason': reason}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.10) -> Dict[str, Any]:
+    """Compare scenario results against a baseline run.
+    
+    A scenario regresses when throughput drops, or p95 latency or peak RSS
+    grows, by more than `tolerance` (relative).
+    """
+    comparison = {'tolerance': tolerance, 'regressions': [], 'scenarios': {}}
+    
+    for name, current in results.get('scenarios', {}).items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous or current.get('status') != 'ok' or previous.get('status') != 'ok':
+            continue
+        
+        checks = {
+            'throughput_per_s': (previous['throughput_per_s'], current['throughput_per_s'], False),
+            'p95_ms': (previous['latency_ms']['p95'], current['latency_ms']['p95'], True),
+            'peak_rss_mb': (previous['peak_rss_mb'], current['peak_rss_mb'], True),
+        }
+        deltas = {}
+        for metric, (before, after, higher_is_worse) in checks.items():
+            change = (after - before) / before if before else 0.0
+            deltas[metric] = round(change, 4)
+            worse = change > tolerance if higher_is_worse else change < -tolerance
+            if worse:
+                comparison['regressions'].append({
+                    'scenario': name,
+                    'metric': metric,
+                    'baseline': before,
+                    'current': after,
+                    'change': round(change, 4)
+                })
+        comparison['scenarios'][name] = deltas
+    
+    return comparison
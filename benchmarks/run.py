@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+オフラインベンチマーク実行スクリプト
+
+Runs each scenario in its own subprocess (so peak RSS is per scenario) and
+writes the results as JSON, optionally compared against a baseline run.
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --scenario check e2e --slides 50 --baseline bench.json
+    python -m benchmarks.run --scenario replay --cassette term.jsonl --decks ./decks --latency-scale 0.1
+    python -m benchmarks.run --scenario cascade --cascade gemini-1.5-flash gemini-1.5-pro --cascade-latency-ms 10 40
+    python -m benchmarks.run --scenario interactive --bulk-jobs 8 --call-slots 4
+    python -m benchmarks.run --scenario pdf_text --decks ./corpus --pdf-workers 4
+    python -m benchmarks.run --scenario office_render --slides 20 --office-workers 2
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from typing import Any, Dict
+
+from benchmarks.harness import compare
+
+SCENARIO_NAMES = ['parse', 'rasterize', 'pdf_text', 'office_render', 'check', 'cascade', 'report', 'e2e', 'replay', 'interactive']
+DEFAULT_SCENARIOS = ['parse', 'rasterize', 'check', 'report', 'e2e']
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_config(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        'file_type': args.file_type,
+        'slides': args.slides,
+        'words_per_slide': args.words,
+        'images_per_slide': args.images,
+        'iterations': args.iterations,
+        'seed': args.seed,
+        'cassette': os.path.abspath(args.cassette) if args.cassette else None,
+        'decks': os.path.abspath(args.decks) if args.decks else None,
+        'latency_scale': args.latency_scale,
+        'cascade': args.cascade,
+        'cascade_latency_ms': args.cascade_latency_ms,
+        'bulk_jobs': args.bulk_jobs,
+        'call_slots': args.call_slots,
+        'pdf_workers': args.pdf_workers,
+        'office_workers': args.office_workers,
+        'stub': {
+            'latency': args.latency,
+            'latency_ms': args.latency_ms,
+            'error_rate': args.error_rate,
+            'output_tokens': args.output_tokens,
+            'issues_per_slide': args.issues_per_slide,
+            'malformed_rate': args.malformed_rate
+        }
+    }
+
+
+def run_child(scenario: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one scenario in this process (invoked via --child)"""
+    from benchmarks.scenarios import SCENARIOS
+    
+    with tempfile.TemporaryDirectory(prefix=f"bench_{scenario}_") as workdir:
+        cwd = os.getcwd()
+        try:
+            return SCENARIOS[scenario](config, workdir)
+        finally:
+            os.chdir(cwd)
+
+
+def run_scenario(scenario: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    process = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.run', '--child', scenario, '--config', json.dumps(config)],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        return {'status': 'error', 'reason': process.stderr.strip().splitlines()[-1:] or ['unknown error']}
+    # Scenario code may print; the result is always the last line
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Offline fact-check pipeline benchmarks')
+    parser.add_argument('--scenario', nargs='+', choices=SCENARIO_NAMES, default=DEFAULT_SCENARIOS)
+    parser.add_argument('--file-type', choices=['pptx', 'pdf'], default='pptx')
+    parser.add_argument('--slides', type=int, default=20)
+    parser.add_argument('--words', type=int, default=80, help='words of text per slide')
+    parser.add_argument('--images', type=int, default=1, help='images per slide')
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', choices=['constant', 'uniform', 'lognormal'], default='lognormal')
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--output-tokens', type=int, default=200)
+    parser.add_argument('--issues-per-slide', type=float, default=1.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--cassette', help='recorded cassette for the replay scenario')
+    parser.add_argument('--decks', help='directory of real decks for the replay and pdf_text scenarios')
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help='multiply recorded latencies during replay (0 disables sleeping)')
+    parser.add_argument('--cascade', nargs='+', default=[],
+                        help='models for the cascade scenario, cheapest first (text:vision or one multimodal model)')
+    parser.add_argument('--cascade-latency-ms', nargs='+', type=float, default=[],
+                        help='stub latency per cascade model, in the same order')
+    parser.add_argument('--bulk-jobs', type=int, default=8, help='concurrent bulk decks in the interactive scenario')
+    parser.add_argument('--call-slots', type=int, default=4, help='scheduler API call slots in the interactive scenario')
+    parser.add_argument('--pdf-workers', type=int, default=4, help='parallel page ranges in the pdf_text scenario')
+    parser.add_argument('--office-workers', type=int, default=2, help='LibreOffice workers in the office_render scenario')
+    parser.add_argument('--output', help='write results JSON to this file')
+    parser.add_argument('--baseline', help='compare against a previous results JSON')
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--config', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        print(json.dumps(run_child(args.child, json.loads(args.config))))
+        return 0
+    
+    config = build_config(args)
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': config
+        },
+        'scenarios': {}
+    }
+    
+    for scenario in args.scenario:
+        print(f"running {scenario}...", file=sys.stderr)
+        results['scenarios'][scenario] = run_scenario(scenario, config)
+    
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        results['comparison'] = compare(results, baseline, args.tolerance)
+        if results['comparison']['regressions']:
+            exit_code = 1
+    
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    print(output)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
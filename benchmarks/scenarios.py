@@ -0,0 +1,435 @@
+"""Benchmark scenarios: parse, rasterize, PDF text engines, slide rendering, check, cascade, report,
+end-to-end /check and interactive latency"""
+
+import io
+import os
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+from unittest.mock import patch
+
+from benchmarks.deck_generator import generate_deck
+from benchmarks.harness import percentile, summarize, skipped
+from benchmarks.stub_backend import StubBackend, make_stub_client
+
+# ReportGenerator.save_report builds a FactChecker for the HTML/Markdown
+# exporters, which requires some API key to be configured (.env may set it empty)
+if not os.environ.get('GOOGLE_API_KEY'):
+    os.environ['GOOGLE_API_KEY'] = 'offline-benchmark'
+
+from src.api.backends import ReplayBackend  # noqa: E402
+from src.api import gemini_client  # noqa: E402
+from src.api.gemini_client import parse_cascade  # noqa: E402
+from src.core.fact_checker import FactChecker  # noqa: E402
+from src.utils.file_parser import FileParser  # noqa: E402
+from src.utils.office_render import OfficePool  # noqa: E402
+from src.utils.pdf_text import available_engines, extract_pdf_text  # noqa: E402
+from src.utils.report_generator import ReportGenerator  # noqa: E402
+from src.utils.scheduler import BULK, INTERACTIVE, CallScheduler  # noqa: E402
+
+
+def _deck(config: Dict[str, Any], workdir: str, file_type: str = None) -> str:
+    return generate_deck(
+        os.path.join(workdir, 'decks'),
+        file_type=file_type or config['file_type'],
+        slides=config['slides'],
+        words_per_slide=config['words_per_slide'],
+        images_per_slide=config['images_per_slide'],
+        seed=config['seed']
+    )
+
+
+def _stub_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    return dict(config.get('stub', {}), seed=config['seed'])
+
+
+def _stub_fact_checker(config: Dict[str, Any]) -> FactChecker:
+    return FactChecker(backend=StubBackend(**_stub_options(config)))
+
+
+def run_parse(config: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    deck = _deck(config, workdir)
+    parser = FileParser()
+    latencies = []
+    
+    start = time.perf_counter()
+    for _ in range(config['iterations']):
+        iteration_start = time.perf_counter()
+        slides = parser.parse_file(deck)
+        latencies.append(time.perf_counter() - iteration_start)
+    wall = time.perf_counter() - start
+    
+    return summarize(latencies, len(slides) * config['iterations'], wall, 'slides',
+                     {'latency_scope': 'per_deck'})
+
+
+def run_rasterize(config: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    if shutil.which('pdftoppm') is None:
+        return skipped('poppler (pdftoppm) is not installed')
+    
+    from pdf2image import convert_from_path
+    
+    deck = _deck(config, workdir, file_type='pdf')
+    latencies = []
+    pages = 0
+    
+    start = time.perf_counter()
+    for _ in range(config['iterations']):
+        iteration_start = time.perf_counter()
+        images = convert_from_path(deck, dpi=150)
+        for image in images:
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG')
+        pages += len(images)
+        latencies.append(time.perf_counter() - iteration_start)
+    wall = time.perf_counter() - start
+    
+    return summarize(latencies, pages, wall, 'pages', {'latency_scope': 'per_deck'})
+
+
+def run_pdf_text(config: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    """Pages/sec and memory of every installed PDF text engine, sequential and over parallel page ranges.
+    
+    Runs on the PDFs in --decks when given (the real corpus), else on a
+    generated deck. Memory is the peak of Python allocations in this
+    process (tracemalloc, measured in a separate untimed pass), so it does
+    not include pool workers or pdftotext processes.
+    """
+    import PyPDF2
+    
+    if config.get('decks'):
+        pdfs = sorted(os.path.join(config['decks'], name) for name in os.listdir(config['decks'])
+                      if name.lower().endswith('.pdf'))
+    else:
+        pdfs = [_deck(config, workdir, file_type='pdf')]
+    if not pdfs:
+        return skipped('no PDFs in --decks')
+    page_counts = {pdf: len(PyPDF2.PdfReader(pdf).pages) for pdf in pdfs}
+    pages = sum(page_counts.values())
+    workers = config.get('pdf_workers') or 4
+    
+    def measure(engine, parallel_workers):
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(config['iterations']):
+            for pdf in pdfs:
+                pdf_start = time.perf_counter()
+                extract_pdf_text(pdf, page_counts[pdf], engine, parallel_workers, parallel_min_pages=2)
+                latencies.append(time.perf_counter() - pdf_start)
+        return latencies, time.perf_counter() - start
+    
+    engines = {}
+    baseline = None
+    for engine in available_engines():
+        # Warm the process pool so its start-up is not billed to the first engine
+        extract_pdf_text(pdfs[0], page_counts[pdfs[0]], engine, workers, parallel_min_pages=2)
+        latencies, wall = measure(engine, 1)
+        if engine == 'pypdf2':
+            baseline = latencies, wall
+        _, parallel_wall = measure(engine, workers)
+        tracemalloc.start()
+        chars = sum(len(text) for pdf in pdfs for text in extract_pdf_text(pdf, page_counts[pdf], engine, 1))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        engines[engine] = {
+            'pages_per_s': round(pages * config['iterations'] / wall, 3) if wall > 0 else 0.0,
+            'parallel_pages_per_s': round(pages * config['iterations'] / parallel_wall, 3) if parallel_wall > 0 else 0.0,
+            'p95_ms_per_pdf': round(percentile(latencies, 95) * 1000, 3),
+            'peak_alloc_mb': round(peak / (1024 * 1024), 1),
+            'chars': chars
+        }
+    
+    # The headline numbers are the default engine's, so baselines stay comparable
+    latencies, wall = baseline
+    return summarize(latencies, pages * config['iterations'], wall, 'pages', {
+        'latency_scope': 'per_pdf',
+        'pdfs': len(pdfs),
+        'pdf_workers': workers,
+        'engines': engines
+    })
+
+
+def run_office_render(config: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    """PPTX slide rendering through the LibreOffice pool: cold (conversion) vs. cached, and decks in parallel"""
+    if shutil.which('pdftoppm') is None:
+        return skipped('poppler (pdftoppm) is not installed')
+    pool = OfficePool(workers=config.get('office_workers') or 2, cache_dir=os.path.join(workdir, 'office-cache'))
+    if not pool.available:
+        return skipped('LibreOffice (soffice) is not installed')
+    
+    # Distinct decks (distinct content hashes), so every first render is a real conversion
+    decks = [
+        generate_deck(os.path.join(workdir, f"decks-{index}"), file_type='pptx', slides=config['slides'],
+                      words_per_slide=config['words_per_slide'], images_per_slide=config['images_per_slide'],
+                      seed=config['seed'] + index)
+        for index in range(max(1, config.get('office_workers') or 2) * 2)
+    ]
+    
+    start = time.perf_counter()
+    pool.start(wait=True)
+    warm_up = time.perf_counter() - start
+    
+    latencies = []
+    start = time.perf_counter()
+    slides = len(pool.render(decks[0]))
+    latencies.append(time.perf_counter() - start)
+    
+    cached_start = time.perf_counter()
+    pool.render(decks[0])
+    cached = time.perf_counter() - cached_start
+    
+    def render(deck):
+        deck_start = time.perf_counter()
+        pool.render(deck)
+        latencies.append(time.perf_counter() - deck_start)
+    
+    threads = [threading.Thread(target=render, args=(deck,)) for deck in decks[1:]]
+    parallel_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    parallel = time.perf_counter() - parallel_start
+    
+    return summarize(latencies, slides * len(decks), latencies[0] + parallel, 'slides', {
+        'latency_scope': 'per_deck',
+        'warm_up_s': round(warm_up, 3),
+        'cold_slides_per_s': round(slides / latencies[0], 3) if latencies[0] > 0 else 0.0,
+        'cached_slides_per_s': round(slides / cached, 3) if cached > 0 else 0.0,
+        'parallel_slides_per_s': round(slides * len(threads) / parallel, 3) if parallel > 0 else 0.0,
+        'pool': pool.stats()
+    })
+
+
+def run_check(config: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    deck = _deck(config, workdir)
+    slides = FileParser().parse_file(deck)
+    slides_data = [
+        {'slide_number': s.slide_number, 'text_content': s.text_content, 'image_base64': s.image_base64}
+        for s in slides
+    ]
+    client = make_stub_client(**_stub_options(config))
+    latencies = []
+    errors = 0
+    
+    start = time.perf_counter()
+    for _ in range(config['iterations']):
+        last = [time.perf_counter()]
+        
+        def on_result(result, last=last):
+            now = time.perf_counter()
+            latencies.append(now - last[0])
+            last[0] = now
+        
+        check_results = client.batch_check_facts(slides_data, on_result=on_result)
+        errors += sum(1 for r in check_results['results'] if r.get('status') in ('error', 'parse_error'))
+    wall = time.perf_counter() - start
+    
+    return summarize(latencies, len(slides_data) * config['iterations'], wall, 'slides',
+                     {'latency_scope': 'per_slide', 'failed_slides': errors})
+
+
+def run_cascade(config: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    """Cascade vs. a single-tier run on its strongest model: throughput, cost and escalation rate"""
+    cascade = config.get('cascade') or []
+    if len(cascade) < 2:
+        return skipped('cascade needs at least two --cascade models')
+    
+    deck = _deck(config, workdir)
+    slides = FileParser().parse_file(deck)
+    slides_data = [
+        {'slide_number': s.slide_number, 'text_content': s.text_content, 'image_base64': s.image_base64}
+        for s in slides
+    ]
+    latencies_ms = config.get('cascade_latency_ms') or []
+    model_latency_ms = dict(zip(cascade, latencies_ms))
+    
+    def measure(tiers):
+        client = make_stub_client(**_stub_options(config), model_latency_ms=model_latency_ms)
+        client.tiers = parse_cascade(','.join(tiers))
+        latencies = []
+        cost = 0.0
+        escalated = 0
+        start = time.perf_counter()
+        for _ in range(config['iterations']):
+            for slide in slides_data:
+                slide_start = time.perf_counter()
+                result = client.check_facts(slide['text_content'], slide['slide_number'], slide['image_base64'])
+                latencies.append(time.perf_counter() - slide_start)
+                cost += result.get('token_usage', {}).get('estimated_cost', 0.0)
+                escalated += 1 if result.get('performance', {}).get('escalated') else 0
+        return latencies, time.perf_counter() - start, cost, escalated
+    
+    items = len(slides_data) * config['iterations']
+    _, single_wall, single_cost, _ = measure(cascade[-1:])
+    latencies, wall, cost, escalated = measure(cascade)
+    single_throughput = items / single_wall if single_wall > 0 else 0.0
+    
+    return summarize(latencies, items, wall, 'slides', {
+        'latency_scope': 'per_slide',
+        'tiers': cascade,
+        'escalation_rate': round(escalated / items, 3) if items else 0.0,
+        'cost_usd': round(cost, 6),
+        'single_tier': {
+            'model': cascade[-1],
+            'throughput_per_s': round(single_throughput, 3),
+            'cost_usd': round(single_cost, 6)
+        },
+        'throughput_gain': round((items / wall) / single_throughput, 3) if wall > 0 and single_throughput else 0.0,
+        'cost_ratio': round(cost / single_cost, 3) if single_cost else 0.0
+    })
+
+
+def run_interactive(config: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    """Quick-check latency while bulk decks saturate the API call slots, against an idle baseline"""
+    slides_data = [
+        {'slide_number': number, 'text_content': f"Slide {number}: GPT-3 was introduced in 2020", 'image_base64': None}
+        for number in range(1, config['slides'] + 1)
+    ]
+    gemini_client.call_scheduler = CallScheduler(config.get('call_slots', 4), interactive_reserve=1)
+    
+    def quick_checks(count):
+        client = make_stub_client(**_stub_options(config))
+        client.priority = INTERACTIVE
+        latencies = []
+        for index in range(count):
+            start = time.perf_counter()
+            client.verify_single_fact(f"Transformer was introduced in {2000 + index}")
+            latencies.append(time.perf_counter() - start)
+        return latencies
+    
+    checks = config['iterations'] * 10
+    idle = quick_checks(checks)
+    
+    def bulk_job(tenant):
+        client = make_stub_client(**_stub_options(config))
+        client.priority, client.tenant = BULK, tenant
+        client.batch_check_facts(slides_data)
+    
+    bulk = [threading.Thread(target=bulk_job, args=(f"bulk-{index}",)) for index in range(config.get('bulk_jobs', 8))]
+    start = time.perf_counter()
+    for thread in bulk:
+        thread.start()
+    latencies = quick_checks(checks)
+    for thread in bulk:
+        thread.join()
+    wall = time.perf_counter() - start
+    
+    idle_p95 = summarize(idle, len(idle), 1.0, 'checks')['latency_ms']['p95']
+    result = summarize(latencies, len(latencies) + len(bulk) * len(slides_data), wall, 'calls', {
+        'latency_scope': 'per_quick_check',
+        'bulk_jobs': len(bulk),
+        'call_slots': gemini_client.call_scheduler.slots,
+        'idle_p95_ms': idle_p95
+    })
+    result['p95_vs_idle'] = round(result['latency_ms']['p95'] / idle_p95, 3) if idle_p95 else 0.0
+    return result
+
+
+def run_report(config: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    deck = _deck(config, workdir)
+    report = _stub_fact_checker(config).check_presentation(deck)
+    generator = ReportGenerator(os.path.join(workdir, 'output'))
+    latencies = []
+    
+    start = time.perf_counter()
+    for _ in range(config['iterations']):
+        iteration_start = time.perf_counter()
+        generator.save_report(report, 'benchmark')
+        generator.generate_improvement_suggestions(report)
+        latencies.append(time.perf_counter() - iteration_start)
+    wall = time.perf_counter() - start
+    
+    return summarize(latencies, config['iterations'], wall, 'reports',
+                     {'latency_scope': 'per_report', 'issues_per_report': report.total_issues})
+
+
+def run_e2e(config: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    deck = _deck(config, workdir)
+    
+    # app.py creates ./uploads and ./output relative to the working directory
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, repo_root)
+    os.chdir(workdir)
+    import app as web_app
+    
+    class StubFactChecker(FactChecker):
+        def __init__(self, gemini_api_key=None, **kwargs):
+            super().__init__(gemini_api_key=gemini_api_key, backend=StubBackend(**_stub_options(config)), **kwargs)
+    
+    client = web_app.app.test_client()
+    latencies = []
+    slides = 0
+    
+    with open(deck, 'rb') as f:
+        deck_bytes = f.read()
+    
+    start = time.perf_counter()
+    with patch.object(web_app, 'FactChecker', StubFactChecker):
+        for _ in range(config['iterations']):
+            iteration_start = time.perf_counter()
+            upload = client.post('/upload', data={'file': (io.BytesIO(deck_bytes), os.path.basename(deck))},
+                                 content_type='multipart/form-data')
+            response = client.post(f"/check/{upload.get_json()['filename']}",
+                                   json={'api_key': 'offline-benchmark', 'force': True})
+            if response.status_code != 200:
+                raise RuntimeError(f"/check failed: {response.get_json()}")
+            slides += response.get_json()['report']['total_slides']
+            latencies.append(time.perf_counter() - iteration_start)
+    wall = time.perf_counter() - start
+    
+    return summarize(latencies, slides, wall, 'slides', {'latency_scope': 'per_request'})
+
+
+def run_replay(config: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    """Check a directory of real decks against a recorded cassette, with no network"""
+    if not config.get('cassette') or not config.get('decks'):
+        return skipped('replay needs --cassette and --decks')
+    
+    decks = sorted(
+        os.path.join(config['decks'], name) for name in os.listdir(config['decks'])
+        if os.path.splitext(name)[1].lower() in ('.pptx', '.pdf')
+    )
+    backend = ReplayBackend(config['cassette'], latency_scale=config.get('latency_scale', 1.0))
+    fact_checker = FactChecker(backend=backend)
+    latencies = []
+    slides = 0
+    failed = 0
+    
+    start = time.perf_counter()
+    for deck in decks:
+        last = [time.perf_counter()]
+        
+        def on_result(result, last=last):
+            now = time.perf_counter()
+            latencies.append(now - last[0])
+            last[0] = now
+        
+        report = fact_checker.check_presentation(deck, progress_callback=on_result)
+        slides += report.total_slides
+        failed += sum(1 for r in report.results if r.status in ('error', 'parse_error'))
+    wall = time.perf_counter() - start
+    
+    return summarize(latencies, slides, wall, 'slides', {
+        'latency_scope': 'per_slide',
+        'decks': len(decks),
+        'failed_slides': failed,
+        'cassette_misses': backend.misses
+    })
+
+
+SCENARIOS: Dict[str, Callable[[Dict[str, Any], str], Dict[str, Any]]] = {
+    'parse': run_parse,
+    'rasterize': run_rasterize,
+    'pdf_text': run_pdf_text,
+    'office_render': run_office_render,
+    'check': run_check,
+    'cascade': run_cascade,
+    'report': run_report,
+    'e2e': run_e2e,
+    'replay': run_replay,
+    'interactive': run_interactive,
+}
@@ -0,0 +1,123 @@
+"""Local stand-in for the Gemini API so the pipeline can be measured offline"""
+
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from src.api.backends import BackendResponse, GenerationBackend, TextCallback, stream_chunks
+from src.api.gemini_client import GeminiClient
+from src.core.models import ISSUE_TYPES, SEVERITIES
+from src.utils.pricing import IMAGE_TOKENS
+
+
+class StubBackend(GenerationBackend):
+    """GenerationBackend with configurable behaviour instead of a network call.
+    
+    latency: 'constant', 'uniform' or 'lognormal' around latency_ms
+    error_rate: fraction of calls that raise like a quota/server error
+    output_tokens: approximate size of each reply
+    issues_per_slide: average number of issues returned
+    malformed_rate: fraction of replies that are truncated, invalid JSON
+    fence_rate: fraction of replies wrapped in a ```json code fence
+    model_latency_ms: per-model latency_ms overrides (e.g. for cascade tiers)
+    """
+    
+    def __init__(self, latency: str = 'lognormal', latency_ms: float = 50.0, latency_sigma: float = 0.5,
+                 error_rate: float = 0.0, output_tokens: int = 200, issues_per_slide: float = 1.0,
+                 malformed_rate: float = 0.0, fence_rate: float = 0.3, seed: int = 0,
+                 model_latency_ms: Optional[Dict[str, float]] = None):
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.output_tokens = output_tokens
+        self.issues_per_slide = issues_per_slide
+        self.malformed_rate = malformed_rate
+        self.fence_rate = fence_rate
+        self.model_latency_ms = model_latency_ms or {}
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def generate(self, model_name: str, prompt: str, image_bytes: Optional[bytes] = None,
+                 on_text: Optional[TextCallback] = None,
+                 response_schema: Optional[Dict[str, Any]] = None) -> BackendResponse:
+        with self._lock:
+            self.calls += 1
+            delay = self._sample_latency(self.model_latency_ms.get(model_name, self.latency_ms))
+            fail = self._rng.random() < self.error_rate
+            malformed = self._rng.random() < self.malformed_rate
+            fenced = self._rng.random() < self.fence_rate
+            issue_count = self._sample_issue_count()
+            seed = self._rng.random()
+        
+        if fail:
+            time.sleep(delay)
+            raise RuntimeError("429 Resource has been exhausted (stub)")
+        
+        text = self._build_reply(prompt, issue_count, random.Random(seed))
+        if malformed:
+            text = text[:max(1, int(len(text) * 0.7))]
+        if fenced:
+            text = f"```json\n{text}\n```"
+        
+        if on_text:
+            stream_chunks(text, delay, on_text)
+        else:
+            time.sleep(delay)
+        
+        input_tokens = int(len(prompt.split()) * 1.3) + (IMAGE_TOKENS if image_bytes else 0)
+        return BackendResponse(text, input_tokens=input_tokens, output_tokens=self.output_tokens, latency=delay)
+    
+    def _sample_latency(self, latency_ms: float) -> float:
+        mean = latency_ms / 1000.0
+        if self.latency == 'constant':
+            return mean
+        if self.latency == 'uniform':
+            return self._rng.uniform(0, 2 * mean)
+        # lognormal with the requested median
+        return mean * self._rng.lognormvariate(0, self.latency_sigma)
+    
+    def _sample_issue_count(self) -> int:
+        whole = int(self.issues_per_slide)
+        return whole + (1 if self._rng.random() < self.issues_per_slide - whole else 0)
+    
+    def _build_reply(self, prompt: str, issue_count: int, rng: random.Random) -> str:
+        match = re.search(r'スライド(\d+)', prompt)
+        slide_number = int(match.group(1)) if match else 0
+        
+        issues = []
+        for _ in range(issue_count):
+            issues.append({
+                'type': rng.choice(ISSUE_TYPES),
+                'severity': rng.choice(SEVERITIES),
+                'original_text': 'GPT-3 was introduced in 2015',
+                'issue_description': 'The year is incorrect.',
+                'correct_information': 'GPT-3 was introduced in 2020',
+                'confidence': round(rng.uniform(0.5, 1.0), 2)
+            })
+        
+        # Pad the summary so the reply is roughly output_tokens long
+        # (about 1.3 tokens per whitespace-separated word)
+        filler_words = max(0, int(self.output_tokens / 1.3) - 40 * issue_count - 10)
+        reply = {
+            'slide_number': slide_number,
+            'status': 'issues_found' if issues else 'ok',
+            'issues': issues,
+            'summary': ' '.join(['checked'] * filler_words)
+        }
+        return json.dumps(reply, ensure_ascii=False, indent=2)
+
+
+def install_stub(client: GeminiClient, **stub_options) -> StubBackend:
+    """Point an existing client at a stub backend and return it"""
+    stub = StubBackend(**stub_options)
+    client.backend = stub
+    return stub
+
+
+def make_stub_client(**stub_options) -> GeminiClient:
+    return GeminiClient(backend=StubBackend(**stub_options))
@@ -0,0 +1,17 @@
+import multiprocessing
+import os
+
+bind = os.getenv('FACTCHECK_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# Checks spend most of their time waiting on the model API, and SSE streams
+# hold a thread each, so every worker serves requests from a thread pool
+worker_class = 'gthread'
+threads = int(os.getenv('FACTCHECK_THREADS', '8'))
+
+# A synchronous /check waits for the whole deck
+timeout = int(os.getenv('FACTCHECK_WORKER_TIMEOUT', '600'))
+graceful_timeout = 30
+
+# Not preloaded: app.py starts background threads, which do not survive fork
+preload_app = False
@@ -0,0 +1,250 @@
+import os
+import io
+import json
+import time
+import hashlib
+import inspect
+import threading
+from typing import Dict, Any, List, Optional, Callable
+import google.generativeai as genai
+from PIL import Image
+
+
+class BackendResponse:
+    def __init__(self, text: str, input_tokens: Optional[int] = None, output_tokens: Optional[int] = None,
+                 latency: float = 0.0):
+        self.text = text
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.latency = latency
+        self.retries = 0
+
+
+class CassetteMiss(KeyError):
+    """Raised by ReplayBackend when a request was never recorded"""
+
+
+def request_key(model_name: str, prompt: str, image_bytes: Optional[bytes] = None) -> str:
+    """Stable identity of a generation request, shared by recording, replay and coalescing"""
+    digest = hashlib.sha256()
+    digest.update(model_name.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(prompt.encode('utf-8'))
+    if image_bytes:
+        digest.update(b'\0')
+        digest.update(image_bytes)
+    return digest.hexdigest()
+
+
+TextCallback = Callable[[str], None]
+
+
+class GenerationBackend:
+    """Interface between GeminiClient and whatever produces model replies.
+    
+    When on_text is given the reply is streamed: on_text receives each text
+    chunk as it arrives, and the returned BackendResponse still carries the
+    full text. response_schema is only passed to backends that set
+    supports_response_schema.
+    """
+    
+    supports_response_schema = False
+    
+    def generate(self, model_name: str, prompt: str, image_bytes: Optional[bytes] = None,
+                 on_text: Optional[TextCallback] = None,
+                 response_schema: Optional[Dict[str, Any]] = None) -> BackendResponse:
+        raise NotImplementedError
+
+
+def stream_chunks(text: str, duration: float, on_text: TextCallback, chunk_size: int = 64):
+    """Deliver text to on_text in fixed-size chunks spread evenly over duration (simulated streaming)"""
+    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or ['']
+    pause = duration / len(chunks)
+    for chunk in chunks:
+        if pause > 0:
+            time.sleep(pause)
+        on_text(chunk)
+
+
+class GenAIBackend(GenerationBackend):
+    """The real Google Gemini API via google-generativeai"""
+    
+    # Older SDKs (e.g. 0.3.x) have no structured output; the schema then lives in the prompt only
+    supports_response_schema = 'response_schema' in inspect.signature(genai.GenerationConfig).parameters
+    
+    def __init__(self, api_key: str):
+        genai.configure(api_key=api_key)
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+    
+    def _model(self, model_name: str):
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = genai.GenerativeModel(model_name)
+            return self._models[model_name]
+    
+    def generate(self, model_name: str, prompt: str, image_bytes: Optional[bytes] = None,
+                 on_text: Optional[TextCallback] = None,
+                 response_schema: Optional[Dict[str, Any]] = None) -> BackendResponse:
+        model = self._model(model_name)
+        start = time.perf_counter()
+        if image_bytes:
+            image = Image.open(io.BytesIO(image_bytes))
+            contents = [prompt, image]
+        else:
+            contents = prompt
+        
+        options = {}
+        if response_schema is not None and self.supports_response_schema:
+            options['generation_config'] = genai.GenerationConfig(
+                response_mime_type='application/json', response_schema=response_schema
+            )
+        
+        if on_text:
+            response = model.generate_content(contents, stream=True, **options)
+            for chunk in response:
+                on_text(chunk.text)
+        else:
+            response = model.generate_content(contents, **options)
+        latency = time.perf_counter() - start
+        
+        # usage_metadata is only populated by newer API versions
+        usage = getattr(response, 'usage_metadata', None)
+        return BackendResponse(
+            response.text,
+            input_tokens=getattr(usage, 'prompt_token_count', None),
+            output_tokens=getattr(usage, 'candidates_token_count', None),
+            latency=latency
+        )
+
+
+class Cassette:
+    """Append-only JSONL file of recorded request/response pairs"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def append(self, entry: Dict[str, Any]):
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    
+    def load(self) -> List[Dict[str, Any]]:
+        entries = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entries.append(json.loads(line))
+        return entries
+
+
+class RecordingBackend(GenerationBackend):
+    """Passes requests to another backend and records every exchange with its timing"""
+    
+    def __init__(self, inner: GenerationBackend, cassette_path: str):
+        self.inner = inner
+        self.cassette = Cassette(cassette_path)
+        self.supports_response_schema = inner.supports_response_schema
+    
+    def generate(self, model_name: str, prompt: str, image_bytes: Optional[bytes] = None,
+                 on_text: Optional[TextCallback] = None,
+                 response_schema: Optional[Dict[str, Any]] = None) -> BackendResponse:
+        entry = {
+            'key': request_key(model_name, prompt, image_bytes),
+            'model': model_name,
+            'prompt': prompt,
+            'image_sha256': hashlib.sha256(image_bytes).hexdigest() if image_bytes else None,
+            'image_bytes': len(image_bytes) if image_bytes else 0,
+        }
+        start = time.perf_counter()
+        try:
+            options = {'on_text': on_text, 'response_schema': response_schema}
+            response = self.inner.generate(
+                model_name, prompt, image_bytes, **{k: v for k, v in options.items() if v is not None}
+            )
+        except Exception as e:
+            entry.update({'error': str(e), 'latency': time.perf_counter() - start, 'text': None})
+            self.cassette.append(entry)
+            raise
+        
+        entry.update({
+            'error': None,
+            'latency': time.perf_counter() - start,
+            'text': response.text,
+            'input_tokens': response.input_tokens,
+            'output_tokens': response.output_tokens
+        })
+        self.cassette.append(entry)
+        return response
+
+
+class ReplayBackend(GenerationBackend):
+    """Serves recorded responses offline, sleeping for the recorded latency times latency_scale.
+    
+    Requests recorded several times are replayed in recording order, cycling
+    when exhausted. Unknown requests raise CassetteMiss.
+    """
+    
+    def __init__(self, cassette_path: str, latency_scale: float = 1.0):
+        self.latency_scale = latency_scale
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.misses = 0
+        
+        for entry in Cassette(cassette_path).load():
+            self._entries.setdefault(entry['key'], []).append(entry)
+    
+    def generate(self, model_name: str, prompt: str, image_bytes: Optional[bytes] = None,
+                 on_text: Optional[TextCallback] = None,
+                 response_schema: Optional[Dict[str, Any]] = None) -> BackendResponse:
+        key = request_key(model_name, prompt, image_bytes)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                raise CassetteMiss(f"No recorded response for {model_name} request {key[:12]}")
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            entry = entries[position % len(entries)]
+        
+        latency = entry.get('latency', 0.0) * self.latency_scale
+        if entry.get('error'):
+            if latency > 0:
+                time.sleep(latency)
+            raise RuntimeError(entry['error'])
+        
+        if on_text:
+            stream_chunks(entry['text'], latency, on_text)
+        elif latency > 0:
+            time.sleep(latency)
+        
+        return BackendResponse(
+            entry['text'],
+            input_tokens=entry.get('input_tokens'),
+            output_tokens=entry.get('output_tokens'),
+            latency=latency
+        )
+
+
+def create_backend(api_key: Optional[str]) -> GenerationBackend:
+    """Build the backend selected by FACTCHECK_BACKEND (genai, record or replay)"""
+    mode = os.getenv('FACTCHECK_BACKEND', 'genai').lower()
+    cassette_path = os.getenv('FACTCHECK_CASSETTE', './cassettes/gemini.jsonl')
+    
+    if mode == 'replay':
+        return ReplayBackend(cassette_path, float(os.getenv('FACTCHECK_REPLAY_LATENCY_SCALE', '1.0')))
+    
+    if not api_key:
+        raise ValueError("Google API key is required")
+    
+    if mode == 'record':
+        return RecordingBackend(GenAIBackend(api_key), cassette_path)
+    if mode == 'genai':
+        return GenAIBackend(api_key)
+    raise ValueError(f"Unknown FACTCHECK_BACKEND: {mode}")
@@ -1,65 +1,521 @@
 import os
-import google.generativeai as genai
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from dotenv import load_dotenv
 import json
 import base64
-from PIL import Image
-import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pydantic import ValidationError
+from src.api.backends import BackendResponse, CassetteMiss, GenerationBackend, create_backend, request_key
+from src.api.json_repair import extract_json_text, repair_json
+from src.api.streaming_json import IncrementalIssueParser
+from src.core.models import FactCheckResult, REPLY_STATUSES, reply_json_schema
+from src.utils.metrics import REGISTRY
+from src.utils.budget import JobBudget
+from src.utils.cancellation import CancellationToken, JobCancelled
+from src.utils.chunking import split_text
+from src.utils.claims import claim_score, order_by_claims
+from src.utils.circuit_breaker import CircuitBreakers, CircuitOpenError, is_availability_error
+from src.utils.pricing import EXPECTED_OUTPUT_TOKENS_PER_SLIDE, IMAGE_TOKENS, calculate_cost
+from src.utils.profiler import follow
+from src.utils.shared_state import SharedRateLimiter, SharedSingleFlight, SharedState
+from src.utils.scheduler import DECK, CallScheduler
+from src.utils.single_flight import SingleFlight
+from src.utils.tokenizer import count_tokens
+from src.utils.usage_ledger import UsageLedger, api_key_id
 
 load_dotenv()
 
+# Shared by every client in the process so identical slide calls from
+# concurrent jobs hit the API only once
+_slide_calls = SingleFlight()
+# Orders every model API call in the process by priority class and fair share per API key
+call_scheduler = CallScheduler.from_env()
+# Fail calls fast while the model API is unavailable, per API key (per worker process)
+circuit_breakers = CircuitBreakers.from_env()
+# Paces model API requests; set by configure_shared_state when a limit is configured
+_rate_limiter: Optional[SharedRateLimiter] = None
+
+
+def _encode_response(response: BackendResponse) -> str:
+    return json.dumps({'text': response.text, 'input_tokens': response.input_tokens,
+                       'output_tokens': response.output_tokens, 'latency': response.latency,
+                       'retries': response.retries}, ensure_ascii=False)
+
+
+def _decode_response(payload: str) -> BackendResponse:
+    data = json.loads(payload)
+    response = BackendResponse(data['text'], data['input_tokens'], data['output_tokens'], data['latency'])
+    response.retries = data['retries']
+    return response
+
+
+def configure_shared_state(state: SharedState, requests_per_minute: Optional[float] = None):
+    """Coalesce identical calls and pace requests across every worker sharing state.
+    
+    requests_per_minute defaults to GEMINI_REQUESTS_PER_MINUTE; 0 or empty
+    leaves requests unpaced.
+    """
+    global _slide_calls, _rate_limiter
+    if requests_per_minute is None:
+        requests_per_minute = float(os.getenv('GEMINI_REQUESTS_PER_MINUTE') or 0)
+    _slide_calls = SharedSingleFlight(state, _encode_response, _decode_response)
+    _rate_limiter = SharedRateLimiter(state, 'gemini', requests_per_minute) if requests_per_minute > 0 else None
+
+
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    'factcheck_queue_wait_seconds', 'Time a slide waits in its batch before the API call starts')
+QUEUE_DEPTH = REGISTRY.gauge('factcheck_queue_depth', 'Slides waiting for an API call across all jobs')
+API_LATENCY_SECONDS = REGISTRY.histogram(
+    'factcheck_api_latency_seconds', 'Latency of single model API attempts', ['model', 'outcome'])
+API_RETRIES = REGISTRY.counter('factcheck_api_retries_total', 'Model API attempts retried after an error', ['model'])
+RESPONSE_PARSE_SECONDS = REGISTRY.histogram(
+    'factcheck_response_parse_seconds', 'Time spent parsing model replies',
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+PARSE_ERRORS = REGISTRY.counter('factcheck_parse_errors_total', 'Model replies that could not be parsed as JSON')
+REPAIRS = REGISTRY.counter(
+    'factcheck_reply_repairs_total', 'Malformed model replies by how they were handled', ['outcome'])
+BUDGET_DECISIONS = REGISTRY.counter(
+    'factcheck_budget_decisions_total', 'Slides admitted, degraded, skipped or stopped by a budget', ['decision'])
+STOPPED_SLIDES = REGISTRY.counter(
+    'factcheck_stopped_slides_total', 'Slides left unchecked by a cancellation or deadline', ['reason'])
+DEADLINE_DEGRADED = REGISTRY.counter(
+    'factcheck_deadline_degraded_slides_total', 'Slides sent text-only on the first tier to meet a deadline')
+CHUNKED_SLIDES = REGISTRY.counter(
+    'factcheck_chunked_slides_total', 'Oversize slides checked as concurrent chunks')
+SLIDE_RESULTS = REGISTRY.counter('factcheck_slide_results_total', 'Checked slides by result status', ['status'])
+COALESCED_CALLS = REGISTRY.counter(
+    'factcheck_coalesced_calls_total', 'Slide calls served by an identical call already in flight')
+TOKENS = REGISTRY.counter('factcheck_tokens_total', 'Tokens sent to and received from the model', ['model', 'direction'])
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.histogram(
+    'factcheck_rate_limit_wait_seconds', 'Time a model API request waited for the shared rate limiter')
+COST_USD = REGISTRY.counter('factcheck_cost_usd_total', 'Estimated API spend in USD', ['model'])
+
+
+SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2}
+
+
+def parse_cascade(spec: str) -> List[Tuple[str, str]]:
+    """Parse GEMINI_MODEL_CASCADE: comma-separated tiers, cheapest first.
+    
+    Each tier is `text_model` or `text_model:vision_model`; a tier without a
+    vision model uses its text model for slides with images too.
+    """
+    tiers = []
+    for tier in spec.split(','):
+        tier = tier.strip()
+        if not tier:
+            continue
+        text_model, _, vision_model = tier.partition(':')
+        tiers.append((text_model.strip(), vision_model.strip() or text_model.strip()))
+    return tiers
+
+
+def _order_file(slides: List[Dict[str, Any]]) -> List[int]:
+    return list(range(len(slides)))
+
+
+def _order_text_first(slides: List[Dict[str, Any]]) -> List[int]:
+    # Text-only slides are cheaper and faster, so their results arrive first
+    return sorted(range(len(slides)), key=lambda index: bool(slides[index].get('image_base64')))
+
+
+def _order_short_first(slides: List[Dict[str, Any]]) -> List[int]:
+    return sorted(range(len(slides)), key=lambda index: len(slides[index].get('text_content') or ''))
+
+
+def _order_claims(slides: List[Dict[str, Any]]) -> List[int]:
+    # Claim-heavy slides first, so the likely issues stream out early
+    return order_by_claims([slide.get('text_content') or '' for slide in slides])
+
+
+# Order in which a job sends its slides; results are always returned in slide order
+SLIDE_ORDERS: Dict[str, Callable[[List[Dict[str, Any]]], List[int]]] = {
+    'file': _order_file,
+    'text_first': _order_text_first,
+    'short_first': _order_short_first,
+    'claims': _order_claims
+}
+
 
 class GeminiClient:
-    def __init__(self, api_key: Optional[str] = None):
+    TEXT_MODEL_NAME = 'gemini-pro'
+    VISION_MODEL_NAME = 'gemini-pro-vision'
+    # Bump whenever _create_fact_check_prompt changes so cached reports are not reused
+    PROMPT_VERSION = '2'
+    
+    def __init__(self, api_key: Optional[str] = None, backend: Optional[GenerationBackend] = None,
+                 ledger: Optional[UsageLedger] = None):
         self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
-        if not self.api_key:
-            raise ValueError("Google API key is required")
         
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
-        self.vision_model = genai.GenerativeModel('gemini-pro-vision')
+        # Every API call is appended to the usage ledger, labelled with the
+        # deck and job being checked (see FactChecker.check_presentation)
+        self.ledger = ledger
+        self.usage_labels: Dict[str, Any] = {}
+        
+        # Scheduling class of this client's calls (interactive, deck or bulk);
+        # calls are shared fairly between API keys
+        self.priority = DECK
+        self.tenant = api_key_id(self.api_key)
+        self.circuit = circuit_breakers.get(self.tenant)
+        
+        # Set by batch_check_facts for the job it runs: once it fires, the job
+        # stops waiting on in-flight calls and sends no new ones
+        self.cancel: Optional[CancellationToken] = None
+        
+        # The backend is the real API unless FACTCHECK_BACKEND selects record/replay
+        self.backend = backend or create_backend(self.api_key)
+        
+        # Transient API errors (quota, 5xx) are retried with exponential backoff
+        self.max_retries = int(os.getenv('GEMINI_MAX_RETRIES', '2'))
+        self.retry_backoff = float(os.getenv('GEMINI_RETRY_BACKOFF', '1.0'))
         
-        # Token pricing for cost estimation
-        self.input_price_per_1k = 0.00025
-        self.output_price_per_1k = 0.0005
+        # Structured output: the reply schema is sent with each request (and passed
+        # to the API as a response schema where the SDK supports it)
+        self.structured_output = os.getenv('GEMINI_STRUCTURED_OUTPUT', '1').lower() in ('1', 'true', 'yes')
+        self.reply_schema = reply_json_schema()
+        
+        # Model cascade: every slide goes to the first tier; suspicious slides are
+        # re-checked on the next one. A single tier is the classic one-model setup
+        self.tiers = parse_cascade(os.getenv('GEMINI_MODEL_CASCADE', '')) or [
+            (self.TEXT_MODEL_NAME, self.VISION_MODEL_NAME)
+        ]
+        self.escalate_severity = os.getenv('GEMINI_ESCALATE_SEVERITY', 'medium').lower()
+        self.escalate_confidence = float(os.getenv('GEMINI_ESCALATE_CONFIDENCE', '0.5'))
+        
+        # Slides longer than this many tokens are checked as concurrent chunks (0 = never split)
+        self.chunk_tokens = int(os.getenv('GEMINI_CHUNK_TOKENS', '2000'))
+        self.chunk_overlap_tokens = int(os.getenv('GEMINI_CHUNK_OVERLAP_TOKENS', '100'))
+        self.chunk_workers = max(1, int(os.getenv('GEMINI_CHUNK_WORKERS', '4')))
     
-    def check_facts(self, content: str, slide_number: int, image_base64: Optional[str] = None) -> Dict[str, Any]:
+    def report_key(self) -> str:
+        """Identify the model and prompt combination that produced a report"""
+        mode = '+schema' if self.structured_output else ''
+        models = '>'.join(f"{text_model}+{vision_model}" for text_model, vision_model in self.tiers)
+        if len(self.tiers) > 1:
+            models += f"@{self.escalate_severity}/{self.escalate_confidence}"
+        if self.chunk_tokens > 0:
+            mode += f"+chunk{self.chunk_tokens}/{self.chunk_overlap_tokens}"
+        return f"{models}:prompt-v{self.PROMPT_VERSION}{mode}"
+    
+    def check_facts(self, content: str, slide_number: int, image_base64: Optional[str] = None,
+                    on_issue: Optional[Callable[[Dict[str, Any]], None]] = None,
+                    max_tiers: Optional[int] = None) -> Dict[str, Any]:
+        """Check one slide.
+        
+        With on_issue the reply is streamed and each issue is passed to
+        on_issue as soon as its JSON object is complete, before the slide
+        finishes. The returned result is always parsed from the full reply.
+        max_tiers limits how far up the cascade the slide may escalate.
+        """
+        try:
+            image_bytes = base64.b64decode(image_base64) if image_base64 else None
+        except Exception as e:
+            SLIDE_RESULTS.inc(status='error')
+            return {'slide_number': slide_number, 'status': 'error', 'error_message': str(e), 'issues': []}
+        
+        chunks = split_text(content, self.chunk_tokens, self.chunk_overlap_tokens)
+        if len(chunks) == 1:
+            result = self._check_tiers(content, slide_number, image_bytes, on_issue, max_tiers)
+        else:
+            result = self._check_chunks(chunks, slide_number, image_bytes, on_issue, max_tiers)
+        SLIDE_RESULTS.inc(status=result.get('status', 'unknown'))
+        return result
+    
+    def _check_tiers(self, content: str, slide_number: int, image_bytes: Optional[bytes],
+                     on_issue: Optional[Callable[[Dict[str, Any]], None]] = None,
+                     max_tiers: Optional[int] = None, usage_kind: str = 'slide') -> Dict[str, Any]:
+        """Check text on the first tier, escalating up the cascade as needed"""
         prompt = self._create_fact_check_prompt(content, slide_number)
+        tier_results = []
+        for tier, (text_model, vision_model) in enumerate(self.tiers[:max_tiers]):
+            # Use vision model for slides with images, text model otherwise
+            model_name = vision_model if image_bytes else text_model
+            result = self._check_with_model(model_name, prompt, slide_number, image_bytes, on_issue, tier,
+                                            usage_kind)
+            tier_results.append(result)
+            if not self._should_escalate(result):
+                break
+        return self._merge_tiers(tier_results)
+    
+    def _check_chunks(self, chunks: List[str], slide_number: int, image_bytes: Optional[bytes],
+                      on_issue: Optional[Callable[[Dict[str, Any]], None]] = None,
+                      max_tiers: Optional[int] = None) -> Dict[str, Any]:
+        """Check an oversize slide as concurrent sub-checks, one per chunk.
+        
+        The image (if any) goes with the first chunk only. Streamed issues
+        are passed on as they arrive, so one found in the overlap may be
+        streamed twice; the returned result keeps it once.
+        """
+        CHUNKED_SLIDES.inc()
+        on_chunk_issue = partial(self._forward_issue, on_issue, threading.Lock()) if on_issue else None
+        
+        with ThreadPoolExecutor(max_workers=min(self.chunk_workers, len(chunks)),
+                                thread_name_prefix=f"slide-{slide_number}-chunk") as executor:
+            futures = [
+                # The ledger counts the slide once, on its first chunk
+                executor.submit(follow(self._check_tiers), chunk, slide_number, image_bytes if index == 0 else None,
+                                on_chunk_issue, max_tiers, 'slide' if index == 0 else 'chunk')
+                for index, chunk in enumerate(chunks)
+            ]
+            chunk_results = [future.result() for future in futures]
+        return self._merge_chunks(chunk_results)
+    
+    @staticmethod
+    def _forward_issue(on_issue: Callable[[Dict[str, Any]], None], lock: threading.Lock, issue: Dict[str, Any]):
+        """Pass on an issue streamed by one of several concurrent chunks, one at a time"""
+        with lock:
+            on_issue(issue)
+    
+    @staticmethod
+    def _merge_chunks(chunk_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine the sub-checks of one slide into a single result.
         
+        Issues are deduplicated on (type, original text), keeping the most
+        confident copy. Tokens, cost, retries and bytes add up; latency is
+        the slowest chunk, since the chunks ran concurrently.
+        """
+        usable = [result for result in chunk_results if result.get('status') not in ('error', 'parse_error')]
+        merged = dict((usable or chunk_results)[0])
+        
+        issues = {}
+        for result in usable:
+            for issue in result.get('issues', []):
+                key = (issue.get('type'), ' '.join(str(issue.get('original_text', '')).split()))
+                if key not in issues or issue.get('confidence', 0) > issues[key].get('confidence', 0):
+                    issues[key] = issue
+        merged['issues'] = list(issues.values())
+        if usable:
+            merged['status'] = 'issues_found' if merged['issues'] else 'ok'
+            merged['summary'] = ' / '.join(result.get('summary', '') for result in usable if result.get('summary'))
+        
+        usage = {'input_tokens': 0, 'output_tokens': 0, 'estimated_cost': 0.0, 'shared': True}
+        for result in chunk_results:
+            result_usage = result.get('token_usage') or {}
+            usage['input_tokens'] += result_usage.get('input_tokens', 0)
+            usage['output_tokens'] += result_usage.get('output_tokens', 0)
+            usage['estimated_cost'] += result_usage.get('estimated_cost', 0.0)
+            usage['shared'] = usage['shared'] and result_usage.get('shared', False)
+        usage['estimated_cost'] = round(usage['estimated_cost'], 6)
+        merged['token_usage'] = usage
+        
+        performances = [result['performance'] for result in chunk_results if 'performance' in result]
+        if performances:
+            performance = dict(merged.get('performance') or performances[0])
+            performance.update(
+                latency=max(p['latency'] for p in performances),
+                retries=sum(p.get('retries', 0) for p in performances),
+                bytes_sent=sum(p.get('bytes_sent', 0) for p in performances),
+                cache_hit=all(p.get('cache_hit', False) for p in performances),
+                tier=max(p.get('tier', 0) for p in performances),
+                escalated=any(p.get('escalated', False) for p in performances),
+                tiers=[tier for p in performances for tier in p.get('tiers', [])],
+                chunks=len(chunk_results)
+            )
+            merged['performance'] = performance
+        return merged
+    
+    def _check_with_model(self, model_name: str, prompt: str, slide_number: int, image_bytes: Optional[bytes],
+                          on_issue: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          tier: int = 0, usage_kind: str = 'slide') -> Dict[str, Any]:
+        stream = None
+        if on_issue:
+            # An abandoned call may keep streaming; its issues are dropped
+            stream = IncrementalIssueParser(
+                lambda issue: None if self.cancel is not None and self.cancel.cancelled
+                else on_issue({'slide_number': slide_number, 'tier': tier, **issue})
+            )
+        
+        call_start = time.perf_counter()
         try:
-            if image_base64:
-                # Use vision model for slides with images
-                image_data = base64.b64decode(image_base64)
-                image = Image.open(io.BytesIO(image_data))
-                response = self.vision_model.generate_content([prompt, image])
-            else:
-                # Use text model for text-only slides
-                response = self.model.generate_content(prompt)
+            call_key = request_key(model_name, prompt, image_bytes)
+            response, shared = self._call(lambda: _slide_calls.do(
+                call_key, lambda: self._generate(model_name, prompt, image_bytes, stream)
+            ))
+            latency = time.perf_counter() - call_start
+            response_text = response.text
             
-            # Parse the response
-            result = self._parse_fact_check_response(response.text, slide_number)
+            # Parse the response (with a local repair pass)
+            with RESPONSE_PARSE_SECONDS.time():
+                result = self._parse_fact_check_response(response_text, slide_number)
             
-            # Estimate tokens used (rough estimation)
-            input_tokens = len(prompt.split()) * 1.3  # Rough token estimation
-            output_tokens = len(response.text.split()) * 1.3
+            # Prefer the counts reported by the API, else a rough estimation
+            input_tokens = response.input_tokens or len(prompt.split()) * 1.3
+            output_tokens = response.output_tokens or len(response_text.split()) * 1.3
+            cost = self._calculate_cost(input_tokens, output_tokens, model_name)
+            
+            if shared:
+                COALESCED_CALLS.inc()
+            else:
+                TOKENS.inc(int(input_tokens), model=model_name, direction='input')
+                TOKENS.inc(int(output_tokens), model=model_name, direction='output')
+                COST_USD.inc(cost, model=model_name)
+            self._record_usage(model_name, input_tokens, output_tokens, 0.0 if shared else cost,
+                               kind=usage_kind, slide_number=slide_number, tier=tier, shared=shared)
+            
+            # Still broken: re-issue only a small repair request, never the slide call
+            if result.get('status') == 'parse_error':
+                repaired, repair_tokens = self._request_repair(response_text, slide_number)
+                if repaired is not None:
+                    result = repaired
+                input_tokens += repair_tokens[0]
+                output_tokens += repair_tokens[1]
+                cost += repair_tokens[2]
+            if result.get('status') == 'parse_error':
+                PARSE_ERRORS.inc()
             
             result['token_usage'] = {
                 'input_tokens': int(input_tokens),
                 'output_tokens': int(output_tokens),
-                'estimated_cost': self._calculate_cost(input_tokens, output_tokens)
+                # A coalesced call was paid for by the job that issued it
+                'estimated_cost': 0.0 if shared else cost,
+                'shared': shared
+            }
+            result['performance'] = {
+                'latency': round(latency, 4),
+                'retries': response.retries,
+                'bytes_sent': 0 if shared else len(prompt.encode('utf-8')) + len(image_bytes or b''),
+                'route': 'image' if image_bytes else 'text',
+                'model': model_name,
+                'cache_hit': shared,
+                'tier': tier
             }
             
             return result
             
+        except JobCancelled:
+            raise
         except Exception as e:
             return {
                 'slide_number': slide_number,
                 'status': 'error',
                 'error_message': str(e),
-                'issues': []
+                'issues': [],
+                'performance': {
+                    'latency': round(time.perf_counter() - call_start, 4),
+                    'route': 'image' if image_bytes else 'text',
+                    'model': model_name,
+                    'tier': tier
+                }
             }
     
+    def _call(self, fn: Callable[[], Any]) -> Any:
+        """Run an API call, or stop waiting for it when the job is cancelled"""
+        if self.cancel is None:
+            return fn()
+        return self.cancel.run(fn)
+    
+    def _should_escalate(self, result: Dict[str, Any]) -> bool:
+        """Re-check a slide on the next tier: failed replies, or issues at/above the thresholds"""
+        if result.get('status') in ('error', 'parse_error'):
+            return True
+        threshold = SEVERITY_RANK.get(self.escalate_severity, 1)
+        for issue in result.get('issues', []):
+            severity = SEVERITY_RANK.get(str(issue.get('severity', 'medium')).lower(), 1)
+            try:
+                confidence = float(issue.get('confidence', 0.5))
+            except (TypeError, ValueError):
+                confidence = 0.5
+            if severity >= threshold and confidence >= self.escalate_confidence:
+                return True
+        return False
+    
+    def _merge_tiers(self, tier_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine a slide's results across tiers.
+        
+        The highest tier that produced a usable reply decides the verdict;
+        tokens, cost, latency and retries add up over every tier that ran.
+        """
+        final = tier_results[-1]
+        for result in reversed(tier_results):
+            if result.get('status') not in ('error', 'parse_error'):
+                final = result
+                break
+        
+        merged = dict(final)
+        tiers = []
+        usage = {'input_tokens': 0, 'output_tokens': 0, 'estimated_cost': 0.0, 'shared': True}
+        performance = dict(final['performance'], latency=0.0, retries=0, bytes_sent=0, cache_hit=True)
+        for result in tier_results:
+            result_usage = result.get('token_usage') or {}
+            result_performance = result['performance']
+            tiers.append({
+                'tier': result_performance['tier'],
+                'model': result_performance['model'],
+                'status': result.get('status'),
+                'issues': len(result.get('issues', [])),
+                'latency': result_performance['latency'],
+                'cost': result_usage.get('estimated_cost', 0.0)
+            })
+            usage['input_tokens'] += result_usage.get('input_tokens', 0)
+            usage['output_tokens'] += result_usage.get('output_tokens', 0)
+            usage['estimated_cost'] += result_usage.get('estimated_cost', 0.0)
+            usage['shared'] = usage['shared'] and result_usage.get('shared', False)
+            performance['latency'] = round(performance['latency'] + result_performance['latency'], 4)
+            performance['retries'] += result_performance.get('retries', 0)
+            performance['bytes_sent'] += result_performance.get('bytes_sent', 0)
+            performance['cache_hit'] = performance['cache_hit'] and result_performance.get('cache_hit', False)
+        
+        usage['estimated_cost'] = round(usage['estimated_cost'], 6)
+        performance['escalated'] = len(tier_results) > 1
+        performance['tiers'] = tiers
+        if 'token_usage' in final or len(tier_results) > 1:
+            merged['token_usage'] = usage
+        merged['performance'] = performance
+        return merged
+    
+    def _generate(self, model_name: str, prompt: str, image_bytes: Optional[bytes] = None,
+                  stream: Optional[IncrementalIssueParser] = None,
+                  max_retries: Optional[int] = None) -> BackendResponse:
+        """Call the backend, retrying failed attempts with exponential backoff"""
+        if max_retries is None:
+            max_retries = self.max_retries
+        options = {}
+        if self.structured_output and getattr(self.backend, 'supports_response_schema', False):
+            options['response_schema'] = self.reply_schema
+        
+        attempt = 0
+        while True:
+            if not self.circuit.allow():
+                raise CircuitOpenError(
+                    f"Model API unavailable; retry in {self.circuit.retry_after():.0f}s")
+            start = time.perf_counter()
+            try:
+                with call_scheduler.slot(self.priority, self.tenant):
+                    if _rate_limiter:
+                        RATE_LIMIT_WAIT_SECONDS.observe(_rate_limiter.acquire())
+                    start = time.perf_counter()
+                    if stream:
+                        stream.reset()
+                        options['on_text'] = stream.feed
+                    response = self.backend.generate(model_name, prompt, image_bytes, **options)
+            except Exception as error:
+                if is_availability_error(error):
+                    self.circuit.record_failure()
+                else:
+                    # The API answered (or was never asked): only this request was refused
+                    self.circuit.release()
+                if isinstance(error, CassetteMiss):
+                    # Retrying cannot help a request that was never recorded
+                    raise
+                API_LATENCY_SECONDS.observe(time.perf_counter() - start, model=model_name, outcome='error')
+                if attempt >= max_retries:
+                    raise
+                attempt += 1
+                API_RETRIES.inc(model=model_name)
+                time.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+                continue
+            except BaseException:
+                self.circuit.release()
+                raise
+            
+            self.circuit.record_success()
+            API_LATENCY_SECONDS.observe(time.perf_counter() - start, model=model_name, outcome='ok')
+            response.retries = attempt
+            return response
+    
     def _create_fact_check_prompt(self, content: str, slide_number: int) -> str:
         return f"""
         あなたは講義スライドのファクトチェックを行う専門家です。
@@ -93,56 +549,293 @@ class GeminiClient:
         }}
         
         問題が見つからない場合は、issuesを空の配列[]として返してください。
+        {self._schema_instruction()}"""
+    
+    def _schema_instruction(self) -> str:
+        if not self.structured_output:
+            return ""
+        schema = json.dumps(self.reply_schema, ensure_ascii=False)
+        return f"""
+        回答は次のJSONスキーマに厳密に従い、JSONのみを返してください：
+        {schema}
         """
     
     def _parse_fact_check_response(self, response_text: str, slide_number: int) -> Dict[str, Any]:
+        # Sometimes the model returns markdown code blocks
         try:
-            # Extract JSON from the response
-            # Sometimes the model returns markdown code blocks
-            if '```json' in response_text:
-                json_start = response_text.find('```json') + 7
-                json_end = response_text.find('```', json_start)
-                json_text = response_text[json_start:json_end].strip()
-            else:
-                json_text = response_text.strip()
-            
-            result = json.loads(json_text)
-            return result
-            
+            result = self._validate_reply(json.loads(extract_json_text(response_text)), slide_number)
         except json.JSONDecodeError:
-            # Fallback: Try to extract meaningful information
-            return {
+            result = None
+        if result is not None:
+            return result
+        
+        # Local repair: fences, trailing commas, truncated output
+        result = self._validate_reply(repair_json(response_text), slide_number)
+        if result is not None:
+            REPAIRS.inc(outcome='local')
+            result['repair'] = 'local'
+            return result
+        
+        return {
+            'slide_number': slide_number,
+            'status': 'parse_error',
+            'raw_response': response_text,
+            'issues': [],
+            'summary': 'Response parsing failed'
+        }
+    
+    def _validate_reply(self, data: Any, slide_number: int) -> Optional[Dict[str, Any]]:
+        """Return the reply if it matches the FactCheckResult schema, else None"""
+        if not isinstance(data, dict) or data.get('status') not in REPLY_STATUSES:
+            return None
+        issues = data.get('issues')
+        if not isinstance(issues, list) or not all(isinstance(issue, dict) for issue in issues):
+            return None
+        if data['status'] == 'issues_found' and not issues:
+            return None
+        try:
+            FactCheckResult.model_validate({
+                **data,
                 'slide_number': slide_number,
-                'status': 'parse_error',
-                'raw_response': response_text,
-                'issues': [],
-                'summary': 'Response parsing failed'
-            }
+                'issues': [dict(issue, slide_number=slide_number) for issue in issues]
+            })
+        except ValidationError:
+            return None
+        return data
+    
+    def _create_repair_prompt(self, response_text: str) -> str:
+        schema = json.dumps(self.reply_schema, ensure_ascii=False)
+        return f"""
+        次のJSONは壊れているか、スキーマに合っていません。内容を変えずに修正し、JSONのみを返してください。
+        
+        スキーマ：
+        {schema}
+        
+        JSON：
+        {response_text}
+        """
+    
+    def _request_repair(self, response_text: str, slide_number: int):
+        """Ask a text model to fix a malformed reply.
+        
+        Returns (result or None, (input_tokens, output_tokens, cost)). The
+        request carries only the broken reply and the schema, no slide content
+        or image, and is not retried.
+        """
+        prompt = self._create_repair_prompt(response_text)
+        # The cheapest tier's text model is enough to fix JSON syntax
+        model_name = self.tiers[0][0]
+        try:
+            response, shared = self._call(lambda: _slide_calls.do(
+                request_key(model_name, prompt),
+                lambda: self._generate(model_name, prompt, max_retries=0)
+            ))
+        except JobCancelled:
+            raise
+        except Exception:
+            REPAIRS.inc(outcome='failed')
+            return None, (0, 0, 0.0)
+        
+        input_tokens = response.input_tokens or len(prompt.split()) * 1.3
+        output_tokens = response.output_tokens or len(response.text.split()) * 1.3
+        cost = 0.0 if shared else self._calculate_cost(input_tokens, output_tokens, model_name)
+        if not shared:
+            TOKENS.inc(int(input_tokens), model=model_name, direction='input')
+            TOKENS.inc(int(output_tokens), model=model_name, direction='output')
+            COST_USD.inc(cost, model=model_name)
+        self._record_usage(model_name, input_tokens, output_tokens, cost, kind='repair',
+                           slide_number=slide_number, shared=shared)
+        
+        data = repair_json(response.text)
+        result = self._validate_reply(data, slide_number)
+        if result is None:
+            REPAIRS.inc(outcome='failed')
+            return None, (input_tokens, output_tokens, cost)
+        
+        REPAIRS.inc(outcome='request')
+        result['repair'] = 'request'
+        return result, (input_tokens, output_tokens, cost)
+    
+    def _record_usage(self, model_name: str, input_tokens: float, output_tokens: float, cost: float, **fields):
+        if self.ledger is None:
+            return
+        self.ledger.record(
+            model_name, int(input_tokens), int(output_tokens), cost,
+            key_id=api_key_id(self.api_key), **self.usage_labels, **fields
+        )
     
-    def _calculate_cost(self, input_tokens: float, output_tokens: float) -> float:
-        input_cost = (input_tokens / 1000) * self.input_price_per_1k
-        output_cost = (output_tokens / 1000) * self.output_price_per_1k
-        return round(input_cost + output_cost, 6)
+    def _calculate_cost(self, input_tokens: float, output_tokens: float, model_name: Optional[str] = None) -> float:
+        return calculate_cost(input_tokens, output_tokens, model_name)
     
-    def batch_check_facts(self, slides_content: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def estimate_slide(self, content: str, slide_number: int, has_image: bool) -> Dict[str, Tuple[float, int]]:
+        """Pre-call (cost, tokens) of a slide on the first tier, with its image and text-only"""
+        text_model, vision_model = self.tiers[0]
+        prompt_tokens = count_tokens(self._create_fact_check_prompt(content, slide_number))
+        text_tokens = prompt_tokens + EXPECTED_OUTPUT_TOKENS_PER_SLIDE
+        text = (calculate_cost(prompt_tokens, EXPECTED_OUTPUT_TOKENS_PER_SLIDE, text_model), text_tokens)
+        if not has_image:
+            return {'full': text, 'text': text}
+        full_cost = calculate_cost(prompt_tokens + IMAGE_TOKENS, EXPECTED_OUTPUT_TOKENS_PER_SLIDE, vision_model)
+        return {'full': (full_cost, text_tokens + IMAGE_TOKENS), 'text': text}
+    
+    def batch_check_facts(self, slides_content: List[Dict[str, Any]],
+                          on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          on_issue: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          budget: Optional[JobBudget] = None, order: Optional[str] = None,
+                          cancel: Optional[CancellationToken] = None,
+                          degrade_near_deadline: bool = False) -> List[Dict[str, Any]]:
+        """Check slides, sending them in the given order (see SLIDE_ORDERS).
+        
+        order defaults to GEMINI_SLIDE_ORDER, else file order; results are
+        returned in slide order either way.
+        
+        Once cancel fires (cancelled, or its deadline passed) the slide in
+        flight and every slide not yet sent are returned as 'unchecked' with
+        the reason in 'stopped'. With degrade_near_deadline, slides are sent
+        text-only and without escalation once the time left is less than the
+        remaining slides have been taking.
+        
+        With a budget every slide is admitted against its pre-call estimate
+        and settled with its actual usage. Slides the budget does not admit
+        are returned with status 'skipped' (low-claim slides) or 'unchecked'
+        (budget exhausted).
+        """
         results = []
         total_cost = 0.0
         
-        for slide in slides_content:
-            result = self.check_facts(
-                slide.get('text_content', ''),
-                slide.get('slide_number', 0),
-                slide.get('image_base64', None)
-            )
-            results.append(result)
-            
-            if 'token_usage' in result:
-                total_cost += result['token_usage']['estimated_cost']
+        order = order or os.getenv('GEMINI_SLIDE_ORDER') or 'file'
+        if order not in SLIDE_ORDERS:
+            raise ValueError(f"Unknown slide order: {order}")
+        positions = SLIDE_ORDERS[order](slides_content)
+        slides_content = [slides_content[index] for index in positions]
+        
+        remaining = None
+        if budget is not None:
+            estimates = [
+                self.estimate_slide(slide.get('text_content', ''), slide.get('slide_number', 0),
+                                    bool(slide.get('image_base64')))
+                for slide in slides_content
+            ]
+            # Suffix sums: what every slide from here to the end would cost
+            remaining = [None] * len(estimates)
+            running = {'full': (0.0, 0), 'text': (0.0, 0)}
+            for index in range(len(estimates) - 1, -1, -1):
+                running = {
+                    routing: (running[routing][0] + estimates[index][routing][0],
+                              running[routing][1] + estimates[index][routing][1])
+                    for routing in running
+                }
+                remaining[index] = running
+        
+        enqueued_at = time.perf_counter()
+        pending = len(slides_content)
+        QUEUE_DEPTH.inc(pending)
+        self.cancel = cancel
+        stopped = None
+        checked_seconds, checked = 0.0, 0
+        try:
+            for index, slide in enumerate(slides_content):
+                queue_wait = time.perf_counter() - enqueued_at
+                QUEUE_WAIT_SECONDS.observe(queue_wait)
+                QUEUE_DEPTH.dec()
+                pending -= 1
+                
+                if cancel is not None and cancel.cancelled:
+                    stopped = cancel.reason
+                    result = self._stopped_result(slide.get('slide_number', 0), stopped)
+                    results.append(result)
+                    if on_result:
+                        on_result(result)
+                    continue
+                
+                image_base64 = slide.get('image_base64', None)
+                max_tiers = None
+                deadline_degraded = False
+                if degrade_near_deadline and cancel is not None and checked and cancel.remaining() is not None:
+                    # Not enough time left at the pace so far: cheapest, fastest route only
+                    if cancel.remaining() < checked_seconds / checked * (len(slides_content) - index):
+                        image_base64, max_tiers, deadline_degraded = None, 1, True
+                        DEADLINE_DEGRADED.inc()
+                reservation = None
+                if budget is not None:
+                    decision, reservation = budget.admit(
+                        estimates[index], remaining[index], claim_score(slide.get('text_content', ''))
+                    )
+                    BUDGET_DECISIONS.inc(decision=decision)
+                    if decision in ('skip', 'stop'):
+                        result = {
+                            'slide_number': slide.get('slide_number', 0),
+                            'status': 'skipped' if decision == 'skip' else 'unchecked',
+                            'issues': [],
+                            'summary': 'Skipped by budget: no checkable claims' if decision == 'skip'
+                            else 'Not checked: budget exhausted'
+                        }
+                        results.append(result)
+                        if on_result:
+                            on_result(result)
+                        continue
+                    if decision == 'text_only':
+                        image_base64 = None
+                
+                slide_start = time.perf_counter()
+                try:
+                    result = self.check_facts(
+                        slide.get('text_content', ''),
+                        slide.get('slide_number', 0),
+                        image_base64,
+                        on_issue=on_issue,
+                        max_tiers=max_tiers
+                    )
+                except JobCancelled as e:
+                    # The reservation stays as spent: the abandoned call may still be billed
+                    stopped = e.reason
+                    result = self._stopped_result(slide.get('slide_number', 0), stopped)
+                    results.append(result)
+                    if on_result:
+                        on_result(result)
+                    continue
+                checked_seconds += time.perf_counter() - slide_start
+                checked += 1
+                if 'performance' in result:
+                    result['performance']['queue_wait'] = round(queue_wait, 4)
+                    if reservation is not None and decision == 'text_only':
+                        result['performance']['budget_degraded'] = True
+                    if deadline_degraded:
+                        result['performance']['deadline_degraded'] = True
+                if reservation is not None:
+                    usage = result.get('token_usage') or {}
+                    budget.settle(reservation, usage.get('estimated_cost', 0.0),
+                                  usage.get('input_tokens', 0) + usage.get('output_tokens', 0))
+                results.append(result)
+                if on_result:
+                    on_result(result)
+                
+                if 'token_usage' in result:
+                    total_cost += result['token_usage']['estimated_cost']
+        finally:
+            QUEUE_DEPTH.dec(pending)
+            self.cancel = None
+        
+        # Back to file order for the report
+        results = [result for _, result in sorted(zip(positions, results), key=lambda pair: pair[0])]
         
         return {
             'results': results,
             'total_cost_estimate': round(total_cost, 4),
-            'slides_checked': len(slides_content)
+            'slides_checked': len(slides_content),
+            'budget': budget.summary() if budget is not None else None,
+            'stopped': stopped
+        }
+    
+    @staticmethod
+    def _stopped_result(slide_number: int, reason: str) -> Dict[str, Any]:
+        STOPPED_SLIDES.inc(reason=reason)
+        return {
+            'slide_number': slide_number,
+            'status': 'unchecked',
+            'stopped': reason,
+            'issues': [],
+            'summary': 'Not checked: deadline reached' if reason == 'deadline' else 'Not checked: job cancelled'
         }
     
     def verify_single_fact(self, fact_text: str) -> Dict[str, Any]:
@@ -162,7 +855,12 @@ class GeminiClient:
         """
         
         try:
-            response = self.model.generate_content(prompt)
+            response = self._generate(self.TEXT_MODEL_NAME, prompt)
+            input_tokens = response.input_tokens or len(prompt.split()) * 1.3
+            output_tokens = response.output_tokens or len(response.text.split()) * 1.3
+            self._record_usage(self.TEXT_MODEL_NAME, input_tokens, output_tokens,
+                               self._calculate_cost(input_tokens, output_tokens, self.TEXT_MODEL_NAME),
+                               kind='verify')
             return self._parse_verification_response(response.text)
         except Exception as e:
             return {
@@ -0,0 +1,83 @@
+import json
+import re
+from typing import Any, Optional
+
+
+_DANGLING_KEY = re.compile(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+
+
+def extract_json_text(text: str) -> str:
+    """Cut the reply down to the root object, dropping a markdown code fence and surrounding prose"""
+    start = text.find('{')
+    if start == -1:
+        return text.strip()
+    end = text.find('```', start)
+    return (text[start:end] if end != -1 else text[start:]).strip()
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Remove commas directly before a closing bracket, outside strings"""
+    output = []
+    in_string = False
+    escape = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == ',' and text[index + 1:].lstrip()[:1] in ('}', ']'):
+            continue
+        output.append(char)
+    return ''.join(output)
+
+
+def _close_truncated(text: str) -> str:
+    """Close an unterminated string and every open object/array, dropping a dangling key or comma"""
+    stack = []
+    in_string = False
+    escape = False
+    for char in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]' and stack:
+            stack.pop()
+    
+    if in_string:
+        text += '"'
+    if stack and stack[-1] == '}':
+        # A key without its value (`, "key":`) cannot be completed; drop it
+        text = _DANGLING_KEY.sub(r'\1', text)
+    text = text.rstrip().rstrip(',')
+    return text + ''.join(reversed(stack))
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """Cheap local repair of a model reply: fences, trailing commas, truncation.
+    
+    Returns the decoded value, or None if the text still does not parse.
+    """
+    candidate = extract_json_text(text)
+    for attempt in (candidate, _strip_trailing_commas(candidate)):
+        try:
+            return json.loads(attempt)
+        except json.JSONDecodeError:
+            pass
+    
+    try:
+        return json.loads(_close_truncated(_strip_trailing_commas(candidate)))
+    except json.JSONDecodeError:
+        return None
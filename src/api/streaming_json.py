@@ -0,0 +1,103 @@
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+
+class IncrementalIssueParser:
+    """Pulls complete entries out of the reply's `issues` array while it is still being generated.
+    
+    Feed it text chunks as they arrive; every issue object that has been
+    closed is decoded and returned (and passed to on_issue) exactly once.
+    Anything before the first `{` or after the root object closes, such as
+    a ```json markdown fence, is ignored. The full reply is still parsed by
+    GeminiClient._parse_fact_check_response once generation finishes; the
+    issues emitted here are an early preview of it.
+    """
+    
+    def __init__(self, on_issue: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.on_issue = on_issue
+        self.emitted = 0
+        self.reset()
+    
+    def reset(self):
+        """Start over on a new reply (e.g. a retried attempt).
+        
+        Issues already emitted are not emitted again: the retry's first
+        `emitted` issues are skipped.
+        """
+        self._text = ''
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._key = None
+        self._issues_depth = None
+        self._issue_start = None
+        self._seen = 0
+        self._done = False
+    
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        if self._done or not chunk:
+            return []
+        self._text += chunk
+        
+        found = []
+        text = self._text
+        while self._pos < len(text):
+            char = text[self._pos]
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start:self._pos]
+            elif not self._stack and char != '{':
+                pass  # preamble such as a markdown fence
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos + 1
+            elif char == ':' and len(self._stack) == 1:
+                self._key = self._last_string
+            elif char in '{[':
+                self._stack.append(char)
+                depth = len(self._stack)
+                if char == '[' and depth == 2 and self._key == 'issues':
+                    self._issues_depth = depth
+                elif char == '{' and self._issues_depth is not None and depth == self._issues_depth + 1:
+                    self._issue_start = self._pos
+            elif char in '}]':
+                depth = len(self._stack)
+                self._stack.pop()
+                if char == '}' and self._issue_start is not None and depth == (self._issues_depth or 0) + 1:
+                    issue = self._decode(text[self._issue_start:self._pos + 1])
+                    self._issue_start = None
+                    if issue is not None:
+                        found.append(issue)
+                elif char == ']' and depth == self._issues_depth:
+                    self._issues_depth = None
+                if not self._stack:
+                    self._done = True
+                    break
+            self._pos += 1
+        
+        emitted = []
+        for issue in found:
+            self._seen += 1
+            if self._seen <= self.emitted:
+                continue
+            self.emitted += 1
+            emitted.append(issue)
+            if self.on_issue:
+                self.on_issue(issue)
+        return emitted
+    
+    def _decode(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            issue = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return issue if isinstance(issue, dict) else None
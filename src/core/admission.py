@@ -0,0 +1,113 @@
+"""Admission control for check jobs.
+
+Limits how many jobs run at once and how many slides may be waiting for
+the model across them (FACTCHECK_MAX_CONCURRENT_JOBS,
+FACTCHECK_MAX_QUEUED_SLIDES; empty = unlimited). A request that would
+exceed them is refused with a Retry-After computed from the progress of
+the running jobs, instead of slowing every job down. A job whose deck is
+not parsed yet counts as FACTCHECK_UNPARSED_JOB_SLIDES queued slides, so a
+burst of uploads cannot slip past the slide limit before any is parsed.
+"""
+
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from src.core.job_manager import JobManager
+from src.utils.circuit_breaker import OPEN, CircuitBreaker
+
+
+class Saturated(Exception):
+    """Raised when a new job is refused; carries the suggested Retry-After in seconds"""
+    
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.getenv(name, '').strip()
+    return int(value) if value else None
+
+
+class AdmissionController:
+    def __init__(self, job_manager: JobManager, circuit: CircuitBreaker, max_jobs: Optional[int] = None,
+                 max_queued_slides: Optional[int] = None, default_slide_seconds: Optional[float] = None,
+                 requests_per_minute: Optional[float] = None, unparsed_job_slides: Optional[int] = None):
+        self.job_manager = job_manager
+        self.circuit = circuit
+        self.max_jobs = max_jobs if max_jobs is not None else _optional_int('FACTCHECK_MAX_CONCURRENT_JOBS')
+        self.max_queued_slides = (max_queued_slides if max_queued_slides is not None
+                                  else _optional_int('FACTCHECK_MAX_QUEUED_SLIDES'))
+        # Used for jobs that have not finished a slide yet
+        self.default_slide_seconds = default_slide_seconds or float(os.getenv('FACTCHECK_SLIDE_SECONDS', '3'))
+        # Used for jobs whose deck is not parsed yet
+        self.unparsed_job_slides = (unparsed_job_slides if unparsed_job_slides is not None
+                                    else int(os.getenv('FACTCHECK_UNPARSED_JOB_SLIDES', '20')))
+        if requests_per_minute is None:
+            requests_per_minute = float(os.getenv('GEMINI_REQUESTS_PER_MINUTE') or 0)
+        self.requests_per_minute = requests_per_minute
+    
+    def _jobs(self) -> List[Tuple[int, float]]:
+        return [
+            (remaining if remaining is not None else self.unparsed_job_slides, seconds or self.default_slide_seconds)
+            for remaining, seconds in self.job_manager.load()
+        ]
+    
+    def load(self, jobs: Optional[List[Tuple[int, float]]] = None) -> Dict[str, Any]:
+        """Running jobs, queued slides and how long they will take to finish"""
+        jobs = self._jobs() if jobs is None else jobs
+        queued = sum(remaining for remaining, _ in jobs)
+        # Jobs check their slides one after another, in parallel with each other
+        drain = max((remaining * seconds for remaining, seconds in jobs), default=0.0)
+        if self.requests_per_minute > 0:
+            drain = max(drain, queued * 60.0 / self.requests_per_minute)
+        return {
+            'in_flight_jobs': len(jobs),
+            'queued_slides': queued,
+            'drain_seconds': round(drain, 1)
+        }
+    
+    def saturation(self, jobs: Optional[List[Tuple[int, float]]] = None) -> Optional[Tuple[str, int]]:
+        """(reason, retry_after) when a new job must be refused, else None"""
+        jobs = self._jobs() if jobs is None else jobs
+        load = self.load(jobs)
+        if self.max_jobs is not None and load['in_flight_jobs'] >= self.max_jobs:
+            # A slot frees up when the job closest to done finishes
+            wait = min(remaining * seconds for remaining, seconds in jobs) if jobs else 0.0
+            return 'Too many concurrent jobs', max(1, math.ceil(wait))
+        if self.max_queued_slides is not None and load['queued_slides'] >= self.max_queued_slides:
+            # Time for the running jobs to work off the excess, at their combined rate
+            excess = load['queued_slides'] - self.max_queued_slides + 1
+            rate = sum(1.0 / seconds for remaining, seconds in jobs if remaining)
+            wait = excess / rate if rate else 0.0
+            return 'Too many slides queued', max(1, math.ceil(wait))
+        return None
+    
+    def admit(self):
+        """Raise Saturated if a new job cannot be started now"""
+        saturated = self.saturation()
+        if saturated is not None:
+            raise Saturated(*saturated)
+    
+    def health(self) -> Dict[str, Any]:
+        jobs = self._jobs()
+        load = self.load(jobs)
+        saturated = self.saturation(jobs)
+        circuit = self.circuit.to_dict()
+        ready = saturated is None and circuit['state'] != OPEN
+        if circuit['state'] == OPEN:
+            status = 'degraded'
+        else:
+            status = 'saturated' if saturated else 'healthy'
+        
+        health = dict(load)
+        health.update({
+            'status': status,
+            'ready': ready,
+            'limits': {'max_concurrent_jobs': self.max_jobs, 'max_queued_slides': self.max_queued_slides},
+            'circuit': circuit
+        })
+        if saturated:
+            health['reason'], health['retry_after'] = saturated
+        return health
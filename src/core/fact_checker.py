@@ -1,58 +1,69 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
+import os
 import re
+import time
 from datetime import datetime
 from src.api.gemini_client import GeminiClient
+from src.api.backends import GenerationBackend
+from src.utils.budget import JobBudget
+from src.utils.cancellation import CancellationToken
 from src.utils.file_parser import FileParser, SlideContent
-from pydantic import BaseModel
+from src.utils.usage_ledger import UsageLedger
+from src.core.models import (
+    FactIssue, FactCheckResult, SlidePerformance, PerformanceTrace, FactCheckReport, TierSummary
+)
 import json
 
-
-class FactIssue(BaseModel):
-    type: str  # date_error, numerical_error, technical_claim, citation_error, knowledge_consistency
-    severity: str  # high, medium, low
-    original_text: str
-    issue_description: str
-    correct_information: Optional[str] = None
-    confidence: float
-    slide_number: int
-
-
-class FactCheckResult(BaseModel):
-    slide_number: int
-    status: str  # ok, issues_found, error
-    issues: List[FactIssue]
-    summary: str
-    token_usage: Optional[Dict[str, Any]] = None
-
-
-class FactCheckReport(BaseModel):
-    file_metadata: Dict[str, Any]
-    total_slides: int
-    slides_with_issues: int
-    total_issues: int
-    issues_by_type: Dict[str, int]
-    issues_by_severity: Dict[str, int]
-    results: List[FactCheckResult]
-    total_cost_estimate: float
-    timestamp: str
+# Why a partial report ends early, as shown in exported reports
+STOPPED_LABELS = {'cancelled': 'キャンセル', 'deadline': '期限切れ'}
 
 
 class FactChecker:
-    def __init__(self, gemini_api_key: Optional[str] = None):
+    def __init__(self, gemini_api_key: Optional[str] = None, backend: Optional[GenerationBackend] = None,
+                 ledger: Optional[UsageLedger] = None):
         self.file_parser = FileParser()
-        self.gemini_client = GeminiClient(api_key=gemini_api_key)
+        self.gemini_client = GeminiClient(api_key=gemini_api_key, backend=backend, ledger=ledger)
         
         # Patterns for common fact-checking targets
         self.date_pattern = re.compile(r'\b(19|20)\d{2}年?\b')
         self.number_pattern = re.compile(r'\b\d+\.?\d*[KMBTG]?[Bb]?\b')
         self.percentage_pattern = re.compile(r'\b\d+\.?\d*\s*[%％]\b')
         
-    def check_presentation(self, file_path: str) -> FactCheckReport:
+    def check_presentation(self, file_path: str,
+                           progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                           issue_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                           budget: Optional[JobBudget] = None,
+                           usage_labels: Optional[Dict[str, Any]] = None,
+                           parsed_callback: Optional[Callable[[int], None]] = None,
+                           order: Optional[str] = None,
+                           cancel: Optional[CancellationToken] = None,
+                           degrade_near_deadline: bool = False) -> FactCheckReport:
+        """Check every slide of a deck.
+        
+        usage_labels (deck, deck_name, job_id) are recorded with each API call
+        in the usage ledger; the deck defaults to the file name.
+        parsed_callback receives the number of slides once the deck is parsed.
+        order picks the order slides are sent in (see SLIDE_ORDERS); the
+        report always lists them in file order.
+        When cancel fires (cancelled or past its deadline) the report is a
+        valid partial one: the slides not checked are in unchecked_slides.
+        """
+        self.gemini_client.usage_labels = dict(
+            {'deck': os.path.basename(file_path)}, **(usage_labels or {})
+        )
+        stages = {}
+        started = time.perf_counter()
+        
         # Extract metadata
         metadata = self.file_parser.extract_metadata(file_path)
+        stages['metadata'] = time.perf_counter() - started
         
         # Parse slides
+        stage_start = time.perf_counter()
         slides = self.file_parser.parse_file(file_path)
+        stages['parse'] = time.perf_counter() - stage_start
+        if parsed_callback:
+            parsed_callback(len(slides))
         
         # Prepare slide data for batch checking
         slides_data = []
@@ -64,15 +75,75 @@ class FactChecker:
             })
         
         # Perform fact checking
-        check_results = self.gemini_client.batch_check_facts(slides_data)
+        stage_start = time.perf_counter()
+        check_results = self.gemini_client.batch_check_facts(
+            slides_data, on_result=progress_callback, on_issue=issue_callback, budget=budget, order=order,
+            cancel=cancel, degrade_near_deadline=degrade_near_deadline
+        )
+        stages['check'] = time.perf_counter() - stage_start
         
         # Process results
+        stage_start = time.perf_counter()
         report = self._generate_report(metadata, check_results)
+        stages['aggregate'] = time.perf_counter() - stage_start
+        stages['total'] = time.perf_counter() - started
+        
+        report.performance = self._build_performance_trace(stages, check_results['results'])
         
         return report
     
+    def _build_performance_trace(self, stages: Dict[str, float], results: List[Dict[str, Any]],
+                                 slowest: int = 5) -> PerformanceTrace:
+        slides = [
+            SlidePerformance(slide_number=result.get('slide_number', 0), **result['performance'])
+            for result in results if 'performance' in result
+        ]
+        routing = {'image': 0, 'text': 0}
+        for slide in slides:
+            routing[slide.route] = routing.get(slide.route, 0) + 1
+        
+        return PerformanceTrace(
+            stages={stage: round(seconds, 4) for stage, seconds in stages.items()},
+            slides=slides,
+            total_retries=sum(slide.retries for slide in slides),
+            total_bytes_sent=sum(slide.bytes_sent for slide in slides),
+            routing=routing,
+            cache_hits=sum(1 for slide in slides if slide.cache_hit),
+            slowest_slides=sorted(slides, key=lambda slide: slide.latency, reverse=True)[:slowest],
+            slides_per_second=round(len(results) / stages['total'], 3) if stages['total'] > 0 else 0.0,
+            tiers=self._summarize_tiers(slides),
+            escalated_slides=sum(1 for slide in slides if slide.escalated)
+        )
+    
+    def _summarize_tiers(self, slides: List[SlidePerformance]) -> List[TierSummary]:
+        """Calls, latency and cost per cascade tier"""
+        summaries: Dict[int, Dict[str, Any]] = {}
+        for slide in slides:
+            for call in slide.tiers:
+                summary = summaries.setdefault(call.tier, {
+                    'tier': call.tier, 'models': [], 'calls': 0, 'verdicts': 0, 'total_latency': 0.0, 'cost': 0.0
+                })
+                if call.model not in summary['models']:
+                    summary['models'].append(call.model)
+                summary['calls'] += 1
+                summary['total_latency'] += call.latency
+                summary['cost'] += call.cost
+            if slide.tiers:
+                summaries[slide.tier]['verdicts'] += 1
+        
+        return [
+            TierSummary(
+                **dict(summary, total_latency=round(summary['total_latency'], 4), cost=round(summary['cost'], 6)),
+                mean_latency=round(summary['total_latency'] / summary['calls'], 4)
+            )
+            for _, summary in sorted(summaries.items())
+        ]
+    
     def _generate_report(self, metadata: Dict[str, Any], check_results: Dict[str, Any]) -> FactCheckReport:
         results = []
+        failed_slides = []
+        budget_skipped_slides = []
+        unchecked_slides = []
         slides_with_issues = 0
         total_issues = 0
         issues_by_type = {
@@ -94,9 +165,18 @@ class FactChecker:
                 status=result.get('status', 'error'),
                 issues=[],
                 summary=result.get('summary', ''),
-                token_usage=result.get('token_usage')
+                token_usage=result.get('token_usage'),
+                repair=result.get('repair')
             )
             
+            # A slide that could not be checked is not a clean slide
+            if fact_result.status in ('error', 'parse_error'):
+                failed_slides.append(fact_result.slide_number)
+            elif result.get('stopped'):
+                unchecked_slides.append(fact_result.slide_number)
+            elif fact_result.status in ('skipped', 'unchecked'):
+                budget_skipped_slides.append(fact_result.slide_number)
+            
             if result.get('status') == 'issues_found' and 'issues' in result:
                 slides_with_issues += 1
                 
@@ -130,7 +210,12 @@ class FactChecker:
             issues_by_severity=issues_by_severity,
             results=results,
             total_cost_estimate=check_results.get('total_cost_estimate', 0.0),
-            timestamp=datetime.now().isoformat()
+            timestamp=datetime.now().isoformat(),
+            failed_slides=failed_slides,
+            budget_skipped_slides=budget_skipped_slides,
+            budget=check_results.get('budget'),
+            unchecked_slides=unchecked_slides,
+            stopped=check_results.get('stopped')
         )
     
     def quick_check(self, text: str) -> Dict[str, Any]:
@@ -231,6 +316,28 @@ class FactChecker:
             </div>
         """
         
+        if report.failed_slides:
+            html += f"""
+            <div class="issue high">
+                <strong>未チェックのスライド:</strong> {', '.join(str(n) for n in report.failed_slides)}
+                （API応答を取得・解析できませんでした）
+            </div>
+            """
+        
+        if report.budget_skipped_slides:
+            html += f"""
+            <div class="issue medium">
+                <strong>予算により未チェックのスライド:</strong> {', '.join(str(n) for n in report.budget_skipped_slides)}
+            </div>
+            """
+        
+        if report.unchecked_slides:
+            html += f"""
+            <div class="issue medium">
+                <strong>{STOPPED_LABELS.get(report.stopped, '中断')}により未チェックのスライド:</strong> {', '.join(str(n) for n in report.unchecked_slides)}
+            </div>
+            """
+        
         for result in report.results:
             if result.issues:
                 html += f"""
@@ -268,9 +375,15 @@ class FactChecker:
 - 問題のあるスライド数: {report.slides_with_issues}
 - 総問題数: {report.total_issues}
 - 推定コスト: ${report.total_cost_estimate:.4f}
-
-## 問題の種類別集計
 """
+        if report.failed_slides:
+            md += f"- **未チェックのスライド**: {', '.join(str(n) for n in report.failed_slides)}（API応答を取得・解析できませんでした）\n"
+        if report.budget_skipped_slides:
+            md += f"- **予算により未チェックのスライド**: {', '.join(str(n) for n in report.budget_skipped_slides)}\n"
+        if report.unchecked_slides:
+            md += (f"- **{STOPPED_LABELS.get(report.stopped, '中断')}により未チェックのスライド**: "
+                   f"{', '.join(str(n) for n in report.unchecked_slides)}\n")
+        md += "\n## 問題の種類別集計\n"
         
         for issue_type, count in report.issues_by_type.items():
             if count > 0:
@@ -0,0 +1,309 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from src.utils.cancellation import CancellationToken
+from src.utils.shared_state import SharedJobs
+
+
+class CheckJob:
+    """A running fact check that any number of callers can wait on or stream"""
+    
+    def __init__(self, key: str, shared: Optional[SharedJobs] = None):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'running'  # running, completed, failed
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.attached = 1
+        # Progress for admission control: slides are known once the deck is parsed
+        self.total_slides: Optional[int] = None
+        self.slides_done = 0
+        self.slide_seconds: Optional[float] = None
+        self._last_progress = time.monotonic()
+        self._events = []
+        self._condition = threading.Condition()
+        # Mirrors events to other worker processes, which see this job as a RemoteJob
+        self._shared = shared
+        # Stops the job's slide calls; other workers cancel it through the shared store
+        self.cancel_token = CancellationToken(
+            poll=(lambda: shared.cancel_requested(self.job_id)) if shared else None
+        )
+    
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        progress = self._track(event_type, data)
+        with self._condition:
+            self._events.append({'event': event_type, 'data': data})
+            self._condition.notify_all()
+        if self._shared:
+            self._shared.append(self.job_id, event_type, data, progress)
+    
+    def _track(self, event_type: str, data: Dict[str, Any]) -> Optional[Tuple[Optional[int], int, Optional[float]]]:
+        """Update slide progress from 'parsed' and 'slide' events"""
+        now = time.monotonic()
+        if event_type == 'parsed':
+            self.total_slides = data.get('total_slides')
+        elif event_type == 'slide':
+            elapsed = now - self._last_progress
+            # Moving average of the wall time per slide, for drain estimates
+            self.slide_seconds = elapsed if self.slide_seconds is None else 0.7 * self.slide_seconds + 0.3 * elapsed
+            self.slides_done += 1
+        else:
+            return None
+        self._last_progress = now
+        return self.total_slides, self.slides_done, self.slide_seconds
+    
+    @property
+    def remaining_slides(self) -> Optional[int]:
+        """Slides still to check, or None until the deck is parsed"""
+        if self.total_slides is None:
+            return None
+        return max(0, self.total_slides - self.slides_done)
+    
+    def finish(self, result: Dict[str, Any]):
+        if self._shared:
+            self._shared.release(self.key, self.job_id, 'completed', 'complete', result)
+        with self._condition:
+            self.result = result
+            self.status = 'completed'
+            self._events.append({'event': 'complete', 'data': result})
+            self._condition.notify_all()
+    
+    def fail(self, error: str):
+        if self._shared:
+            self._shared.release(self.key, self.job_id, 'failed', 'error', {'error': error}, error=error)
+        with self._condition:
+            self.error = error
+            self.status = 'failed'
+            self._events.append({'event': 'error', 'data': {'error': error}})
+            self._condition.notify_all()
+    
+    @property
+    def finished(self) -> bool:
+        return self.status != 'running'
+    
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Block until the job finishes and return its result"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.finished, timeout=timeout)
+        
+        if self.status == 'failed':
+            raise RuntimeError(self.error)
+        if self.status == 'running':
+            raise TimeoutError(f"Job {self.job_id} did not finish in time")
+        return self.result
+    
+    def iter_events(self, heartbeat: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """Replay all events from the start, then follow new ones until the job ends.
+        
+        Yields None when no event arrived within `heartbeat` seconds so that
+        streaming responses can send keep-alives.
+        """
+        index = 0
+        while True:
+            with self._condition:
+                if index >= len(self._events) and not self.finished:
+                    self._condition.wait(timeout=heartbeat)
+                pending = self._events[index:]
+                index += len(pending)
+                finished = self.finished and index >= len(self._events)
+            
+            if not pending and not finished:
+                yield None
+            for event in pending:
+                yield event
+            if finished:
+                return
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'attached': self.attached,
+            'error': self.error
+        }
+
+
+class RemoteJob:
+    """A job running in another worker process, read from the shared store.
+    
+    Offers the same read side as CheckJob (status, wait, iter_events,
+    to_dict) by polling the job's row and event log.
+    """
+    
+    def __init__(self, shared: SharedJobs, job_id: str, poll_interval: float = 0.2):
+        self.shared = shared
+        self.job_id = job_id
+        self.poll_interval = poll_interval
+        self._row = shared.job(job_id) or {}
+        self.key = self._row.get('key')
+        self.created_at = self._row.get('created_at')
+        self.result: Optional[Dict[str, Any]] = None
+    
+    def _refresh(self) -> Dict[str, Any]:
+        self._row = self.shared.job(self.job_id) or self._row
+        if self._row.get('status') == 'completed' and self.result is None:
+            final = [event for event in self.shared.events(self.job_id) if event['event'] == 'complete']
+            self.result = final[-1]['data'] if final else {}
+        return self._row
+    
+    @property
+    def status(self) -> str:
+        return self._refresh().get('status', 'failed')
+    
+    @property
+    def error(self) -> Optional[str]:
+        return self._row.get('error')
+    
+    @property
+    def attached(self) -> int:
+        return self._row.get('attached', 1)
+    
+    @property
+    def finished(self) -> bool:
+        return self.status != 'running'
+    
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.finished:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {self.job_id} did not finish in time")
+            time.sleep(self.poll_interval)
+        
+        if self.status == 'failed':
+            raise RuntimeError(self.error)
+        return self.result
+    
+    def iter_events(self, heartbeat: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        seq = 0
+        idle_since = time.monotonic()
+        while True:
+            finished = self.finished
+            events = self.shared.events(self.job_id, after=seq)
+            for event in events:
+                seq = event['seq']
+                yield {'event': event['event'], 'data': event['data']}
+            if finished:
+                if self._row.get('status') == 'failed' and not any(e['event'] == 'error' for e in events):
+                    # The owning worker died before it could record the failure
+                    yield {'event': 'error', 'data': {'error': self.error}}
+                return
+            if events:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= heartbeat:
+                idle_since = time.monotonic()
+                yield None
+            time.sleep(self.poll_interval)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        self._refresh()
+        return {
+            'job_id': self.job_id,
+            'status': self._row.get('status'),
+            'created_at': self.created_at,
+            'attached': self.attached,
+            'error': self.error
+        }
+
+
+class JobManager:
+    """Runs check jobs in background threads, coalescing identical work by key.
+    
+    With a SharedJobs store, identical work is also coalesced across worker
+    processes: a request for a key that another worker is running attaches
+    to that job as a RemoteJob.
+    """
+    
+    def __init__(self, max_finished_jobs: int = 200, shared: Optional[SharedJobs] = None):
+        self.max_finished_jobs = max_finished_jobs
+        self.shared = shared
+        # Re-entrant: admit callbacks read load() while a new job is being registered
+        self._lock = threading.RLock()
+        self._in_flight: Dict[str, CheckJob] = {}
+        self._jobs: 'OrderedDict[str, CheckJob]' = OrderedDict()
+    
+    def get_or_start(self, key: str, target: Callable[[CheckJob], Dict[str, Any]],
+                     admit: Optional[Callable[[], None]] = None) -> Tuple[Union[CheckJob, RemoteJob], bool]:
+        """Attach to the in-flight job for key, or start target in a new one.
+        
+        admit is called only when a new job would be started and may raise
+        to refuse it; attaching to a running job is always allowed.
+        Returns (job, created).
+        """
+        with self._lock:
+            job = self._in_flight.get(key)
+            if job is not None:
+                job.attached += 1
+                return job, False
+            
+            job = CheckJob(key, self.shared)
+            if self.shared:
+                running = self.shared.claim(key, job.job_id, job.created_at, admit)
+                if running is not None:
+                    return RemoteJob(self.shared, running), False
+            elif admit:
+                admit()
+            self._in_flight[key] = job
+            self._jobs[job.job_id] = job
+            self._prune()
+        
+        thread = threading.Thread(target=self._run, args=(job, target), daemon=True,
+                                  name=f"check-job-{job.job_id[:8]}")
+        thread.start()
+        return job, True
+    
+    def get(self, job_id: str) -> Optional[Union[CheckJob, RemoteJob]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.shared and self.shared.job(job_id):
+            return RemoteJob(self.shared, job_id)
+        return job
+    
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a running job, wherever it runs. Returns False if it is not running"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            if job.finished:
+                return False
+            job.cancel_token.cancel()
+            return True
+        return bool(self.shared and self.shared.request_cancel(job_id))
+    
+    def in_flight(self) -> int:
+        """Running jobs, across all workers when the store is shared"""
+        if self.shared:
+            return self.shared.in_flight()
+        with self._lock:
+            return len(self._in_flight)
+    
+    def load(self) -> List[Tuple[Optional[int], Optional[float]]]:
+        """(remaining slides, seconds per slide) of every running job; remaining is None until parsed"""
+        if self.shared:
+            return self.shared.load()
+        with self._lock:
+            return [(job.remaining_slides, job.slide_seconds) for job in self._in_flight.values()]
+    
+    def _run(self, job: CheckJob, target: Callable[[CheckJob], Dict[str, Any]]):
+        try:
+            result = target(job)
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(job.key, None)
+            job.fail(str(e))
+            return
+        
+        # Leave the in-flight map first so new callers after completion
+        # go through the report cache rather than this job
+        with self._lock:
+            self._in_flight.pop(job.key, None)
+        job.finish(result)
+    
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        while len(self._jobs) > self.max_finished_jobs and finished:
+            self._jobs.pop(finished.pop(0), None)
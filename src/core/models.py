@@ -0,0 +1,143 @@
+"""Report data models, shared by the API client (reply schema) and FactChecker"""
+
+import copy
+from typing import List, Dict, Any, Optional
+from pydantic import BaseModel
+
+
+ISSUE_TYPES = ['date_error', 'numerical_error', 'technical_claim', 'citation_error', 'knowledge_consistency']
+SEVERITIES = ['high', 'medium', 'low']
+REPLY_STATUSES = ['ok', 'issues_found']
+
+
+class FactIssue(BaseModel):
+    type: str  # date_error, numerical_error, technical_claim, citation_error, knowledge_consistency
+    severity: str  # high, medium, low
+    original_text: str
+    issue_description: str
+    correct_information: Optional[str] = None
+    confidence: float
+    slide_number: int
+
+
+class FactCheckResult(BaseModel):
+    slide_number: int
+    status: str  # ok, issues_found, error, parse_error; skipped, unchecked (by a budget, cancellation or deadline)
+    issues: List[FactIssue]
+    summary: str
+    token_usage: Optional[Dict[str, Any]] = None
+    repair: Optional[str] = None  # local, request: how a malformed reply was recovered
+
+
+class TierCall(BaseModel):
+    tier: int  # 0 is the cheapest model of the cascade
+    model: str
+    status: Optional[str] = None
+    issues: int = 0
+    latency: float = 0.0
+    cost: float = 0.0
+
+
+class SlidePerformance(BaseModel):
+    slide_number: int
+    latency: float  # seconds spent on API calls, including retries and every tier
+    queue_wait: float = 0.0
+    retries: int = 0
+    bytes_sent: int = 0
+    route: str  # image, text
+    model: Optional[str] = None  # model whose verdict was kept
+    cache_hit: bool = False
+    tier: int = 0
+    escalated: bool = False
+    tiers: List[TierCall] = []
+    chunks: int = 0  # concurrent sub-checks of an oversize slide (0: checked whole)
+
+
+class TierSummary(BaseModel):
+    tier: int
+    models: List[str]
+    calls: int
+    verdicts: int  # slides whose final result came from this tier
+    total_latency: float
+    mean_latency: float
+    cost: float
+
+
+class PerformanceTrace(BaseModel):
+    stages: Dict[str, float]  # wall time in seconds per pipeline stage
+    slides: List[SlidePerformance]
+    total_retries: int
+    total_bytes_sent: int
+    routing: Dict[str, int]  # slides sent with an image vs. text only
+    cache_hits: int
+    slowest_slides: List[SlidePerformance]
+    slides_per_second: float
+    tiers: List[TierSummary] = []
+    escalated_slides: int = 0
+
+
+class FactCheckReport(BaseModel):
+    file_metadata: Dict[str, Any]
+    total_slides: int
+    slides_with_issues: int
+    total_issues: int
+    issues_by_type: Dict[str, int]
+    issues_by_severity: Dict[str, int]
+    results: List[FactCheckResult]
+    total_cost_estimate: float
+    timestamp: str
+    failed_slides: List[int] = []  # slides whose reply could not be checked (error, parse_error)
+    budget_skipped_slides: List[int] = []  # slides a budget skipped or stopped before they were sent
+    budget: Optional[Dict[str, Any]] = None  # limits, spend and decisions of the job's budget
+    unchecked_slides: List[int] = []  # slides not checked because the job was cancelled or hit its deadline
+    stopped: Optional[str] = None  # cancelled, deadline: why a partial report ends early
+    performance: Optional[PerformanceTrace] = None
+
+
+# Fields filled in by this application, not by the model
+_SERVER_FIELDS = {'FactCheckResult': ['token_usage', 'repair'], 'FactIssue': ['slide_number']}
+_ENUMS = {'type': ISSUE_TYPES, 'severity': SEVERITIES, 'status': REPLY_STATUSES}
+
+
+def reply_json_schema() -> Dict[str, Any]:
+    """JSON schema of one slide's model reply, derived from FactCheckResult/FactIssue.
+    
+    Self-contained (no $ref) and using `nullable` instead of anyOf/null, so it
+    can be passed as a structured-output schema as well as embedded in a prompt.
+    """
+    schema = FactCheckResult.model_json_schema()
+    definitions = schema.pop('$defs', {})
+    
+    def resolve(node: Any, model_name: Optional[str] = None) -> Any:
+        if isinstance(node, list):
+            return [resolve(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        if '$ref' in node:
+            name = node['$ref'].rsplit('/', 1)[-1]
+            return resolve(copy.deepcopy(definitions[name]), name)
+        if 'anyOf' in node:
+            options = [option for option in node['anyOf'] if option.get('type') != 'null']
+            if len(options) == 1:
+                resolved = resolve(options[0])
+                resolved['nullable'] = True
+                return resolved
+        
+        resolved = {}
+        for key, value in node.items():
+            if key in ('title', 'default'):
+                continue
+            if key == 'properties':
+                value = {field: resolve(spec) for field, spec in value.items()
+                         if field not in _SERVER_FIELDS.get(model_name, [])}
+                for field, options in _ENUMS.items():
+                    if field in value:
+                        value[field]['enum'] = options
+            elif key == 'required':
+                value = [field for field in value if field not in _SERVER_FIELDS.get(model_name, [])]
+            else:
+                value = resolve(value)
+            resolved[key] = value
+        return resolved
+    
+    return resolve(schema, 'FactCheckResult')
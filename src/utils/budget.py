@@ -0,0 +1,258 @@
+"""Cost and token budgets enforced in front of the model API.
+
+Spend is tracked per job, per API key per day and for the whole host per
+day in a SQLite file under FACTCHECK_DATA_DIR, so every worker process on
+the host shares it. Each slide call reserves its pre-call estimate; the
+reservation is settled with the actual tokens and cost once the slide is
+done.
+
+When the remaining slides would not fit, a job degrades step by step:
+text-only routing (no images), then skipping low-claim slides, and
+finally stopping with a partial report. Low-claim slides are those whose
+claims.claim_score (the score the claims slide order uses) is below
+FACTCHECK_BUDGET_MIN_CLAIMS.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from src.utils.usage_ledger import api_key_id
+
+# Degradation levels, in the order they are applied
+FULL = 'full'
+TEXT_ONLY = 'text_only'
+SKIP_LOW_CLAIM = 'skip_low_claim'
+STOP = 'stop'
+LEVELS = [FULL, TEXT_ONLY, SKIP_LOW_CLAIM, STOP]
+
+def _limit(name: str) -> Optional[float]:
+    value = os.getenv(name, '').strip()
+    return float(value) if value else None
+
+
+def budget_limits_from_env() -> Dict[str, Dict[str, Optional[float]]]:
+    """Configured limits per scope; None means unlimited"""
+    return {
+        'job': {
+            'usd': _limit('FACTCHECK_BUDGET_JOB_USD'),
+            'tokens': _limit('FACTCHECK_BUDGET_JOB_TOKENS')
+        },
+        'key_daily': {
+            'usd': _limit('FACTCHECK_BUDGET_KEY_DAILY_USD'),
+            'tokens': _limit('FACTCHECK_BUDGET_KEY_DAILY_TOKENS')
+        },
+        'daily': {
+            'usd': _limit('FACTCHECK_BUDGET_DAILY_USD'),
+            'tokens': _limit('FACTCHECK_BUDGET_DAILY_TOKENS')
+        }
+    }
+
+
+def parse_job_limits(job_limits: Any) -> Dict[str, Optional[float]]:
+    """Validate a per-job override {"usd": ..., "tokens": ...}; raises ValueError"""
+    if not isinstance(job_limits, dict):
+        raise ValueError('budget must be an object with usd and/or tokens')
+    limits = {}
+    for name in ('usd', 'tokens'):
+        value = job_limits.get(name)
+        if value is None:
+            limits[name] = None
+            continue
+        try:
+            number = float(value) if not isinstance(value, bool) else math.nan
+        except (TypeError, ValueError):
+            number = math.nan
+        if not (math.isfinite(number) and number >= 0):
+            raise ValueError(f"budget.{name} must be a non-negative number")
+        limits[name] = number
+    return limits
+
+
+class BudgetStore:
+    """Spend per scope in a SQLite file shared by all processes on the host"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS spend ('
+                ' scope TEXT PRIMARY KEY, cost REAL NOT NULL DEFAULT 0, tokens INTEGER NOT NULL DEFAULT 0)'
+            )
+        finally:
+            conn.close()
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+    
+    def spent(self, scope: str) -> Tuple[float, int]:
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT cost, tokens FROM spend WHERE scope = ?', (scope,)).fetchone()
+        finally:
+            conn.close()
+        return (row[0], row[1]) if row else (0.0, 0)
+    
+    def reserve(self, scopes: List[Tuple[str, Dict[str, Optional[float]]]], cost: float,
+                tokens: int) -> Optional[str]:
+        """Add cost/tokens to every scope unless one would exceed its limit.
+        
+        Returns None on success, else the name of the first scope that is full.
+        """
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for scope, limits in scopes:
+                row = conn.execute('SELECT cost, tokens FROM spend WHERE scope = ?', (scope,)).fetchone()
+                spent_cost, spent_tokens = row if row else (0.0, 0)
+                if limits.get('usd') is not None and spent_cost + cost > limits['usd']:
+                    conn.execute('ROLLBACK')
+                    return scope
+                if limits.get('tokens') is not None and spent_tokens + tokens > limits['tokens']:
+                    conn.execute('ROLLBACK')
+                    return scope
+            self._add(conn, [scope for scope, _ in scopes], cost, tokens)
+            conn.execute('COMMIT')
+            return None
+        finally:
+            conn.close()
+    
+    def adjust(self, scopes: List[str], cost: float, tokens: int):
+        """Apply a (possibly negative) correction without limit checks"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            self._add(conn, scopes, cost, tokens)
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+    
+    def _add(self, conn: sqlite3.Connection, scopes: List[str], cost: float, tokens: int):
+        for scope in scopes:
+            conn.execute(
+                'INSERT INTO spend (scope, cost, tokens) VALUES (?, ?, ?) '
+                'ON CONFLICT(scope) DO UPDATE SET cost = cost + excluded.cost, tokens = tokens + excluded.tokens',
+                (scope, cost, tokens)
+            )
+
+
+class JobBudget:
+    """Admission control for one check job.
+    
+    A reservation is (cost, tokens, scopes): it is settled against the scopes
+    it was made in, so a job running past midnight settles against the day
+    it reserved on.
+    """
+    
+    def __init__(self, store: BudgetStore, job_id: str, api_key: Optional[str],
+                 limits: Dict[str, Dict[str, Optional[float]]], min_claims: float = 1.0):
+        self.store = store
+        self.job_id = job_id
+        self.key_id = api_key_id(api_key)
+        self.limits = limits
+        self.min_claims = min_claims
+        self.level = FULL
+        self.exceeded_scope = None
+        self.decisions = {FULL: 0, TEXT_ONLY: 0, 'skipped': 0, 'stopped': 0}
+        self._lock = threading.Lock()
+    
+    def _scopes(self) -> List[Tuple[str, Dict[str, Optional[float]]]]:
+        today = date.today().isoformat()
+        return [
+            (f"job:{self.job_id}", self.limits.get('job', {})),
+            (f"key:{self.key_id}:{today}", self.limits.get('key_daily', {})),
+            (f"all:{today}", self.limits.get('daily', {}))
+        ]
+    
+    def _headroom(self, scopes: List[Tuple[str, Dict[str, Optional[float]]]]) -> Tuple[float, float]:
+        """Smallest remaining (usd, tokens) over all limited scopes"""
+        usd = tokens = float('inf')
+        for scope, limits in scopes:
+            spent_cost, spent_tokens = self.store.spent(scope)
+            if limits.get('usd') is not None:
+                usd = min(usd, limits['usd'] - spent_cost)
+            if limits.get('tokens') is not None:
+                tokens = min(tokens, limits['tokens'] - spent_tokens)
+        return usd, tokens
+    
+    def admit(self, estimate: Dict[str, Tuple[float, int]], remaining: Dict[str, Tuple[float, int]],
+              claims: float) -> Tuple[str, Optional[Tuple[float, int, List[str]]]]:
+        """Decide how to run the next slide.
+        
+        estimate/remaining hold (cost, tokens) for this slide and for all
+        slides not yet run (this one included), under 'full' and 'text' routing;
+        claims is the slide's claim_score.
+        Returns (mode, reservation) with mode full, text_only, skip or stop.
+        """
+        with self._lock:
+            if self.level == STOP:
+                self.decisions['stopped'] += 1
+                return 'stop', None
+            
+            # Degrade for the rest of the job as soon as the remaining slides no longer fit
+            scopes = self._scopes()
+            usd, tokens = self._headroom(scopes)
+            if self.level == FULL and (remaining['full'][0] > usd or remaining['full'][1] > tokens):
+                self.level = TEXT_ONLY
+            if self.level == TEXT_ONLY and (remaining['text'][0] > usd or remaining['text'][1] > tokens):
+                self.level = SKIP_LOW_CLAIM
+            
+            if self.level == SKIP_LOW_CLAIM and claims < self.min_claims:
+                self.decisions['skipped'] += 1
+                return 'skip', None
+            
+            modes = [(FULL, 'full'), (TEXT_ONLY, 'text')] if self.level == FULL else [(TEXT_ONLY, 'text')]
+            for mode, routing in modes:
+                cost, token_count = estimate[routing]
+                exceeded = self.store.reserve(scopes, cost, token_count)
+                if exceeded is None:
+                    self.decisions[mode] += 1
+                    return mode, (cost, token_count, [scope for scope, _ in scopes])
+                self.exceeded_scope = exceeded
+            
+            self.level = STOP
+            self.decisions['stopped'] += 1
+            return 'stop', None
+    
+    def settle(self, reservation: Tuple[float, int, List[str]], actual_cost: float, actual_tokens: int):
+        """Replace a reservation with what the slide actually used"""
+        reserved_cost, reserved_tokens, scopes = reservation
+        self.store.adjust(scopes, actual_cost - reserved_cost, int(actual_tokens - reserved_tokens))
+    
+    def summary(self) -> Dict[str, Any]:
+        job_cost, job_tokens = self.store.spent(f"job:{self.job_id}")
+        return {
+            'limits': self.limits,
+            'spent': {'usd': round(job_cost, 6), 'tokens': job_tokens},
+            'level': self.level,
+            'decisions': dict(self.decisions),
+            'exceeded_scope': self.exceeded_scope.split(':')[0] if self.exceeded_scope else None
+        }
+
+
+class BudgetManager:
+    def __init__(self, data_dir: Optional[str] = None):
+        data_dir = data_dir or os.getenv('FACTCHECK_DATA_DIR', './data')
+        self.store = BudgetStore(os.path.join(data_dir, 'budget.sqlite3'))
+    
+    def for_job(self, job_id: str, api_key: Optional[str],
+                job_limits: Optional[Dict[str, Any]] = None) -> Optional[JobBudget]:
+        """A JobBudget, or None when no limit applies (no admission overhead at all)"""
+        limits = budget_limits_from_env()
+        if job_limits:
+            overrides = parse_job_limits(job_limits)
+            limits['job'] = {
+                name: overrides[name] if overrides[name] is not None else limits['job'][name]
+                for name in ('usd', 'tokens')
+            }
+        if all(value is None for scope in limits.values() for value in scope.values()):
+            return None
+        return JobBudget(self.store, job_id, api_key, limits,
+                         min_claims=float(os.getenv('FACTCHECK_BUDGET_MIN_CLAIMS', '1')))
@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Any, Callable, Optional
+from src.utils.profiler import follow
+
+CANCELLED = 'cancelled'
+DEADLINE = 'deadline'
+
+
+class JobCancelled(Exception):
+    """Raised in a job's thread when its token was cancelled or its deadline passed"""
+    
+    def __init__(self, reason: str):
+        super().__init__(f"Job stopped: {reason}")
+        self.reason = reason
+
+
+class CancellationToken:
+    """Cooperative stop signal for one job, with an optional deadline.
+    
+    poll, when given, is consulted (at most every poll_interval seconds) for
+    cancellations requested from another worker process.
+    """
+    
+    def __init__(self, deadline_seconds: Optional[float] = None, poll: Optional[Callable[[], bool]] = None,
+                 poll_interval: float = 0.5):
+        self._event = threading.Event()
+        self._reason: Optional[str] = None
+        self._deadline: Optional[float] = None
+        self._poll = poll
+        self._poll_interval = poll_interval
+        self._polled_at = 0.0
+        if deadline_seconds is not None:
+            self.set_deadline(deadline_seconds)
+    
+    def set_deadline(self, seconds: float):
+        self._deadline = time.monotonic() + seconds
+    
+    def cancel(self, reason: str = CANCELLED):
+        if self._reason is None:
+            self._reason = reason
+        self._event.set()
+    
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline (never negative), or None without one"""
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+    
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            self.cancel(DEADLINE)
+            return True
+        if self._poll is not None and time.monotonic() - self._polled_at >= self._poll_interval:
+            self._polled_at = time.monotonic()
+            if self._poll():
+                self.cancel(CANCELLED)
+                return True
+        return False
+    
+    @property
+    def reason(self) -> Optional[str]:
+        return self._reason if self.cancelled else None
+    
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self._reason)
+    
+    def run(self, fn: Callable[[], Any], tick: float = 0.05) -> Any:
+        """Run fn in a helper thread and wait for it unless the token fires first.
+        
+        A call that is abandoned keeps running to completion in the
+        background (its result is discarded), so work shared with other
+        callers, e.g. a coalesced API call, is not torn down. The helper
+        thread is sampled by the job's profiler, if it has one.
+        """
+        self.raise_if_cancelled()
+        done = threading.Event()
+        outcome = {}
+        
+        def target():
+            try:
+                outcome['result'] = fn()
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                done.set()
+        
+        threading.Thread(target=follow(target), daemon=True, name='cancellable-call').start()
+        while not done.wait(tick):
+            self.raise_if_cancelled()
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['result']
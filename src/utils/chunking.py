@@ -0,0 +1,76 @@
+"""Token-aware splitting of oversize slide text.
+
+Dense handout pages can extract to thousands of characters, which makes a
+single check slow and its reply likely to be truncated. split_text breaks
+such text into chunks of at most max_tokens on paragraph boundaries, then
+sentence boundaries, and only as a last resort inside a sentence. Each
+chunk starts with the last few sentences of the previous one (up to
+overlap_tokens) so a claim that spans the boundary is seen whole once.
+"""
+
+import re
+from typing import List
+from src.utils.tokenizer import count_tokens
+
+_PARAGRAPHS = re.compile(r'\n\s*\n')
+# After Japanese/full-width sentence ends, or after .!? followed by whitespace
+_SENTENCES = re.compile(r'(?<=[。．！？])|(?<=[.!?])\s+')
+
+
+def _units(text: str, max_tokens: int) -> List[str]:
+    """Paragraphs, split into sentences (then lines, then characters) where they are too long"""
+    units = []
+    for paragraph in _PARAGRAPHS.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if count_tokens(paragraph) <= max_tokens:
+            units.append(paragraph)
+            continue
+        for sentence in _SENTENCES.split(paragraph):
+            for line in sentence.splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                while count_tokens(line) > max_tokens:
+                    # No boundary left: cut at the longest prefix that fits
+                    low, high = 1, len(line)
+                    while low < high:
+                        middle = (low + high + 1) // 2
+                        if count_tokens(line[:middle]) <= max_tokens:
+                            low = middle
+                        else:
+                            high = middle - 1
+                    units.append(line[:low])
+                    line = line[low:]
+                units.append(line)
+    return units
+
+
+def split_text(text: str, max_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """Split text into chunks of at most max_tokens; text that fits is returned as is"""
+    if max_tokens <= 0 or count_tokens(text) <= max_tokens:
+        return [text]
+    overlap_tokens = min(overlap_tokens, max_tokens // 4)
+    
+    chunks = []
+    current, current_tokens = [], 0
+    for unit in _units(text, max_tokens):
+        tokens = count_tokens(unit)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append('\n'.join(current))
+            # Carry the tail of this chunk over, as long as the next unit still fits
+            carried, carried_tokens = [], 0
+            for previous in reversed(current):
+                previous_tokens = count_tokens(previous)
+                if carried_tokens + previous_tokens > overlap_tokens or \
+                        carried_tokens + previous_tokens + tokens > max_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous_tokens
+            current, current_tokens = carried, carried_tokens
+        current.append(unit)
+        current_tokens += tokens
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
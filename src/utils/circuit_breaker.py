@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a backend whose circuit is open"""
+
+
+def is_availability_error(error: BaseException) -> bool:
+    """Whether error says the upstream API is unavailable: 5xx, timeouts, connection failures.
+    
+    Errors of a single caller's request (invalid key, per-key quota, bad
+    request) mean the API answered, and never trip a circuit.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # google.api_core exceptions carry the HTTP status as `code`
+    code = getattr(error, 'code', None)
+    if not isinstance(code, int):
+        code = getattr(error, 'status_code', None)
+    return isinstance(code, int) and code >= 500
+
+
+class CircuitBreaker:
+    """Stops calling a failing backend for a while.
+    
+    After `failure_threshold` consecutive failed calls the circuit opens and
+    calls fail fast for `reset_timeout` seconds. Then one trial call is let
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+    
+    @classmethod
+    def from_env(cls) -> 'CircuitBreaker':
+        return cls(int(os.getenv('GEMINI_CIRCUIT_FAILURES', '5')),
+                   float(os.getenv('GEMINI_CIRCUIT_RESET_SECONDS', '30')))
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+    
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+    
+    def retry_after(self) -> float:
+        """Seconds until the next call may be attempted (0 when closed)"""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+    
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+    
+    def release(self):
+        """End a call that says nothing about the API's availability, freeing the half-open trial"""
+        with self._lock:
+            self._trial = False
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._state()
+            failures = self._failures
+        return {'state': state, 'consecutive_failures': failures, 'retry_after': round(self.retry_after(), 1)}
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per API key, so one caller's failing key never blocks the others"""
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+    
+    @classmethod
+    def from_env(cls) -> 'CircuitBreakers':
+        return cls(int(os.getenv('GEMINI_CIRCUIT_FAILURES', '5')),
+                   float(os.getenv('GEMINI_CIRCUIT_RESET_SECONDS', '30')))
+    
+    def get(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[key]
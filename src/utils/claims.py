@@ -0,0 +1,53 @@
+"""Local claim-density scoring of slide text.
+
+Scores how many checkable claims a slide carries without calling the
+model, so a job can send its most claim-heavy slides first. Markers are
+weighted by how often they lead to an issue: citations, dates and
+percentages above bare numbers and named entities.
+"""
+
+import os
+import re
+from typing import List
+
+_MARKERS = [
+    # 2017年, 2017年6月, 2017-06-12, 2017/6, June 2017
+    (re.compile(r'(?:1[89]|20)\d{2}\s*(?:年|[-/]\d{1,2})|'
+                r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+(?:1[89]|20)\d{2}'), 2.0),
+    (re.compile(r'\d(?:[\d,.]*)\s*(?:%|％|パーセント|ポイント|pt\b)'), 2.0),
+    # [12], (Vaswani et al., 2017), arXiv:1706.03762, doi:..., 出典/引用
+    (re.compile(r'\[\d+(?:[,\-–]\s*\d+)*\]|et al\.|arXiv|doi:|出典|引用|参考文献', re.IGNORECASE), 3.0),
+    # Numbers with units or magnitudes count once more than bare numbers
+    (re.compile(r'\d+(?:[.,]\d+)*\s*(?:[kKMGTB]\b|億|万|千|倍|件|人|個|層|円|ドル|パラメータ|tokens?\b)'), 1.0),
+    (re.compile(r'\d+(?:[.,]\d+)*'), 1.0),
+    # Acronyms and model names: BERT, GPT-4, ResNet-50, ImageNet
+    (re.compile(r'\b(?:[A-Z]{2,}[\w-]*|[A-Z][a-z]+[A-Z][\w-]*)'), 1.0),
+]
+
+_known_entities = None
+
+
+def _known_entity_pattern():
+    """Extra entities from FACTCHECK_KNOWN_ENTITIES (comma separated), compiled once"""
+    global _known_entities
+    if _known_entities is None:
+        names = [name.strip() for name in os.getenv('FACTCHECK_KNOWN_ENTITIES', '').split(',') if name.strip()]
+        _known_entities = re.compile('|'.join(map(re.escape, names))) if names else False
+    return _known_entities
+
+
+def claim_score(text: str) -> float:
+    """Weighted count of claim markers (dates, percentages, citations, numbers, entities)"""
+    if not text:
+        return 0.0
+    score = sum(weight * len(pattern.findall(text)) for pattern, weight in _MARKERS)
+    known = _known_entity_pattern()
+    if known:
+        score += 2.0 * len(known.findall(text))
+    return score
+
+
+def order_by_claims(texts: List[str]) -> List[int]:
+    """Indexes of texts, most claim-dense first; ties keep their original order"""
+    scores = [claim_score(text) for text in texts]
+    return sorted(range(len(texts)), key=lambda index: -scores[index])
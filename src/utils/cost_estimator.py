@@ -1,22 +1,32 @@
-from typing import Dict, Any, List
+import os
+import shutil
+import time
+from typing import Dict, Any, List, Optional
 import json
+from src.utils.file_parser import FileParser
+from src.utils.pricing import EXPECTED_OUTPUT_TOKENS_PER_SLIDE, IMAGE_TOKENS, calculate_cost, model_pricing
+from src.utils.tokenizer import count_tokens, tokenizer_name
+from src.utils.usage_ledger import UsageLedger
 
 
 class CostEstimator:
-    def __init__(self):
-        # Gemini Pro pricing (as of 2024)
+    def __init__(self, gemini_client=None, ledger: Optional[UsageLedger] = None):
+        # Shared Gemini pricing table (src/utils/pricing.py)
+        vision_pricing = model_pricing('gemini-pro-vision')
         self.pricing = {
-            'gemini_pro': {
-                'input_per_1k_tokens': 0.00025,
-                'output_per_1k_tokens': 0.0005
-            },
-            'gemini_pro_vision': {
-                'input_per_1k_tokens': 0.00025,
-                'output_per_1k_tokens': 0.0005,
-                'image_per_image': 0.0025  # Approximate cost per image
-            }
+            'gemini_pro': model_pricing('gemini-pro'),
+            'gemini_pro_vision': dict(
+                vision_pricing,
+                image_per_image=IMAGE_TOKENS / 1000 * vision_pricing['input_per_1k_tokens']
+            )
         }
         
+        # Supplies the real prompt and model tiers for estimate_from_file
+        self._gemini_client = gemini_client
+        
+        # Recorded usage for cost reports and projections
+        self.ledger = ledger
+        
         # Average token estimates per slide
         self.avg_tokens_per_slide = {
             'text_only': {
@@ -65,6 +75,82 @@ class CostEstimator:
             'cost_per_slide': round(total_cost / slide_count, 6) if slide_count > 0 else 0
         }
     
+    def estimate_from_file(self, file_path: str) -> Dict[str, Any]:
+        """Pre-flight estimate from the actual file: text-only parse, real prompt tokens, real image counts.
+        
+        Slides are priced on the first (cheapest) model tier; with a model
+        cascade, max_total_cost assumes every slide is escalated through all tiers.
+        """
+        start = time.perf_counter()
+        client = self._client()
+        slides = FileParser().extract_text_only(file_path)
+        
+        # The check attaches one page render per slide: always for PowerPoint,
+        # for PDF only when poppler can rasterize the pages. With
+        # FACTCHECK_FIGURE_CROP it is cut down to the slide's figures, and
+        # slides without figures are sent text-only
+        file_ext = os.path.splitext(file_path)[1].lower()
+        renders_pages = file_ext != '.pdf' or shutil.which('pdftoppm') is not None
+        
+        slide_estimates = []
+        total_input = 0
+        total_output = 0
+        total_cost = 0.0
+        max_total_cost = 0.0
+        for slide in slides:
+            prompt = client._create_fact_check_prompt(slide['text_content'], slide['slide_number'])
+            prompt_tokens = count_tokens(prompt)
+            sends_image = renders_pages and slide['figure_count'] != 0
+            image_tokens = IMAGE_TOKENS if sends_image else 0
+            input_tokens = prompt_tokens + image_tokens
+            output_tokens = EXPECTED_OUTPUT_TOKENS_PER_SLIDE
+            tier_models = [vision_model if sends_image else text_model for text_model, vision_model in client.tiers]
+            cost = calculate_cost(input_tokens, output_tokens, tier_models[0])
+            
+            slide_estimates.append({
+                'slide_number': slide['slide_number'],
+                'text_tokens': count_tokens(slide['text_content']),
+                'prompt_tokens': prompt_tokens,
+                'image_count': slide['image_count'],
+                'figure_count': slide['figure_count'],
+                'image_tokens': image_tokens,
+                'output_tokens': output_tokens,
+                'model': tier_models[0],
+                'cost': cost
+            })
+            total_input += input_tokens
+            total_output += output_tokens
+            total_cost += cost
+            max_total_cost += sum(calculate_cost(input_tokens, output_tokens, model) for model in tier_models)
+        
+        return {
+            'file_name': os.path.basename(file_path),
+            'slide_count': len(slides),
+            'image_count': sum(slide['image_count'] for slide in slides),
+            'images_sent': sum(1 for slide in slide_estimates if slide['image_tokens']),
+            'tokenizer': tokenizer_name(),
+            'models': [list(tier) for tier in client.tiers],
+            'tokens': {
+                'input': total_input,
+                'output': total_output,
+                'total': total_input + total_output
+            },
+            'total_cost': round(total_cost, 6),
+            'max_total_cost': round(max_total_cost, 6),
+            'cost_per_slide': round(total_cost / len(slides), 6) if slides else 0,
+            'slides': slide_estimates,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)
+        }
+    
+    def _client(self):
+        if self._gemini_client is None:
+            from src.api.backends import GenerationBackend
+            from src.api.gemini_client import GeminiClient
+            
+            # Only the prompt builder and model tiers are used; no request is ever sent
+            self._gemini_client = GeminiClient(backend=GenerationBackend())
+        return self._gemini_client
+    
     def estimate_batch(self, files_info: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Estimate cost for multiple files"""
         total_slides = 0
@@ -102,8 +188,24 @@ class CostEstimator:
             'file_estimates': file_estimates
         }
     
-    def project_costs(self, base_estimate: Dict[str, Any]) -> Dict[str, Any]:
-        """Project costs for larger volumes"""
+    def _require_ledger(self) -> UsageLedger:
+        if self.ledger is None:
+            raise ValueError("No usage ledger: pass usage to the call, or create CostEstimator(ledger=...)")
+        return self.ledger
+    
+    def usage_baseline(self, since: Optional[str] = None, until: Optional[str] = None) -> Dict[str, Any]:
+        """Average cost per file and per slide from the usage ledger, as a project_costs base"""
+        summary = self._require_ledger().summary(since, until)
+        return {
+            'average_cost_per_file': summary['cost'] / summary['files'] if summary['files'] else 0,
+            'average_cost_per_slide': summary['cost'] / summary['slides'] if summary['slides'] else 0,
+            'usage': summary
+        }
+    
+    def project_costs(self, base_estimate: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Project costs for larger volumes (from recorded usage when no estimate is given)"""
+        if base_estimate is None:
+            base_estimate = self.usage_baseline()
         avg_cost_per_file = base_estimate.get('average_cost_per_file', 0)
         avg_cost_per_slide = base_estimate.get('average_cost_per_slide', 0)
         
@@ -142,36 +244,60 @@ class CostEstimator:
             }
         }
         
+        # Recorded usage also gives the current run rate
+        usage = base_estimate.get('usage')
+        if usage and usage['days']:
+            projections['monthly_estimates']['current_rate'] = {
+                'description': f"{usage['files']} files over {usage['days']} active days",
+                'cost': round(usage['cost'] / usage['days'] * 30, 2)
+            }
+        
         return projections
     
-    def generate_cost_report(self, actual_usage: List[Dict[str, Any]]) -> str:
-        """Generate a detailed cost report based on actual usage"""
-        total_cost = sum(item.get('cost', 0) for item in actual_usage)
-        total_slides = sum(item.get('slides', 0) for item in actual_usage)
+    def generate_cost_report(self, actual_usage: Optional[List[Dict[str, Any]]] = None,
+                             since: Optional[str] = None, until: Optional[str] = None) -> str:
+        """Generate a detailed cost report based on actual usage.
+        
+        actual_usage is a list of {'date', 'slides', 'cost'} per file; without
+        it the report is built from the usage ledger's daily rollups.
+        """
+        if actual_usage is None:
+            ledger = self._require_ledger()
+            by_date = {
+                row['day']: {'files': row['files'], 'slides': row['slides'], 'cost': row['cost']}
+                for row in ledger.rollup('day', since, until)
+            }
+            summary = ledger.summary(since, until)
+            file_count, total_slides, total_cost = summary['files'], summary['slides'], summary['cost']
+        else:
+            by_date = {}
+            file_count, total_slides, total_cost = len(actual_usage), 0, 0.0
+            for item in actual_usage:
+                stats = by_date.setdefault(item.get('date', 'Unknown'), {'files': 0, 'slides': 0, 'cost': 0})
+                stats['files'] += 1
+                stats['slides'] += item.get('slides', 0)
+                stats['cost'] += item.get('cost', 0)
+                total_slides += item.get('slides', 0)
+                total_cost += item.get('cost', 0)
+        
+        base_estimate = {
+            'average_cost_per_file': total_cost / file_count if file_count else 0,
+            'average_cost_per_slide': total_cost / total_slides if total_slides else 0
+        }
         
         report = f"""
 # ファクトチェック コスト分析レポート
 
 ## 実績サマリー
-- 処理ファイル数: {len(actual_usage)}
+- 処理ファイル数: {file_count}
 - 総スライド数: {total_slides}
 - 総コスト: ${total_cost:.4f}
-- 平均コスト/ファイル: ${total_cost/len(actual_usage):.4f}
-- 平均コスト/スライド: ${total_cost/total_slides:.6f}
+- 平均コスト/ファイル: ${base_estimate['average_cost_per_file']:.4f}
+- 平均コスト/スライド: ${base_estimate['average_cost_per_slide']:.6f}
 
 ## コスト内訳
 """
-        
-        # Group by date if available
-        by_date = {}
-        for item in actual_usage:
-            date = item.get('date', 'Unknown')
-            if date not in by_date:
-                by_date[date] = {'files': 0, 'slides': 0, 'cost': 0}
-            by_date[date]['files'] += 1
-            by_date[date]['slides'] += item.get('slides', 0)
-            by_date[date]['cost'] += item.get('cost', 0)
-        
+
         for date, stats in sorted(by_date.items()):
             report += f"\n### {date}\n"
             report += f"- ファイル数: {stats['files']}\n"
@@ -179,10 +305,6 @@ class CostEstimator:
             report += f"- コスト: ${stats['cost']:.4f}\n"
         
         # Add projections
-        base_estimate = {
-            'average_cost_per_file': total_cost / len(actual_usage) if actual_usage else 0,
-            'average_cost_per_slide': total_cost / total_slides if total_slides > 0 else 0
-        }
         projections = self.project_costs(base_estimate)
         
         report += "\n## 将来のコスト予測\n"
@@ -0,0 +1,147 @@
+"""Figure regions of a slide, for cropping the image sent to the vision model.
+
+A page image is mostly text the model already receives as text; what the
+vision call adds is the charts, tables and pictures. The regions found here
+(as fractions of the page, top-left origin) come from the document itself:
+pdfplumber's images, tables and clusters of vector graphics for PDFs, and
+picture/chart/table shape geometry for PPTX (groups only when they hold
+one of those). crop_to_figures then cuts the
+page image down to them, or drops it when a page has no figure.
+"""
+
+from io import BytesIO
+from typing import List, Optional, Tuple
+from PIL import Image
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+Region = Tuple[float, float, float, float]  # x0, y0, x1, y1 as fractions of the page
+
+# Ignore specks (icons, bullets) and page-sized frames/backgrounds
+MIN_REGION_AREA = 0.01
+MAX_SHAPE_AREA = 0.5
+# Vector graphics only count as a figure when enough of them cluster together
+MIN_VECTOR_OBJECTS = 3
+
+_PPTX_FIGURE_TYPES = {MSO_SHAPE_TYPE.PICTURE, MSO_SHAPE_TYPE.CHART, MSO_SHAPE_TYPE.TABLE}
+
+
+def _area(region: Region) -> float:
+    return max(0.0, region[2] - region[0]) * max(0.0, region[3] - region[1])
+
+
+def _clip(region: Region) -> Region:
+    return (max(0.0, region[0]), max(0.0, region[1]), min(1.0, region[2]), min(1.0, region[3]))
+
+
+def merge_regions(regions: List[Region], gap: float = 0.02) -> List[Region]:
+    """Union regions that overlap or lie within gap of each other"""
+    merged = [_clip(region) for region in regions]
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                a, b = merged[i], merged[j]
+                if a[0] - gap <= b[2] and b[0] - gap <= a[2] and a[1] - gap <= b[3] and b[1] - gap <= a[3]:
+                    merged[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del merged[j]
+                    changed = True
+                    break
+            if changed:
+                break
+    return sorted(merged, key=lambda region: (region[1], region[0]))
+
+
+def pdf_figure_regions(page) -> List[Region]:
+    """Figure regions of a pdfplumber page: embedded images, tables and vector-graphic clusters"""
+    width, height = float(page.width), float(page.height)
+    
+    def region(obj) -> Region:
+        return (float(obj['x0']) / width, float(obj['top']) / height,
+                float(obj['x1']) / width, float(obj['bottom']) / height)
+    
+    figures = [region(image) for image in page.images]
+    try:
+        figures += [(table.bbox[0] / width, table.bbox[1] / height, table.bbox[2] / width, table.bbox[3] / height)
+                    for table in page.find_tables()]
+    except Exception:
+        pass
+    
+    # Charts drawn as vectors: keep clusters of several curves/rects/lines, not a lone box or rule
+    shapes = [region(obj) for obj in page.curves + page.rects + page.lines if _area(region(obj)) <= MAX_SHAPE_AREA]
+    for cluster in merge_regions(shapes):
+        members = sum(1 for shape in shapes
+                      if shape[0] >= cluster[0] and shape[1] >= cluster[1]
+                      and shape[2] <= cluster[2] and shape[3] <= cluster[3])
+        if members >= MIN_VECTOR_OBJECTS:
+            figures.append(cluster)
+    
+    return [figure for figure in merge_regions(figures) if _area(figure) >= MIN_REGION_AREA]
+
+
+def _is_pptx_figure(shape) -> bool:
+    """A picture, chart or table, or a group holding one (not a group of text boxes or connectors)"""
+    if getattr(shape, 'shape_type', None) == MSO_SHAPE_TYPE.GROUP:
+        return any(_is_pptx_figure(member) for member in shape.shapes)
+    return (getattr(shape, 'shape_type', None) in _PPTX_FIGURE_TYPES
+            or getattr(shape, 'has_chart', False) or getattr(shape, 'has_table', False))
+
+
+def pptx_figure_regions(shapes, slide_width: int, slide_height: int) -> List[Region]:
+    """Figure regions of a python-pptx slide: pictures, charts and tables (groups as a whole)"""
+    figures = []
+    for shape in shapes:
+        if not _is_pptx_figure(shape):
+            continue
+        if shape.left is None or shape.width is None:
+            continue
+        figures.append((shape.left / slide_width, shape.top / slide_height,
+                        (shape.left + shape.width) / slide_width, (shape.top + shape.height) / slide_height))
+    return [figure for figure in merge_regions(figures) if _area(figure) >= MIN_REGION_AREA]
+
+
+def crop_to_figures(image: Image.Image, regions: List[Region], padding: float = 0.01,
+                    max_fraction: float = 0.8) -> Optional[Image.Image]:
+    """The parts of a page image worth a vision call.
+    
+    None when there is no figure; the whole page when the figures cover
+    most of it anyway; otherwise the figure crops, stacked top to bottom
+    when there are several.
+    """
+    if not regions:
+        return None
+    padded = merge_regions([(r[0] - padding, r[1] - padding, r[2] + padding, r[3] + padding) for r in regions], 0.0)
+    if sum(_area(region) for region in padded) >= max_fraction:
+        return image
+    
+    width, height = image.size
+    crops = [image.crop((round(r[0] * width), round(r[1] * height), round(r[2] * width), round(r[3] * height)))
+             for r in padded]
+    if len(crops) == 1:
+        return crops[0]
+    gap = max(1, height // 100)
+    sheet = Image.new('RGB', (max(crop.width for crop in crops), sum(crop.height for crop in crops) +
+                              gap * (len(crops) - 1)), color='white')
+    top = 0
+    for crop in crops:
+        sheet.paste(crop, (0, top))
+        top += crop.height + gap
+    return sheet
+
+
+def paste_pictures(image: Image.Image, shapes, slide_width: int, slide_height: int) -> Image.Image:
+    """Draw a slide's picture shapes into a page image at their geometry"""
+    width, height = image.size
+    for shape in shapes:
+        if getattr(shape, 'shape_type', None) != MSO_SHAPE_TYPE.PICTURE or shape.left is None or shape.width is None:
+            continue
+        try:
+            picture = Image.open(BytesIO(shape.image.blob)).convert('RGB')
+        except Exception:
+            continue
+        box = (round(shape.left / slide_width * width), round(shape.top / slide_height * height),
+               round(shape.width / slide_width * width), round(shape.height / slide_height * height))
+        if box[2] > 0 and box[3] > 0:
+            image.paste(picture.resize((box[2], box[3])), (box[0], box[1]))
+    return image
+
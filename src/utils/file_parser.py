@@ -2,11 +2,27 @@ import os
 import tempfile
 from typing import List, Dict, Any, Optional
 from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
 import PyPDF2
 from pdf2image import convert_from_path
 import base64
 from io import BytesIO
 from PIL import Image
+from src.utils.figures import Region, crop_to_figures, paste_pictures, pdf_figure_regions, pptx_figure_regions
+from src.utils.metrics import REGISTRY
+from src.utils.office_render import office_pool
+from src.utils.pdf_text import DEFAULT_ENGINE, default_parallel_min_pages, extract_pdf_text, page_count, resolve_engine
+
+try:
+    import pdfplumber
+except ImportError:  # optional: PDF pages are sent whole without it
+    pdfplumber = None
+
+PARSE_STAGE_SECONDS = REGISTRY.histogram(
+    'factcheck_parse_stage_seconds',
+    'Time spent in FileParser stages (convert, open, text_extract, rasterize, crop, encode)',
+    ['stage', 'file_type']
+)
 
 
 class SlideContent:
@@ -22,6 +38,10 @@ class SlideContent:
 class FileParser:
     def __init__(self):
         self.supported_formats = ['.pptx', '.ppt', '.pdf']
+        # Send only the figure regions of a slide image (none for slides without figures)
+        self.crop_figures = os.getenv('FACTCHECK_FIGURE_CROP', '1').lower() in ('1', 'true', 'yes')
+        # PDF text engine (see src/utils/pdf_text.py); PyPDF2 unless configured
+        self.pdf_text_engine = resolve_engine()
     
     def parse_file(self, file_path: str) -> List[SlideContent]:
         file_ext = os.path.splitext(file_path)[1].lower()
@@ -30,17 +50,44 @@ class FileParser:
             raise ValueError(f"Unsupported file format: {file_ext}")
         
         if file_ext in ['.pptx', '.ppt']:
-            return self._parse_powerpoint(file_path)
+            return self._parse_powerpoint(self._as_pptx(file_path))
         elif file_ext == '.pdf':
             return self._parse_pdf(file_path)
     
+    def _as_pptx(self, file_path: str) -> str:
+        """Legacy .ppt files are converted (once, cached by content) by the LibreOffice pool"""
+        if os.path.splitext(file_path)[1].lower() != '.ppt':
+            return file_path
+        pool = office_pool()
+        if pool is None:
+            raise ValueError("Legacy .ppt files need LibreOffice (soffice) to be installed")
+        with PARSE_STAGE_SECONDS.time(stage='convert', file_type='ppt'):
+            return pool.convert(file_path, 'pptx')
+    
+    def _render_slides(self, file_path: str) -> Optional[List[Image.Image]]:
+        """Real slide images from the LibreOffice pool, or None without it (or when rendering fails)"""
+        pool = office_pool()
+        if pool is None:
+            return None
+        try:
+            with PARSE_STAGE_SECONDS.time(stage='rasterize', file_type='pptx'):
+                return pool.render(file_path)
+        except Exception:
+            # LibreOffice or poppler failing means no rendering, not a failed parse
+            return None
+    
     def _parse_powerpoint(self, file_path: str) -> List[SlideContent]:
-        presentation = Presentation(file_path)
+        with PARSE_STAGE_SECONDS.time(stage='open', file_type='pptx'):
+            presentation = Presentation(file_path)
         slides_content = []
+        slide_size = (presentation.slide_width, presentation.slide_height)
+        rendered = self._render_slides(file_path) or []
         
         for idx, slide in enumerate(presentation.slides, 1):
-            text_content = self._extract_text_from_slide(slide)
-            image_content = self._extract_image_from_slide(slide, idx)
+            with PARSE_STAGE_SECONDS.time(stage='text_extract', file_type='pptx'):
+                text_content = self._extract_text_from_slide(slide)
+            page_image = rendered[idx - 1] if idx <= len(rendered) else None
+            image_content = self._extract_image_from_slide(slide, idx, slide_size, page_image)
             slides_content.append(SlideContent(idx, text_content, image_content))
         
         return slides_content
@@ -59,14 +106,29 @@ class FileParser:
         
         return "\n".join(text_parts)
     
-    def _extract_image_from_slide(self, slide, slide_number: int) -> Optional[bytes]:
+    def _extract_image_from_slide(self, slide, slide_number: int, slide_size=None,
+                                  page_image: Optional[Image.Image] = None) -> Optional[bytes]:
         try:
             img_buffer = BytesIO()
+            regions = None
+            if self.crop_figures and slide_size and slide_size[0] and slide_size[1]:
+                regions = pptx_figure_regions(slide.shapes, *slide_size)
+                if not regions:
+                    return None
             
-            # Create a simple representation of the slide
-            # In a real implementation, we would render the slide properly
-            img = Image.new('RGB', (1024, 768), color='white')
-            img.save(img_buffer, format='PNG')
+            if page_image is not None:
+                img = page_image
+            else:
+                # Without LibreOffice: a simple representation of the slide, its pictures on a blank page
+                with PARSE_STAGE_SECONDS.time(stage='rasterize', file_type='pptx'):
+                    img = Image.new('RGB', (1024, 768), color='white')
+                    if slide_size and slide_size[0] and slide_size[1]:
+                        paste_pictures(img, slide.shapes, *slide_size)
+            if regions:
+                with PARSE_STAGE_SECONDS.time(stage='crop', file_type='pptx'):
+                    img = crop_to_figures(img, regions)
+            with PARSE_STAGE_SECONDS.time(stage='encode', file_type='pptx'):
+                img.save(img_buffer, format='PNG')
             
             return img_buffer.getvalue()
         except Exception:
@@ -75,29 +137,108 @@ class FileParser:
     def _parse_pdf(self, file_path: str) -> List[SlideContent]:
         slides_content = []
         
-        # Extract text from PDF
-        pdf_reader = PyPDF2.PdfReader(file_path)
-        
         # Convert PDF pages to images
         try:
-            images = convert_from_path(file_path, dpi=150)
+            with PARSE_STAGE_SECONDS.time(stage='rasterize', file_type='pdf'):
+                images = convert_from_path(file_path, dpi=150)
         except Exception:
             images = []
+        figure_regions = self._pdf_figure_regions(file_path) if self.crop_figures and images else None
         
-        for idx, page in enumerate(pdf_reader.pages):
-            text_content = page.extract_text()
-            
-            # Get corresponding image if available
+        with PARSE_STAGE_SECONDS.time(stage='text_extract', file_type='pdf'):
+            texts = self._extract_pdf_text(file_path)
+        
+        for idx, text_content in enumerate(texts):
+            # Get corresponding image if available, cut down to its figures
             image_content = None
-            if idx < len(images):
-                img_buffer = BytesIO()
-                images[idx].save(img_buffer, format='PNG')
-                image_content = img_buffer.getvalue()
+            image = images[idx] if idx < len(images) else None
+            if image is not None and figure_regions is not None and idx < len(figure_regions):
+                with PARSE_STAGE_SECONDS.time(stage='crop', file_type='pdf'):
+                    image = crop_to_figures(image, figure_regions[idx])
+            if image is not None:
+                with PARSE_STAGE_SECONDS.time(stage='encode', file_type='pdf'):
+                    img_buffer = BytesIO()
+                    image.save(img_buffer, format='PNG')
+                    image_content = img_buffer.getvalue()
             
             slides_content.append(SlideContent(idx + 1, text_content, image_content))
         
         return slides_content
     
+    def _extract_pdf_text(self, file_path: str, pdf_reader=None) -> List[str]:
+        """Page texts with the configured engine; only the PyPDF2 engine opens a PyPDF2 reader (or reuses one)"""
+        if self.pdf_text_engine != DEFAULT_ENGINE:
+            return extract_pdf_text(file_path, page_count(file_path, self.pdf_text_engine), self.pdf_text_engine)
+        if pdf_reader is None:
+            with PARSE_STAGE_SECONDS.time(stage='open', file_type='pdf'):
+                pdf_reader = PyPDF2.PdfReader(file_path)
+        if len(pdf_reader.pages) < default_parallel_min_pages():
+            return [page.extract_text() or '' for page in pdf_reader.pages]
+        return extract_pdf_text(file_path, len(pdf_reader.pages), self.pdf_text_engine)
+    
+    def _pdf_figure_regions(self, file_path: str) -> Optional[List[List[Region]]]:
+        """Figure regions of every page, or None when they cannot be found (pages are sent whole)"""
+        if pdfplumber is None:
+            return None
+        try:
+            with pdfplumber.open(file_path) as pdf:
+                return [pdf_figure_regions(page) for page in pdf.pages]
+        except Exception:
+            return None
+    
+    def extract_text_only(self, file_path: str) -> List[Dict[str, Any]]:
+        """Cheap pass for cost estimates: text and embedded image count per slide, no rasterization.
+        
+        figure_count is the number of figure regions the slide image is cropped
+        to (0: sent without an image), or None when the whole page is sent.
+        """
+        file_ext = os.path.splitext(file_path)[1].lower()
+        
+        if file_ext not in self.supported_formats:
+            raise ValueError(f"Unsupported file format: {file_ext}")
+        
+        slides = []
+        if file_ext in ['.pptx', '.ppt']:
+            presentation = Presentation(self._as_pptx(file_path))
+            slide_size = (presentation.slide_width, presentation.slide_height)
+            crop = self.crop_figures and slide_size[0] and slide_size[1]
+            for idx, slide in enumerate(presentation.slides, 1):
+                slides.append({
+                    'slide_number': idx,
+                    'text_content': self._extract_text_from_slide(slide),
+                    'image_count': self._count_pictures(slide.shapes),
+                    'figure_count': len(pptx_figure_regions(slide.shapes, *slide_size)) if crop else None
+                })
+        else:
+            pdf_reader = PyPDF2.PdfReader(file_path)
+            texts = self._extract_pdf_text(file_path, pdf_reader)
+            figure_regions = (self._pdf_figure_regions(file_path) if self.crop_figures else None) or []
+            for idx, page in enumerate(pdf_reader.pages, 1):
+                slides.append({
+                    'slide_number': idx,
+                    'text_content': texts[idx - 1],
+                    'image_count': self._count_pdf_images(page),
+                    'figure_count': len(figure_regions[idx - 1]) if idx <= len(figure_regions) else None
+                })
+        
+        return slides
+    
+    def _count_pictures(self, shapes) -> int:
+        count = 0
+        for shape in shapes:
+            if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+                count += self._count_pictures(shape.shapes)
+            elif shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+                count += 1
+        return count
+    
+    def _count_pdf_images(self, page) -> int:
+        try:
+            xobjects = page['/Resources']['/XObject'].get_object()
+        except (KeyError, TypeError):
+            return 0
+        return sum(1 for ref in xobjects.values() if ref.get_object().get('/Subtype') == '/Image')
+    
     def extract_metadata(self, file_path: str) -> Dict[str, Any]:
         metadata = {
             'file_name': os.path.basename(file_path),
@@ -109,7 +250,7 @@ class FileParser:
         
         if file_ext in ['.pptx', '.ppt']:
             try:
-                presentation = Presentation(file_path)
+                presentation = Presentation(self._as_pptx(file_path))
                 metadata['slide_count'] = len(presentation.slides)
                 if hasattr(presentation.core_properties, 'title'):
                     metadata['title'] = presentation.core_properties.title
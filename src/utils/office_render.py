@@ -0,0 +1,223 @@
+"""Slide rendering and legacy .ppt conversion through headless LibreOffice.
+
+python-pptx can neither open .ppt files nor draw slides, so both go
+through LibreOffice. The first start of soffice on a fresh user profile
+takes seconds, so an OfficePool keeps a fixed set of workers, each with
+its own profile that is initialised once (warm) and reused by every
+conversion it runs. Profiles are never shared, since LibreOffice allows
+one instance per profile.
+
+Conversions are cached by content hash under FACTCHECK_DATA_DIR, so a
+deck is converted once however often it is checked, and concurrent
+requests for the same deck share one conversion. A conversion that
+exceeds its timeout is killed along with its process group, and its
+worker is restarted on a fresh profile.
+"""
+
+import hashlib
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from pdf2image import convert_from_path
+from PIL import Image
+from src.utils.metrics import REGISTRY
+from src.utils.single_flight import SingleFlight
+
+OFFICE_CONVERSIONS = REGISTRY.counter(
+    'factcheck_office_conversions_total', 'LibreOffice conversions by target format and result', ['format', 'result'])
+OFFICE_CONVERT_SECONDS = REGISTRY.histogram(
+    'factcheck_office_convert_seconds', 'Time a LibreOffice worker spent on one conversion', ['format'])
+OFFICE_RESTARTS = REGISTRY.counter(
+    'factcheck_office_worker_restarts_total', 'LibreOffice workers restarted after a timeout')
+
+
+class OfficeError(RuntimeError):
+    pass
+
+
+class OfficeTimeout(OfficeError):
+    pass
+
+
+def soffice_binary() -> Optional[str]:
+    """FACTCHECK_SOFFICE, else soffice/libreoffice on PATH; None when LibreOffice is not installed"""
+    configured = os.getenv('FACTCHECK_SOFFICE')
+    if configured:
+        return shutil.which(configured)
+    return shutil.which('soffice') or shutil.which('libreoffice')
+
+
+def file_hash(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class OfficeWorker:
+    """One soffice user profile; runs one conversion at a time"""
+    
+    def __init__(self, binary: str, root: str, index: int):
+        self.binary = binary
+        self.index = index
+        self.profile = os.path.abspath(os.path.join(root, f"profile-{index}"))
+        self.warm = False
+        self.restarts = 0
+        self.conversions = 0
+    
+    def _run(self, args: List[str], timeout: float):
+        command = [self.binary, f"-env:UserInstallation=file://{self.profile}", '--headless', '--invisible',
+                   '--nologo', '--norestore', '--nodefault', '--nolockcheck', *args]
+        # A session of its own, so a wedged soffice is killed with all of its children
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+        try:
+            _, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            process.communicate()
+            self.restart()
+            raise OfficeTimeout(f"LibreOffice did not finish within {timeout:g}s")
+        if process.returncode != 0:
+            raise OfficeError(stderr.decode('utf-8', errors='replace').strip() or f"soffice exited {process.returncode}")
+    
+    def warm_up(self, timeout: float):
+        """Initialise the profile (the slow part of a cold start) without converting anything"""
+        if not self.warm:
+            self._run(['--terminate_after_init'], timeout)
+            self.warm = True
+    
+    def convert(self, path: str, target_format: str, outdir: str, timeout: float) -> str:
+        self.warm_up(timeout)
+        self._run(['--convert-to', target_format, '--outdir', outdir, os.path.abspath(path)], timeout)
+        self.conversions += 1
+        extension = target_format.split(':')[0]
+        output = os.path.join(outdir, f"{os.path.splitext(os.path.basename(path))[0]}.{extension}")
+        if not os.path.exists(output):
+            raise OfficeError(f"LibreOffice produced no {extension} for {os.path.basename(path)}")
+        return output
+    
+    def restart(self):
+        # A killed instance can leave its profile locked or half written
+        shutil.rmtree(self.profile, ignore_errors=True)
+        self.warm = False
+        self.restarts += 1
+        OFFICE_RESTARTS.inc()
+
+
+class OfficePool:
+    def __init__(self, workers: int = 2, cache_dir: Optional[str] = None, timeout: float = 120.0,
+                 binary: Optional[str] = None):
+        self.binary = binary or soffice_binary()
+        self.cache_dir = cache_dir or os.path.join(os.getenv('FACTCHECK_DATA_DIR', './data'), 'office-cache')
+        self.timeout = timeout
+        if self.binary:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self._workers = [OfficeWorker(self.binary, os.path.join(self.cache_dir, 'profiles'), index)
+                         for index in range(max(1, workers))] if self.binary else []
+        self._idle: queue.Queue = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._flights = SingleFlight()
+    
+    @classmethod
+    def from_env(cls) -> 'OfficePool':
+        return cls(int(os.getenv('FACTCHECK_OFFICE_WORKERS', '2')),
+                   timeout=float(os.getenv('FACTCHECK_OFFICE_TIMEOUT', '120')))
+    
+    @property
+    def available(self) -> bool:
+        return bool(self._workers)
+    
+    def start(self, wait: bool = False):
+        """Warm every worker's profile in the background, so the first deck does not pay for it"""
+        def warm():
+            try:
+                with self._worker():
+                    pass
+            except OfficeError:
+                pass
+        
+        threads = [threading.Thread(target=warm, daemon=True, name='office-warm-up') for _ in self._workers]
+        for thread in threads:
+            thread.start()
+        if wait:
+            for thread in threads:
+                thread.join()
+    
+    @contextmanager
+    def _worker(self) -> Iterator[OfficeWorker]:
+        worker = self._idle.get()
+        try:
+            worker.warm_up(self.timeout)
+            yield worker
+        finally:
+            self._idle.put(worker)
+    
+    def convert(self, path: str, target_format: str) -> str:
+        """Path of path converted to target_format (e.g. 'pdf', 'pptx'), from the cache when possible"""
+        if not self.available:
+            raise OfficeError('LibreOffice (soffice) is not installed')
+        extension = target_format.split(':')[0]
+        target = os.path.join(self.cache_dir, f"{file_hash(path)}.{extension}")
+        if os.path.exists(target):
+            OFFICE_CONVERSIONS.inc(format=extension, result='cached')
+            return target
+        return self._flights.do(target, lambda: self._convert(path, target_format, target))[0]
+    
+    def _convert(self, path: str, target_format: str, target: str) -> str:
+        extension = target_format.split(':')[0]
+        if os.path.exists(target):
+            return target
+        with tempfile.TemporaryDirectory(dir=self.cache_dir, prefix='convert-') as outdir, self._worker() as worker:
+            start = time.perf_counter()
+            try:
+                output = worker.convert(path, target_format, outdir, self.timeout)
+            except OfficeTimeout:
+                OFFICE_CONVERSIONS.inc(format=extension, result='timeout')
+                raise
+            except OfficeError:
+                OFFICE_CONVERSIONS.inc(format=extension, result='error')
+                raise
+            OFFICE_CONVERT_SECONDS.observe(time.perf_counter() - start, format=extension)
+            os.replace(output, target)
+        OFFICE_CONVERSIONS.inc(format=extension, result='converted')
+        return target
+    
+    def render(self, path: str, dpi: int = 150) -> List[Image.Image]:
+        """One image per slide, rasterised from the (cached) PDF conversion"""
+        return convert_from_path(self.convert(path, 'pdf'), dpi=dpi)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': len(self._workers),
+            'idle': self._idle.qsize(),
+            'warm': sum(1 for worker in self._workers if worker.warm),
+            'conversions': sum(worker.conversions for worker in self._workers),
+            'restarts': sum(worker.restarts for worker in self._workers)
+        }
+
+
+_pool: Optional[OfficePool] = None
+_pool_lock = threading.Lock()
+
+
+def office_pool() -> Optional[OfficePool]:
+    """The process-wide pool, or None when LibreOffice is missing or FACTCHECK_OFFICE_RENDER=0"""
+    global _pool
+    if os.getenv('FACTCHECK_OFFICE_RENDER', '1').lower() in ('0', 'false', 'no'):
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = OfficePool.from_env()
+    return _pool if _pool.available else None
@@ -0,0 +1,190 @@
+"""Pluggable PDF text extraction.
+
+Engines (FACTCHECK_PDF_TEXT_ENGINE):
+
+- pypdf2: PyPDF2, the default
+- pypdf: pypdf 4, PyPDF2's maintained successor and faster on large files
+- pdfplumber: pdfminer layout analysis; slower, but keeps the reading
+  order of multi-column pages
+- pdftotext: poppler's pdftotext in a subprocess; the fastest, with good
+  reading order
+
+An engine whose package or binary is missing falls back to pypdf2. Page
+counts are read with the engine's own library (pdfinfo for pdftotext), so
+only the pypdf2 engine opens a document with PyPDF2.
+Documents of FACTCHECK_PDF_PARALLEL_MIN_PAGES pages or more are split into
+contiguous page ranges extracted in parallel: in a process pool for the
+Python engines (they hold the GIL), or as concurrent pdftotext processes.
+"""
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+import PyPDF2
+
+DEFAULT_ENGINE = 'pypdf2'
+
+
+def _extract_pypdf2(path: str, start: int, stop: int) -> List[str]:
+    reader = PyPDF2.PdfReader(path)
+    return [reader.pages[index].extract_text() or '' for index in range(start, stop)]
+
+
+def _extract_pypdf(path: str, start: int, stop: int) -> List[str]:
+    import pypdf
+    
+    reader = pypdf.PdfReader(path)
+    return [reader.pages[index].extract_text() or '' for index in range(start, stop)]
+
+
+def _extract_pdfplumber(path: str, start: int, stop: int) -> List[str]:
+    import pdfplumber
+    
+    with pdfplumber.open(path, pages=list(range(start + 1, stop + 1))) as pdf:
+        return [page.extract_text() or '' for page in pdf.pages]
+
+
+def _extract_pdftotext(path: str, start: int, stop: int) -> List[str]:
+    timeout = float(os.getenv('FACTCHECK_PDFTOTEXT_TIMEOUT', '120'))
+    output = subprocess.run(
+        ['pdftotext', '-q', '-enc', 'UTF-8', '-f', str(start + 1), '-l', str(stop), path, '-'],
+        capture_output=True, check=True, timeout=timeout
+    ).stdout.decode('utf-8', errors='replace')
+    # Every page ends with a form feed
+    pages = output.split('\f')[:stop - start]
+    return pages + [''] * (stop - start - len(pages))
+
+
+def _has_module(name: str) -> Callable[[], bool]:
+    def available() -> bool:
+        try:
+            __import__(name)
+        except ImportError:
+            return False
+        return True
+    return available
+
+
+def _count_pypdf(path: str) -> int:
+    import pypdf
+    
+    return len(pypdf.PdfReader(path).pages)
+
+
+def _count_pdfplumber(path: str) -> int:
+    import pdfplumber
+    
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _count_pdfinfo(path: str) -> int:
+    if shutil.which('pdfinfo') is None:
+        return len(PyPDF2.PdfReader(path).pages)
+    output = subprocess.run(['pdfinfo', path], capture_output=True, check=True,
+                            timeout=float(os.getenv('FACTCHECK_PDFTOTEXT_TIMEOUT', '120'))).stdout
+    for line in output.decode('utf-8', errors='replace').splitlines():
+        if line.startswith('Pages:'):
+            return int(line.split(':', 1)[1])
+    raise ValueError(f"pdfinfo reported no page count for {path}")
+
+
+_PAGE_COUNTS: Dict[str, Callable[[str], int]] = {
+    'pypdf2': lambda path: len(PyPDF2.PdfReader(path).pages),
+    'pypdf': _count_pypdf,
+    'pdfplumber': _count_pdfplumber,
+    'pdftotext': _count_pdfinfo,
+}
+
+# name -> (extract(path, start, stop), available(), runs in a subprocess)
+ENGINES: Dict[str, Tuple[Callable[[str, int, int], List[str]], Callable[[], bool], bool]] = {
+    'pypdf2': (_extract_pypdf2, lambda: True, False),
+    'pypdf': (_extract_pypdf, _has_module('pypdf'), False),
+    'pdfplumber': (_extract_pdfplumber, _has_module('pdfplumber'), False),
+    'pdftotext': (_extract_pdftotext, lambda: shutil.which('pdftotext') is not None, True),
+}
+
+
+def available_engines() -> List[str]:
+    return [name for name, (_, available, _) in ENGINES.items() if available()]
+
+
+def resolve_engine(name: Optional[str] = None) -> str:
+    """The engine to use for name (default FACTCHECK_PDF_TEXT_ENGINE), falling back to pypdf2"""
+    name = (name or os.getenv('FACTCHECK_PDF_TEXT_ENGINE') or DEFAULT_ENGINE).lower()
+    if name not in ENGINES:
+        raise ValueError(f"Unknown PDF text engine: {name}")
+    return name if ENGINES[name][1]() else DEFAULT_ENGINE
+
+
+def page_count(path: str, engine: Optional[str] = None) -> int:
+    """Number of pages, read with the engine's own library"""
+    return _PAGE_COUNTS[resolve_engine(engine)](path)
+
+
+def page_ranges(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """Split pages into at most parts contiguous [start, stop) ranges of near-equal size"""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges, start = [], 0
+    for part in range(parts):
+        stop = start + size + (1 if part < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _extract_range(engine: str, path: str, start: int, stop: int) -> List[str]:
+    return ENGINES[engine][0](path, start, stop)
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    """One long-lived pool per process; spawned, since the web server runs threads"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def default_workers() -> int:
+    return int(os.getenv('FACTCHECK_PDF_TEXT_WORKERS', '0')) or min(4, os.cpu_count() or 1)
+
+
+def default_parallel_min_pages() -> int:
+    return int(os.getenv('FACTCHECK_PDF_PARALLEL_MIN_PAGES', '40'))
+
+
+def extract_pdf_text(path: str, page_count: int, engine: Optional[str] = None,
+                     workers: Optional[int] = None, parallel_min_pages: Optional[int] = None) -> List[str]:
+    """Text of every page, in page order"""
+    engine = resolve_engine(engine)
+    workers = workers or default_workers()
+    if parallel_min_pages is None:
+        parallel_min_pages = default_parallel_min_pages()
+    
+    if workers <= 1 or page_count < max(2, parallel_min_pages):
+        return _extract_range(engine, path, 0, page_count)
+    
+    ranges = page_ranges(page_count, workers)
+    if ENGINES[engine][2]:
+        with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix='pdf-text') as executor:
+            futures = [executor.submit(_extract_range, engine, path, start, stop) for start, stop in ranges]
+            parts = [future.result() for future in futures]
+    else:
+        pool = _process_pool(workers)
+        futures = [pool.submit(_extract_range, engine, path, start, stop) for start, stop in ranges]
+        parts = [future.result() for future in futures]
+    return [text for part in parts for text in part]
@@ -0,0 +1,30 @@
+"""Gemini pricing shared by the client, the cost estimator and the web app"""
+
+from typing import Dict, Optional
+
+# USD per 1K tokens
+MODEL_PRICING: Dict[str, Dict[str, float]] = {
+    'gemini-pro': {'input_per_1k_tokens': 0.00025, 'output_per_1k_tokens': 0.0005},
+    'gemini-pro-vision': {'input_per_1k_tokens': 0.00025, 'output_per_1k_tokens': 0.0005},
+    'gemini-1.5-flash': {'input_per_1k_tokens': 0.000075, 'output_per_1k_tokens': 0.0003},
+    'gemini-1.5-pro': {'input_per_1k_tokens': 0.00125, 'output_per_1k_tokens': 0.005},
+}
+DEFAULT_MODEL = 'gemini-pro'
+
+# Gemini bills a fixed number of input tokens per image
+IMAGE_TOKENS = 258
+
+# Typical size of one slide's fact-check reply (the reply length cannot be known up front)
+EXPECTED_OUTPUT_TOKENS_PER_SLIDE = 200
+
+
+def model_pricing(model_name: Optional[str] = None) -> Dict[str, float]:
+    """Prices for a model; unknown models are priced like gemini-pro"""
+    return MODEL_PRICING.get(model_name, MODEL_PRICING[DEFAULT_MODEL])
+
+
+def calculate_cost(input_tokens: float, output_tokens: float, model_name: Optional[str] = None) -> float:
+    pricing = model_pricing(model_name)
+    input_cost = (input_tokens / 1000) * pricing['input_per_1k_tokens']
+    output_cost = (output_tokens / 1000) * pricing['output_per_1k_tokens']
+    return round(input_cost + output_cost, 6)
@@ -0,0 +1,203 @@
+"""On-demand CPU and memory profiling for a single check job.
+
+Samples the stacks of the job's thread, and of the helper threads it hands
+work to through follow(), at a fixed interval (collapsed-stack output,
+loadable by flamegraph.pl / speedscope) and records allocations
+with tracemalloc. No sampler thread or tracing is started unless profiling is
+switched on, via FACTCHECK_PROFILE=1 or a per-request flag.
+
+tracemalloc is process-wide, so concurrent profiled jobs share it: tracing
+stops when the last of them finishes. A profiling error never fails the job;
+it is kept in JobProfiler.error and the profile files are skipped.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Callable, ContextManager, Dict, Optional
+
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+# Whether the profilers started tracemalloc (and so must stop it), rather than finding it on
+_tracing_owned = False
+
+
+def _start_tracing() -> None:
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_users += 1
+
+
+def _stop_tracing() -> None:
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+_threads_lock = threading.Lock()
+# Thread ident -> the profiler sampling it: job threads and the helper threads they hand work to
+_profiled_threads: Dict[int, 'JobProfiler'] = {}
+
+
+def follow(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """fn, wrapped so that the thread running it is sampled by the calling thread's profiler.
+    
+    Returns fn itself when the calling thread is not being profiled.
+    """
+    with _threads_lock:
+        profiler = _profiled_threads.get(threading.get_ident())
+    if profiler is None:
+        return fn
+    
+    def followed(*args, **kwargs):
+        attached = profiler._attach()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if attached:
+                profiler._detach()
+    return followed
+
+
+def profiling_enabled(requested: Optional[bool] = None) -> bool:
+    """Per-request flag wins; otherwise fall back to FACTCHECK_PROFILE"""
+    if requested is not None:
+        return bool(requested)
+    return os.getenv('FACTCHECK_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+
+class JobProfiler:
+    def __init__(self, output_dir: str, base_filename: str, interval: float = 0.005,
+                 top_allocations: int = 30):
+        self.output_dir = output_dir
+        self.base_filename = base_filename
+        self.interval = interval
+        self.top_allocations = top_allocations
+        self.saved_files: Dict[str, str] = {}
+        self._stacks = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._sampler = None
+        # Sampled threads: ident -> name
+        self._threads: Dict[int, str] = {}
+        self._target = None
+        self._started_at = 0.0
+        self._tracing = False
+        self.error: Optional[str] = None
+    
+    def __enter__(self) -> 'JobProfiler':
+        self._target = threading.get_ident()
+        self._started_at = time.perf_counter()
+        self._attach()
+        try:
+            _start_tracing()
+            self._tracing = True
+            self._sampler = threading.Thread(target=self._sample_loop, name='job-profiler', daemon=True)
+            self._sampler.start()
+        except Exception as e:
+            self.error = f"profiler did not start: {e}"
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        with _threads_lock:
+            for ident in self._threads:
+                if _profiled_threads.get(ident) is self:
+                    del _profiled_threads[ident]
+            self._threads.clear()
+        try:
+            if self._sampler is not None:
+                self._sampler.join()
+            if self.error is None:
+                elapsed = time.perf_counter() - self._started_at
+                # Taken before releasing tracemalloc, which another job may still be using
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                self._write(snapshot, peak, elapsed)
+        except Exception as e:
+            self.error = f"profile not written: {e}"
+        finally:
+            if self._tracing:
+                self._tracing = False
+                _stop_tracing()
+    
+    def _attach(self) -> bool:
+        """Sample the current thread until _detach; False if it already is (or profiling ended)"""
+        ident = threading.get_ident()
+        with _threads_lock:
+            if self._stop.is_set() or ident in self._threads:
+                return False
+            self._threads[ident] = threading.current_thread().name
+            _profiled_threads[ident] = self
+            return True
+    
+    def _detach(self) -> None:
+        ident = threading.get_ident()
+        with _threads_lock:
+            self._threads.pop(ident, None)
+            if _profiled_threads.get(ident) is self:
+                del _profiled_threads[ident]
+    
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with _threads_lock:
+                threads = list(self._threads.items())
+            sampled = False
+            for ident, name in threads:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                # Helper threads get their own root, so their time is not mistaken for the job thread's
+                if ident != self._target:
+                    stack.append(f"[{name}]")
+                self._stacks[';'.join(reversed(stack))] += 1
+                sampled = True
+            if sampled:
+                self._samples += 1
+    
+    def _write(self, snapshot: tracemalloc.Snapshot, peak: int, elapsed: float) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base_name = f"{self.base_filename}_{timestamp}"
+        
+        cpu_path = os.path.join(self.output_dir, f"{base_name}_cpu.collapsed")
+        with open(cpu_path, 'w', encoding='utf-8') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self.saved_files['profile_cpu'] = cpu_path
+        
+        memory_path = os.path.join(self.output_dir, f"{base_name}_memory.txt")
+        with open(memory_path, 'w', encoding='utf-8') as f:
+            f.write(f"wall time: {elapsed:.3f}s, cpu samples: {self._samples} "
+                    f"(every {self.interval * 1000:.1f}ms)\n")
+            f.write(f"peak traced memory: {peak / (1024 * 1024):.2f} MiB\n\n")
+            f.write(f"top {self.top_allocations} allocation sites still held at end of job:\n")
+            for stat in snapshot.statistics('lineno')[:self.top_allocations]:
+                frame = stat.traceback[0]
+                f.write(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}\n")
+        self.saved_files['profile_memory'] = memory_path
+
+
+def profile_job(enabled: bool, output_dir: str, base_filename: str) -> ContextManager:
+    """JobProfiler when enabled, otherwise a no-op context"""
+    if not enabled:
+        return nullcontext()
+    return JobProfiler(output_dir, base_filename)
@@ -1,48 +1,84 @@
+import html
 import os
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import json
 from src.core.fact_checker import FactCheckReport
+from src.utils.metrics import REGISTRY
+from src.utils.report_store import ReportStore, report_summary
+
+REPORT_SECONDS = REGISTRY.histogram(
+    'factcheck_report_seconds', 'Time spent rendering and writing reports', ['stage'])
 
 
 class ReportGenerator:
-    def __init__(self, output_dir: str = "./output"):
+    def __init__(self, output_dir: str = "./output", store: Optional[ReportStore] = None):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
+        self.store = store or ReportStore(output_dir)
     
-    def save_report(self, report: FactCheckReport, base_filename: str) -> Dict[str, str]:
-        """Save report in multiple formats and return file paths"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_name = f"{base_filename}_{timestamp}"
+    def save_report(self, report: FactCheckReport, base_filename: str,
+                    formats: Tuple[str, ...] = ('json', 'html', 'markdown')) -> Dict[str, str]:
+        """Save report in multiple formats and return file paths.
         
+        The JSON is always written (compressed, and indexed for listings and
+        dashboards). HTML and Markdown are rendered now only if listed in
+        formats; otherwise their path is returned and they are rendered on
+        first download (see ReportStore.ensure_variant).
+        """
         saved_files = {}
         
-        # Save JSON
-        json_path = os.path.join(self.output_dir, f"{base_name}.json")
-        with open(json_path, 'w', encoding='utf-8') as f:
-            f.write(report.model_dump_json(indent=2))
-        saved_files['json'] = json_path
+        with REPORT_SECONDS.time(stage='json'):
+            stored = self.store.save(report, base_filename)
+            report_id = stored['report_id']
+            saved_files['json'] = stored['path']
         
-        # Save HTML
-        from src.core.fact_checker import FactChecker
-        checker = FactChecker()
-        html_content = checker.export_report(report, 'html')
-        html_path = os.path.join(self.output_dir, f"{base_name}.html")
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        saved_files['html'] = html_path
-        
-        # Save Markdown
-        md_content = checker.export_report(report, 'markdown')
-        md_path = os.path.join(self.output_dir, f"{base_name}.md")
-        with open(md_path, 'w', encoding='utf-8') as f:
-            f.write(md_content)
-        saved_files['markdown'] = md_path
+        for report_format in ('html', 'markdown'):
+            if report_format in formats:
+                with REPORT_SECONDS.time(stage=report_format):
+                    saved_files[report_format] = self.store.ensure_variant(report_id, report_format, self.render)
+            else:
+                saved_files[report_format] = self.store.variant_path(report_id, report_format)
         
         return saved_files
     
-    def generate_summary_dashboard(self, reports: List[FactCheckReport]) -> str:
-        """Generate a summary dashboard for multiple reports"""
+    def render(self, report: FactCheckReport, report_format: str) -> str:
+        from src.core.fact_checker import FactChecker
+        return FactChecker().export_report(report, report_format)
+    
+    def generate_summary_dashboard(self, reports: Optional[List[FactCheckReport]] = None,
+                                   page: int = 1, per_page: int = 50) -> str:
+        """Generate a summary dashboard for the given reports, or for every saved report"""
+        dashboard_html = self.render_dashboard(reports, page, per_page)
+        
+        dashboard_path = os.path.join(self.output_dir, f"dashboard_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
+        with open(dashboard_path, 'w', encoding='utf-8') as f:
+            f.write(dashboard_html)
+        
+        return dashboard_path
+    
+    def render_dashboard(self, reports: Optional[List[FactCheckReport]] = None,
+                         page: int = 1, per_page: int = 50) -> str:
+        """Dashboard HTML.
+        
+        Without reports it is built from the report index alone: totals over
+        every saved report, and one page of report cards, newest first.
+        """
+        if reports is None:
+            totals = self.store.totals()
+            listing = self.store.list(page, per_page)
+            summaries = listing['reports']
+            pager = f"<p>ページ {listing['page']} / {max(listing['pages'], 1)}（全{listing['total']}件）</p>"
+        else:
+            summaries = [report_summary(report) for report in reports]
+            totals = {
+                'reports': len(summaries),
+                'total_slides': sum(summary['total_slides'] for summary in summaries),
+                'total_issues': sum(summary['total_issues'] for summary in summaries),
+                'cost': sum(summary['cost'] for summary in summaries)
+            }
+            pager = ""
+        
         dashboard_html = """
         <!DOCTYPE html>
         <html>
@@ -50,30 +86,32 @@ class ReportGenerator:
             <title>ファクトチェック ダッシュボード</title>
             <meta charset="utf-8">
             <style>
-                body { font-family: Arial, sans-serif; margin: 20px; }
-                .report-card { 
+                body {{ font-family: Arial, sans-serif; margin: 20px; }}
+                .report-card {{ 
                     border: 1px solid #ddd; 
                     padding: 15px; 
                     margin: 10px 0; 
                     border-radius: 5px;
-                }
-                .stats { 
+                }}
+                .stats {{ 
                     display: flex; 
                     justify-content: space-around; 
                     margin: 10px 0;
-                }
-                .stat-item { 
+                }}
+                .stat-item {{ 
                     text-align: center; 
                     padding: 10px;
-                }
-                .stat-value { 
+                }}
+                .stat-value {{ 
                     font-size: 24px; 
                     font-weight: bold; 
                     color: #333;
-                }
-                .issue-high { color: #ff0000; }
-                .issue-medium { color: #ff9900; }
-                .issue-low { color: #ffcc00; }
+                }}
+                .issue-high {{ color: #ff0000; }}
+                .issue-medium {{ color: #ff9900; }}
+                .issue-low {{ color: #ffcc00; }}
+                .chart {{ margin: 10px 0 20px; }}
+                .chart text {{ font-size: 11px; fill: #333; }}
             </style>
         </head>
         <body>
@@ -99,31 +137,37 @@ class ReportGenerator:
                 </div>
             </div>
             
+            {performance}
+            
             <h2>ファイル別結果</h2>
+            {pager}
         """.format(
             timestamp=datetime.now().strftime("%Y年%m月%d日 %H:%M:%S"),
-            total_files=len(reports),
-            total_slides=sum(r.total_slides for r in reports),
-            total_issues=sum(r.total_issues for r in reports),
-            total_cost=sum(r.total_cost_estimate for r in reports)
+            total_files=totals['reports'],
+            total_slides=totals['total_slides'],
+            total_issues=totals['total_issues'],
+            total_cost=totals['cost'],
+            performance=self._performance_section(summaries),
+            pager=pager
         )
         
-        for report in reports:
-            high_issues = report.issues_by_severity.get('high', 0)
-            medium_issues = report.issues_by_severity.get('medium', 0)
-            low_issues = report.issues_by_severity.get('low', 0)
+        for summary in summaries:
+            high_issues = summary['issues_by_severity'].get('high', 0)
+            medium_issues = summary['issues_by_severity'].get('medium', 0)
+            low_issues = summary['issues_by_severity'].get('low', 0)
             
             dashboard_html += f"""
             <div class="report-card">
-                <h3>{report.file_metadata.get('file_name', 'Unknown')}</h3>
-                <p>スライド数: {report.total_slides} | 問題のあるスライド: {report.slides_with_issues}</p>
+                <h3>{html.escape(summary['file_name'])}</h3>
+                <p>スライド数: {summary['total_slides']} | 問題のあるスライド: {summary['slides_with_issues']}</p>
                 <p>
                     問題数: 
                     <span class="issue-high">高: {high_issues}</span> | 
                     <span class="issue-medium">中: {medium_issues}</span> | 
                     <span class="issue-low">低: {low_issues}</span>
                 </p>
-                <p>推定コスト: ${report.total_cost_estimate:.4f}</p>
+                <p>推定コスト: ${summary['cost']:.4f}</p>
+                {f'<p class="issue-high">未チェックのスライド: {summary["failed_slides"]}</p>' if summary['failed_slides'] else ''}
             </div>
             """
         
@@ -132,11 +176,80 @@ class ReportGenerator:
         </html>
         """
         
-        dashboard_path = os.path.join(self.output_dir, f"dashboard_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
-        with open(dashboard_path, 'w', encoding='utf-8') as f:
-            f.write(dashboard_html)
+        return dashboard_html
+    
+    def _performance_section(self, summaries: List[Dict[str, Any]]) -> str:
+        """Latency, throughput and stage charts across reports that carry a performance summary"""
+        traced = [summary for summary in summaries if summary.get('performance')]
+        if not traced:
+            return ""
         
-        return dashboard_path
+        latency_rows = []
+        throughput_rows = []
+        stage_totals: Dict[str, float] = {}
+        tier_calls: Dict[str, int] = {}
+        tier_costs: Dict[str, float] = {}
+        for summary in traced:
+            label = summary['file_name']
+            performance = summary['performance']
+            if 'p50_ms' in performance:
+                latency_rows.append((f"{label} p50", performance['p50_ms']))
+                latency_rows.append((f"{label} p95", performance['p95_ms']))
+            throughput_rows.append((label, performance['slides_per_second']))
+            for stage, seconds in performance['stages'].items():
+                if stage != 'total':
+                    stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+            for tier_label, tier in performance['tiers'].items():
+                tier_calls[tier_label] = tier_calls.get(tier_label, 0) + tier['calls']
+                tier_costs[tier_label] = tier_costs.get(tier_label, 0.0) + tier['cost']
+        
+        stage_rows = [(stage, seconds / len(traced) * 1000) for stage, seconds in stage_totals.items()]
+        total_retries = sum(summary['performance']['retries'] for summary in traced)
+        total_cache_hits = sum(summary['performance']['cache_hits'] for summary in traced)
+        
+        tiers_html = ""
+        if len(tier_calls) > 1:
+            escalated = sum(summary['performance']['escalated'] for summary in traced)
+            tiers_html = f"""
+            <h3>モデルカスケード（エスカレーション: {escalated}スライド）</h3>
+            {self._svg_bar_chart(list(tier_calls.items()), 'calls')}
+            {self._svg_bar_chart([(label, cost * 1000) for label, cost in tier_costs.items()], 'm$')}
+            """
+        
+        return f"""
+            <h2>パフォーマンス</h2>
+            <p>リトライ合計: {total_retries} | キャッシュヒット: {total_cache_hits}</p>
+            <h3>スライドあたりのAPIレイテンシ (ms)</h3>
+            {self._svg_bar_chart(latency_rows, 'ms')}
+            <h3>スループット (スライド/秒)</h3>
+            {self._svg_bar_chart(throughput_rows, '/s')}
+            <h3>ステージ別平均処理時間 (ms)</h3>
+            {self._svg_bar_chart(stage_rows, 'ms')}
+            {tiers_html}
+        """
+    
+    def _svg_bar_chart(self, rows: List[Tuple[str, float]], unit: str, width: int = 640) -> str:
+        """Render a horizontal bar chart as inline SVG"""
+        if not rows:
+            return "<p>データなし</p>"
+        
+        bar_height, label_width, value_width = 18, 220, 80
+        plot_width = width - label_width - value_width
+        peak = max(value for _, value in rows) or 1.0
+        height = len(rows) * (bar_height + 6) + 6
+        
+        bars = []
+        for index, (label, value) in enumerate(rows):
+            y = 6 + index * (bar_height + 6)
+            bar_width = max(1, int(plot_width * value / peak))
+            bars.append(
+                f'<text x="0" y="{y + 13}">{html.escape(label[:32])}</text>'
+                f'<rect x="{label_width}" y="{y}" width="{bar_width}" height="{bar_height}" fill="#4a90d9"/>'
+                f'<text x="{label_width + bar_width + 4}" y="{y + 13}">{value:.2f} {unit}</text>'
+            )
+        
+        return (f'<svg class="chart" width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">'
+                + "".join(bars) + "</svg>")
     
     def generate_improvement_suggestions(self, report: FactCheckReport) -> Dict[str, Any]:
         """Generate suggestions for improving the slides based on fact-check results"""
@@ -200,21 +313,25 @@ class ReportGenerator:
     
     def export_cost_analysis(self, reports: List[FactCheckReport]) -> str:
         """Export cost analysis for multiple reports"""
-        analysis = {
-            'total_cost': sum(r.total_cost_estimate for r in reports),
-            'average_cost_per_file': sum(r.total_cost_estimate for r in reports) / len(reports) if reports else 0,
-            'average_cost_per_slide': sum(r.total_cost_estimate for r in reports) / sum(r.total_slides for r in reports) if reports else 0,
-            'file_costs': []
-        }
-        
+        total_cost = 0.0
+        total_slides = 0
+        file_costs = []
         for report in reports:
-            file_cost = {
+            total_cost += report.total_cost_estimate
+            total_slides += report.total_slides
+            file_costs.append({
                 'filename': report.file_metadata.get('file_name', 'Unknown'),
                 'slides': report.total_slides,
                 'cost': report.total_cost_estimate,
                 'cost_per_slide': report.total_cost_estimate / report.total_slides if report.total_slides > 0 else 0
-            }
-            analysis['file_costs'].append(file_cost)
+            })
+        
+        analysis = {
+            'total_cost': total_cost,
+            'average_cost_per_file': total_cost / len(reports) if reports else 0,
+            'average_cost_per_slide': total_cost / total_slides if total_slides else 0,
+            'file_costs': file_costs
+        }
         
         # Generate cost projection
         analysis['projection'] = {
@@ -0,0 +1,474 @@
+"""Saved reports: one gzip-compressed JSON file per report plus a summary index.
+
+The index (SQLite, next to the reports) holds one small row per report:
+file, content hash, counts by type and severity, cost, timestamp and a
+compact performance summary. Listings and dashboards are served from the
+index alone; a full report is only decompressed when it is opened.
+
+Every issue is also indexed for search (`issues` plus an FTS5 full-text
+table over its texts), in the same transaction that indexes its report.
+
+Download formats live next to the JSON as `<report_id><ext>`, each with
+pre-compressed `.gz` (and `.br` when brotli is installed) variants and an
+`.etag` sidecar holding the SHA-256 of the uncompressed content. The
+stored `.json.gz` is itself the gzip variant of `<report_id>.json`.
+
+Loose `output/*.json` reports written before the store existed are moved
+into it once (see import_legacy_reports); the loose files are left in place.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from src.core.models import FactCheckReport, ISSUE_TYPES, SEVERITIES
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are written without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+REPORT_FORMATS = {'json': '.json', 'html': '.html', 'markdown': '.md'}
+
+_COUNT_COLUMNS = [f"type_{issue_type}" for issue_type in ISSUE_TYPES] + [f"severity_{s}" for s in SEVERITIES]
+
+_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS reports ('
+    ' report_id TEXT PRIMARY KEY, path TEXT NOT NULL, file_name TEXT NOT NULL, content_hash TEXT,'
+    ' timestamp TEXT NOT NULL, total_slides INTEGER NOT NULL, slides_with_issues INTEGER NOT NULL,'
+    ' total_issues INTEGER NOT NULL, failed_slides INTEGER NOT NULL, cost REAL NOT NULL, '
+    + ', '.join(f'{column} INTEGER NOT NULL DEFAULT 0' for column in _COUNT_COLUMNS)
+    + ', performance TEXT)',
+    'CREATE INDEX IF NOT EXISTS reports_timestamp ON reports (timestamp)',
+    'CREATE INDEX IF NOT EXISTS reports_content_hash ON reports (content_hash)',
+    'CREATE INDEX IF NOT EXISTS reports_file_name ON reports (file_name)',
+    'CREATE TABLE IF NOT EXISTS issues ('
+    ' id INTEGER PRIMARY KEY, report_id TEXT NOT NULL, file_name TEXT NOT NULL, content_hash TEXT,'
+    ' timestamp TEXT NOT NULL, slide_number INTEGER NOT NULL, type TEXT NOT NULL, severity TEXT NOT NULL,'
+    ' confidence REAL NOT NULL, original_text TEXT NOT NULL, issue_description TEXT NOT NULL,'
+    ' correct_information TEXT)',
+    'CREATE INDEX IF NOT EXISTS issues_filters ON issues (type, severity, timestamp)',
+    'CREATE INDEX IF NOT EXISTS issues_timestamp ON issues (timestamp)',
+    'CREATE INDEX IF NOT EXISTS issues_report ON issues (report_id)',
+    # Reports whose issues are in the search index (reports saved before it existed are backfilled)
+    'CREATE TABLE IF NOT EXISTS issues_indexed (report_id TEXT PRIMARY KEY)',
+    # Loose output/*.json files already looked at by import_legacy_reports
+    'CREATE TABLE IF NOT EXISTS legacy_imported (file_name TEXT PRIMARY KEY)'
+]
+
+_FTS_COLUMNS = ['original_text', 'issue_description', 'correct_information']
+
+# Trigram tokens match substrings, which also works for Japanese text without
+# word boundaries; terms shorter than three characters fall back to LIKE
+_FTS_SCHEMA = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS issues_fts USING fts5('
+    + ', '.join(_FTS_COLUMNS) + ", content='issues', content_rowid='id', tokenize='{tokenizer}')"
+)
+_MIN_FTS_TERM = 3
+
+
+def _write_atomic(path: str, data: bytes):
+    """Concurrent writers of the same variant produce the same bytes; the last rename wins"""
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def read_report(path: str) -> FactCheckReport:
+    """Load a saved report, compressed (.json.gz) or plain JSON"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return FactCheckReport.model_validate_json(f.read())
+
+
+def performance_summary(report: FactCheckReport) -> Optional[Dict[str, Any]]:
+    """The few performance figures a dashboard charts, instead of the full per-slide trace"""
+    performance = report.performance
+    if performance is None:
+        return None
+    latencies = sorted(slide.latency for slide in performance.slides)
+    summary = {
+        'slides_per_second': performance.slides_per_second,
+        'stages': performance.stages,
+        'retries': performance.total_retries,
+        'cache_hits': performance.cache_hits,
+        'escalated': performance.escalated_slides,
+        'tiers': {
+            f"tier {tier.tier}: {'/'.join(tier.models)}": {'calls': tier.calls, 'cost': tier.cost}
+            for tier in performance.tiers
+        }
+    }
+    if latencies:
+        summary['p50_ms'] = latencies[len(latencies) // 2] * 1000
+        summary['p95_ms'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+    return summary
+
+
+def report_summary(report: FactCheckReport) -> Dict[str, Any]:
+    """Index row of a report (without its id and path)"""
+    return {
+        'file_name': report.file_metadata.get('file_name', 'Unknown'),
+        'content_hash': report.file_metadata.get('content_hash'),
+        'timestamp': report.timestamp,
+        'total_slides': report.total_slides,
+        'slides_with_issues': report.slides_with_issues,
+        'total_issues': report.total_issues,
+        'failed_slides': len(report.failed_slides),
+        'cost': report.total_cost_estimate,
+        'issues_by_type': {issue_type: report.issues_by_type.get(issue_type, 0) for issue_type in ISSUE_TYPES},
+        'issues_by_severity': {severity: report.issues_by_severity.get(severity, 0) for severity in SEVERITIES},
+        'performance': performance_summary(report)
+    }
+
+
+class ReportStore:
+    def __init__(self, output_dir: str = "./output"):
+        self.output_dir = output_dir
+        self.report_dir = os.path.join(output_dir, 'reports')
+        os.makedirs(self.report_dir, exist_ok=True)
+        self.index_path = os.path.join(output_dir, 'reports.sqlite3')
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            try:
+                conn.execute(_FTS_SCHEMA.format(tokenizer='trigram'))
+                self.fts_tokenizer = 'trigram'
+            except sqlite3.OperationalError:
+                # SQLite before 3.34 has no trigram tokenizer
+                conn.execute(_FTS_SCHEMA.format(tokenizer='unicode61'))
+                self.fts_tokenizer = 'unicode61'
+        finally:
+            conn.close()
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+    
+    def save(self, report: FactCheckReport, base_filename: str) -> Dict[str, str]:
+        """Write the report once, compressed, and index it. Returns its id and path"""
+        report_id = f"{base_filename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        path = self._write(report, report_id)
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            self._index_report(conn, report_id, path, report)
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return {'report_id': report_id, 'path': path}
+    
+    def _write(self, report: FactCheckReport, report_id: str) -> str:
+        path = self.variant_path(report_id, 'json') + '.gz'
+        content = report.model_dump_json().encode('utf-8')
+        _write_atomic(path, gzip.compress(content, compresslevel=6))
+        _write_atomic(self.variant_path(report_id, 'json') + '.etag',
+                      hashlib.sha256(content).hexdigest().encode('ascii'))
+        return path
+    
+    def _index_report(self, conn: sqlite3.Connection, report_id: str, path: str, report: FactCheckReport):
+        summary = report_summary(report)
+        row = {
+            'report_id': report_id,
+            'path': path,
+            **{key: value for key, value in summary.items()
+               if key not in ('issues_by_type', 'issues_by_severity', 'performance')},
+            **{f"type_{key}": value for key, value in summary['issues_by_type'].items()},
+            **{f"severity_{key}": value for key, value in summary['issues_by_severity'].items()},
+            'performance': json.dumps(summary['performance']) if summary['performance'] else None
+        }
+        conn.execute(
+            f"INSERT INTO reports ({', '.join(row)}) VALUES ({', '.join('?' for _ in row)})",
+            list(row.values())
+        )
+        self._index_issues(conn, report_id, report)
+    
+    def import_legacy_reports(self) -> int:
+        """Move loose `output/*.json` reports saved before the store into it, once per file.
+        
+        Each keeps its file name (without .json) as report id, so old download
+        links resolve to the stored copy. JSON files that are not reports are
+        remembered and skipped; unreadable ones are logged and retried on the
+        next start. Returns the number of reports imported.
+        """
+        imported = 0
+        conn = self._connect()
+        try:
+            seen = {row[0] for row in conn.execute('SELECT file_name FROM legacy_imported')}
+            for name in sorted(os.listdir(self.output_dir)):
+                if not name.endswith('.json') or name in seen:
+                    continue
+                try:
+                    report = read_report(os.path.join(self.output_dir, name))
+                except ValueError as e:
+                    # Cost analyses and other JSON outputs, or a corrupt report
+                    logger.warning("Not importing %s: not a readable report (%s)", name, e)
+                    conn.execute('INSERT OR IGNORE INTO legacy_imported (file_name) VALUES (?)', (name,))
+                    continue
+                except OSError as e:
+                    logger.warning("Not importing %s: %s", name, e)
+                    continue
+                report_id = name[:-len('.json')]
+                try:
+                    path = self._write(report, report_id)
+                    conn.execute('BEGIN IMMEDIATE')
+                    # Another worker may have imported it since `seen` was read
+                    new = not conn.execute(
+                        'SELECT 1 FROM legacy_imported WHERE file_name = ?', (name,)).fetchone()
+                    if new:
+                        self._index_report(conn, report_id, path, report)
+                        conn.execute('INSERT INTO legacy_imported (file_name) VALUES (?)', (name,))
+                    conn.execute('COMMIT')
+                    imported += new
+                except Exception as e:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    logger.warning("Not importing %s: %s", name, e)
+        finally:
+            conn.close()
+        return imported
+    
+    def _index_issues(self, conn: sqlite3.Connection, report_id: str, report: FactCheckReport):
+        file_name = report.file_metadata.get('file_name', 'Unknown')
+        content_hash = report.file_metadata.get('content_hash')
+        for result in report.results:
+            for issue in result.issues:
+                cursor = conn.execute(
+                    'INSERT INTO issues (report_id, file_name, content_hash, timestamp, slide_number, type,'
+                    ' severity, confidence, original_text, issue_description, correct_information)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (report_id, file_name, content_hash, report.timestamp, issue.slide_number, issue.type,
+                     issue.severity, issue.confidence, issue.original_text, issue.issue_description,
+                     issue.correct_information)
+                )
+                conn.execute(
+                    f"INSERT INTO issues_fts (rowid, {', '.join(_FTS_COLUMNS)}) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, issue.original_text, issue.issue_description, issue.correct_information)
+                )
+        conn.execute('INSERT OR IGNORE INTO issues_indexed (report_id) VALUES (?)', (report_id,))
+    
+    def backfill_issues(self) -> int:
+        """Index the issues of reports saved before the search index existed.
+        
+        A report that cannot be read or indexed is logged and skipped (and
+        retried on the next start). Returns the number of reports indexed.
+        """
+        indexed = 0
+        conn = self._connect()
+        try:
+            pending = conn.execute(
+                'SELECT report_id, path FROM reports WHERE report_id NOT IN (SELECT report_id FROM issues_indexed)'
+            ).fetchall()
+            for report_id, path in pending:
+                try:
+                    report = read_report(path)
+                    conn.execute('BEGIN IMMEDIATE')
+                    self._index_issues(conn, report_id, report)
+                    conn.execute('COMMIT')
+                    indexed += 1
+                except Exception as e:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    logger.warning("Not indexing the issues of %s: %s", report_id, e)
+        finally:
+            conn.close()
+        return indexed
+    
+    def search(self, query: Optional[str] = None, types: Optional[List[str]] = None,
+               severities: Optional[List[str]] = None, min_confidence: Optional[float] = None,
+               deck: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+               page: int = 1, per_page: int = 50) -> Dict[str, Any]:
+        """Issues across every saved report.
+        
+        query terms (whitespace-separated) must all appear in the issue's
+        texts; deck matches a file name or content hash; since/until are
+        inclusive dates (YYYY-MM-DD) on the report timestamp. Text matches
+        are ranked by relevance, otherwise newest first.
+        """
+        page = max(1, page)
+        per_page = max(1, min(per_page, 500))
+        clauses, params = [], []
+        fts_terms = []
+        for term in (query or '').split():
+            if self.fts_tokenizer == 'trigram' and len(term) < _MIN_FTS_TERM:
+                clauses.append('(' + ' OR '.join(f'i.{column} LIKE ?' for column in _FTS_COLUMNS) + ')')
+                params.extend([f'%{term}%'] * len(_FTS_COLUMNS))
+            else:
+                fts_terms.append('"' + term.replace('"', '""') + '"')
+        if types:
+            clauses.append(f"i.type IN ({', '.join('?' for _ in types)})")
+            params.extend(types)
+        if severities:
+            clauses.append(f"i.severity IN ({', '.join('?' for _ in severities)})")
+            params.extend(severities)
+        if min_confidence is not None:
+            clauses.append('i.confidence >= ?')
+            params.append(min_confidence)
+        if deck:
+            clauses.append('(i.file_name = ? OR i.content_hash = ?)')
+            params.extend([deck, deck])
+        if since:
+            clauses.append('i.timestamp >= ?')
+            params.append(since)
+        if until:
+            # Inclusive: every timestamp on that day sorts before `until` + 'T~'
+            clauses.append('i.timestamp <= ?')
+            params.append(until + 'T~')
+        
+        source = 'issues i'
+        order = 'i.timestamp DESC, i.id DESC'
+        if fts_terms:
+            source = 'issues_fts JOIN issues i ON i.id = issues_fts.rowid'
+            clauses.insert(0, 'issues_fts MATCH ?')
+            params.insert(0, ' AND '.join(fts_terms))
+            order = 'issues_fts.rank, i.timestamp DESC'
+        where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+        
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            total = conn.execute(f'SELECT COUNT(*) FROM {source}{where}', params).fetchone()[0]
+            rows = conn.execute(
+                f'SELECT i.* FROM {source}{where} ORDER BY {order} LIMIT ? OFFSET ?',
+                params + [per_page, (page - 1) * per_page]
+            ).fetchall()
+        finally:
+            conn.close()
+        return {
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': (total + per_page - 1) // per_page,
+            'issues': [{key: row[key] for key in row.keys() if key != 'id'} for row in rows]
+        }
+    
+    def variant_path(self, report_id: str, report_format: str) -> str:
+        return os.path.join(self.report_dir, f"{report_id}{REPORT_FORMATS[report_format]}")
+    
+    def report_id_for(self, filename: str) -> Optional[str]:
+        """Report id of a download filename such as `<id>.html` or `<id>.json.gz`, if it is indexed"""
+        report_id = filename
+        for suffix in ('.gz', '.br'):
+            if report_id.endswith(suffix):
+                report_id = report_id[:-len(suffix)]
+        for extension in REPORT_FORMATS.values():
+            if report_id.endswith(extension):
+                report_id = report_id[:-len(extension)]
+                break
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT 1 FROM reports WHERE report_id = ?', (report_id,)).fetchone()
+        finally:
+            conn.close()
+        return report_id if row else None
+    
+    def ensure_variant(self, report_id: str, report_format: str,
+                       render: Callable[[FactCheckReport, str], str]) -> str:
+        """Path of a report in the given format, rendering and pre-compressing it on first use"""
+        path = self.variant_path(report_id, report_format)
+        if os.path.exists(path):
+            return path
+        
+        if report_format == 'json':
+            with open(path + '.gz', 'rb') as f:
+                content = gzip.decompress(f.read())
+        else:
+            content = render(self.load(report_id), report_format).encode('utf-8')
+            _write_atomic(path + '.gz', gzip.compress(content, compresslevel=9))
+        if brotli is not None:
+            _write_atomic(path + '.br', brotli.compress(content, quality=11))
+        _write_atomic(path + '.etag', hashlib.sha256(content).hexdigest().encode('ascii'))
+        _write_atomic(path, content)
+        return path
+    
+    def etag(self, path: str) -> str:
+        """Strong ETag of a variant: SHA-256 of its uncompressed content"""
+        try:
+            with open(path + '.etag', 'r', encoding='ascii') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            _write_atomic(path + '.etag', digest.encode('ascii'))
+            return digest
+    
+    def load(self, report_id: str) -> Optional[FactCheckReport]:
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT path FROM reports WHERE report_id = ?', (report_id,)).fetchone()
+        finally:
+            conn.close()
+        return read_report(row[0]) if row else None
+    
+    def _filters(self, file_name: Optional[str], content_hash: Optional[str]):
+        clauses, params = [], []
+        if file_name:
+            clauses.append('file_name = ?')
+            params.append(file_name)
+        if content_hash:
+            clauses.append('content_hash = ?')
+            params.append(content_hash)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+    
+    def list(self, page: int = 1, per_page: int = 50, file_name: Optional[str] = None,
+             content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Newest first, one page of index rows"""
+        page = max(1, page)
+        per_page = max(1, min(per_page, 500))
+        where, params = self._filters(file_name, content_hash)
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            total = conn.execute(f'SELECT COUNT(*) FROM reports{where}', params).fetchone()[0]
+            rows = conn.execute(
+                f'SELECT * FROM reports{where} ORDER BY timestamp DESC, report_id DESC LIMIT ? OFFSET ?',
+                params + [per_page, (page - 1) * per_page]
+            ).fetchall()
+        finally:
+            conn.close()
+        return {
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': (total + per_page - 1) // per_page,
+            'reports': [self._row_summary(row) for row in rows]
+        }
+    
+    def totals(self, file_name: Optional[str] = None, content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Sums over every indexed report"""
+        where, params = self._filters(file_name, content_hash)
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT COUNT(*), SUM(total_slides), SUM(slides_with_issues), SUM(total_issues), SUM(cost), '
+                + ', '.join(f'SUM({column})' for column in _COUNT_COLUMNS)
+                + f' FROM reports{where}', params
+            ).fetchone()
+        finally:
+            conn.close()
+        counts = dict(zip(_COUNT_COLUMNS, (value or 0 for value in row[5:])))
+        return {
+            'reports': row[0],
+            'total_slides': row[1] or 0,
+            'slides_with_issues': row[2] or 0,
+            'total_issues': row[3] or 0,
+            'cost': round(row[4] or 0.0, 6),
+            'issues_by_type': {issue_type: counts[f"type_{issue_type}"] for issue_type in ISSUE_TYPES},
+            'issues_by_severity': {severity: counts[f"severity_{severity}"] for severity in SEVERITIES}
+        }
+    
+    @staticmethod
+    def _row_summary(row: sqlite3.Row) -> Dict[str, Any]:
+        summary = {key: row[key] for key in row.keys() if key not in _COUNT_COLUMNS and key != 'path'}
+        summary['issues_by_type'] = {issue_type: row[f"type_{issue_type}"] for issue_type in ISSUE_TYPES}
+        summary['issues_by_severity'] = {severity: row[f"severity_{severity}"] for severity in SEVERITIES}
+        summary['performance'] = json.loads(row['performance']) if row['performance'] else None
+        return summary
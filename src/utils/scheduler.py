@@ -0,0 +1,123 @@
+"""Priority and fair-share scheduling of model API calls.
+
+Every call takes a slot from the process-wide CallScheduler for the
+duration of one API attempt. When slots are scarce, the next free slot
+goes to:
+
+1. the highest priority class waiting (interactive > deck > bulk), then
+2. the tenant (API key) that has received the least service relative to
+   its weight (weighted fair queuing), then
+3. the oldest waiting call.
+
+Some slots are reserved for interactive calls so a quick check never
+waits behind a full pool of deck or bulk calls.
+"""
+
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from src.utils.metrics import REGISTRY
+
+INTERACTIVE = 'interactive'
+DECK = 'deck'
+BULK = 'bulk'
+PRIORITIES = {INTERACTIVE: 0, DECK: 1, BULK: 2}
+
+SCHEDULER_WAIT_SECONDS = REGISTRY.histogram(
+    'factcheck_scheduler_wait_seconds', 'Time a model API call waited for a scheduler slot', ['priority'])
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Tenant weights from "tenant=weight,tenant=weight" (tenants are API key ids)"""
+    weights = {}
+    for part in spec.split(','):
+        tenant, _, weight = part.strip().partition('=')
+        if tenant and weight:
+            weights[tenant.strip()] = float(weight)
+    return weights
+
+
+class _Waiter:
+    __slots__ = ('priority', 'tenant', 'seq', 'granted')
+    
+    def __init__(self, priority: str, tenant: str, seq: int):
+        self.priority = priority
+        self.tenant = tenant
+        self.seq = seq
+        self.granted = False
+
+
+class CallScheduler:
+    def __init__(self, slots: int = 8, interactive_reserve: int = 1, weights: Optional[Dict[str, float]] = None):
+        # 0 slots disables scheduling: every call runs immediately
+        self.slots = slots
+        self.interactive_reserve = min(interactive_reserve, max(0, slots - 1))
+        self.weights = weights or {}
+        self._condition = threading.Condition()
+        self._waiting: List[_Waiter] = []
+        self._running = 0
+        # Service received per tenant, in units of 1/weight per call
+        self._virtual_time: Dict[str, float] = {}
+        self._seq = itertools.count()
+    
+    @classmethod
+    def from_env(cls) -> 'CallScheduler':
+        return cls(int(os.getenv('GEMINI_MAX_CONCURRENT_CALLS', '8')),
+                   int(os.getenv('GEMINI_INTERACTIVE_RESERVE', '1')),
+                   parse_weights(os.getenv('FACTCHECK_FAIR_SHARE_WEIGHTS', '')))
+    
+    @contextmanager
+    def slot(self, priority: str = DECK, tenant: str = 'default') -> Iterator[None]:
+        """Hold one API call slot for the duration of the block"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        if self.slots <= 0:
+            yield
+            return
+        
+        start = time.perf_counter()
+        with self._condition:
+            waiter = _Waiter(priority, tenant, next(self._seq))
+            if not any(w.tenant == tenant for w in self._waiting):
+                # A tenant that was idle does not bank credit: it starts no
+                # further behind than the least-served tenant already waiting
+                others = [self._virtual_time.get(w.tenant, 0.0) for w in self._waiting]
+                self._virtual_time[tenant] = max(self._virtual_time.get(tenant, 0.0), min(others, default=0.0))
+            self._waiting.append(waiter)
+            self._dispatch()
+            self._condition.wait_for(lambda: waiter.granted)
+        SCHEDULER_WAIT_SECONDS.observe(time.perf_counter() - start, priority=priority)
+        
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running -= 1
+                self._dispatch()
+    
+    def _dispatch(self):
+        """Hand free slots to the best waiters; called with the condition held"""
+        granted = False
+        while self._waiting and self._running < self.slots:
+            general_free = self._running < self.slots - self.interactive_reserve
+            eligible = [waiter for waiter in self._waiting if general_free or waiter.priority == INTERACTIVE]
+            if not eligible:
+                break
+            waiter = min(eligible, key=lambda w: (PRIORITIES[w.priority], self._virtual_time[w.tenant], w.seq))
+            self._waiting.remove(waiter)
+            self._virtual_time[waiter.tenant] += 1.0 / self.weights.get(waiter.tenant, 1.0)
+            self._running += 1
+            waiter.granted = True
+            granted = True
+        if granted:
+            self._condition.notify_all()
+    
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            waiting = {priority: 0 for priority in PRIORITIES}
+            for waiter in self._waiting:
+                waiting[waiter.priority] += 1
+            return {'slots': self.slots, 'running': self._running, **{f"waiting_{p}": n for p, n in waiting.items()}}
@@ -0,0 +1,355 @@
+"""State shared by every worker process on the host, in one SQLite file.
+
+Under a multi-process server (see wsgi.py / gunicorn.conf.py) each worker
+has its own memory, so the in-process SingleFlight, job map and request
+pacing stop working across workers. The classes here keep the same
+interfaces but coordinate through FACTCHECK_DATA_DIR/shared.sqlite3 in
+WAL mode:
+
+- SharedRateLimiter: one token bucket per model API for the whole host
+- SharedSingleFlight: identical model calls run once, whichever worker
+  receives them
+- SharedJobs: job status and events, and which worker owns the in-flight
+  job for a key (used by JobManager)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from src.utils.single_flight import SingleFlight
+
+_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS rate_buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS flights ('
+    ' key TEXT PRIMARY KEY, owner TEXT NOT NULL, status TEXT NOT NULL, payload TEXT,'
+    ' started REAL NOT NULL, finished REAL)',
+    'CREATE TABLE IF NOT EXISTS jobs ('
+    ' job_id TEXT PRIMARY KEY, key TEXT NOT NULL, owner TEXT NOT NULL, status TEXT NOT NULL,'
+    ' error TEXT, created_at TEXT NOT NULL, attached INTEGER NOT NULL DEFAULT 1, updated REAL NOT NULL,'
+    ' total_slides INTEGER, slides_done INTEGER NOT NULL DEFAULT 0, slide_seconds REAL,'
+    ' cancel_requested INTEGER NOT NULL DEFAULT 0)',
+    'CREATE TABLE IF NOT EXISTS job_events ('
+    ' job_id TEXT NOT NULL, seq INTEGER NOT NULL, event TEXT NOT NULL, data TEXT NOT NULL,'
+    ' PRIMARY KEY (job_id, seq))',
+    'CREATE TABLE IF NOT EXISTS inflight_jobs (key TEXT PRIMARY KEY, job_id TEXT NOT NULL, owner TEXT NOT NULL)'
+]
+
+
+def process_id() -> str:
+    return str(os.getpid())
+
+
+def process_alive(owner: str) -> bool:
+    """Whether the worker process that owns a row ("<pid>:...") is still running on this host"""
+    try:
+        os.kill(int(owner.split(':')[0]), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedState:
+    """Connection factory and schema for the shared SQLite file"""
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(os.getenv('FACTCHECK_DATA_DIR', './data'), 'shared.sqlite3')
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self.connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            for statement in _SCHEMA:
+                conn.execute(statement)
+        finally:
+            conn.close()
+    
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+
+class SharedRateLimiter:
+    """Token bucket of `per_minute` requests shared by all workers.
+    
+    acquire() blocks until a request may be sent, so adding workers adds
+    concurrency without exceeding the API's requests-per-minute quota.
+    """
+    
+    def __init__(self, state: SharedState, name: str, per_minute: float, burst: Optional[float] = None):
+        self.state = state
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, per_minute / 60.0)
+    
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns the time waited"""
+        waited = 0.0
+        while True:
+            delay = self._try_acquire()
+            if delay <= 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+    
+    def _try_acquire(self) -> float:
+        conn = self.state.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE name = ?', (self.name,)).fetchone()
+            tokens = self.capacity if row is None else min(self.capacity, row[0] + (now - row[1]) * self.rate)
+            delay = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                delay = (1 - tokens) / self.rate
+            conn.execute('INSERT OR REPLACE INTO rate_buckets (name, tokens, updated) VALUES (?, ?, ?)',
+                         (self.name, tokens, now))
+            conn.execute('COMMIT')
+            return delay
+        finally:
+            conn.close()
+
+
+class SharedSingleFlight:
+    """SingleFlight across processes: same do(key, fn) -> (result, shared) interface.
+    
+    Threads of one worker coalesce in memory first; the leading thread then
+    claims the key in the shared file. Other workers poll for the leader's
+    result instead of calling the API again. A flight whose owner process
+    died is taken over by the next caller.
+    """
+    
+    def __init__(self, state: SharedState, encode: Callable[[Any], str], decode: Callable[[str], Any],
+                 poll_interval: float = 0.05, keep_seconds: float = 60.0):
+        self.state = state
+        self.encode = encode
+        self.decode = decode
+        self.poll_interval = poll_interval
+        self.keep_seconds = keep_seconds
+        self._local = SingleFlight()
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        (result, remote), local = self._local.do(key, lambda: self._do_shared(str(key), fn))
+        return result, local or remote
+    
+    def in_flight(self) -> int:
+        return self._local.in_flight()
+    
+    def _do_shared(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        owner = f"{process_id()}:{threading.get_ident()}"
+        while True:
+            if self._claim(key, owner):
+                return self._lead(key, owner, fn), False
+            outcome = self._follow(key)
+            if outcome is not None:
+                status, payload = outcome
+                if status == 'error':
+                    raise RuntimeError(payload)
+                return self.decode(payload), True
+            # The owner died mid-call: try to take the flight over
+    
+    def _claim(self, key: str, owner: str) -> bool:
+        conn = self.state.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            row = conn.execute('SELECT owner, status FROM flights WHERE key = ?', (key,)).fetchone()
+            if row is not None and row[1] == 'running' and process_alive(row[0]):
+                conn.execute('ROLLBACK')
+                return False
+            # Finished flights are kept briefly for slow followers, then dropped
+            conn.execute("DELETE FROM flights WHERE status != 'running' AND finished < ?", (now - self.keep_seconds,))
+            conn.execute(
+                "INSERT OR REPLACE INTO flights (key, owner, status, payload, started, finished)"
+                " VALUES (?, ?, 'running', NULL, ?, NULL)", (key, owner, now)
+            )
+            conn.execute('COMMIT')
+            return True
+        finally:
+            conn.close()
+    
+    def _lead(self, key: str, owner: str, fn: Callable[[], Any]) -> Any:
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, owner, 'error', str(e))
+            raise
+        self._finish(key, owner, 'done', self.encode(result))
+        return result
+    
+    def _finish(self, key: str, owner: str, status: str, payload: str):
+        conn = self.state.connect()
+        try:
+            conn.execute('UPDATE flights SET status = ?, payload = ?, finished = ? WHERE key = ? AND owner = ?',
+                         (status, payload, time.time(), key, owner))
+        finally:
+            conn.close()
+    
+    def _follow(self, key: str) -> Optional[Tuple[str, str]]:
+        """Wait for another worker's flight; None when its owner is gone"""
+        while True:
+            conn = self.state.connect()
+            try:
+                row = conn.execute('SELECT owner, status, payload FROM flights WHERE key = ?', (key,)).fetchone()
+            finally:
+                conn.close()
+            if row is None:
+                return None
+            owner, status, payload = row
+            if status != 'running':
+                return status, payload
+            if not process_alive(owner):
+                return None
+            time.sleep(self.poll_interval)
+
+
+class SharedJobs:
+    """Job rows, their event logs and the in-flight owner of each job key"""
+    
+    def __init__(self, state: SharedState, keep_seconds: float = 24 * 3600):
+        self.state = state
+        self.keep_seconds = keep_seconds
+        self.owner = f"{process_id()}:{uuid.uuid4().hex[:8]}"
+    
+    def claim(self, key: str, job_id: str, created_at: str,
+              admit: Optional[Callable[[], None]] = None) -> Optional[str]:
+        """Register job_id as the in-flight job for key in this process.
+        
+        Returns None when claimed, else the id of the job another live
+        worker is already running for key (whose attach count is bumped).
+        admit is called before a new job is registered and may raise to
+        refuse it.
+        """
+        owner = self.owner
+        conn = self.state.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT job_id, owner FROM inflight_jobs WHERE key = ?', (key,)).fetchone()
+            if row is not None and row[1] != owner and process_alive(row[1]):
+                conn.execute('UPDATE jobs SET attached = attached + 1 WHERE job_id = ?', (row[0],))
+                conn.execute('COMMIT')
+                return row[0]
+            # Finished jobs are kept for a day so late status/stream requests still find them
+            expired = time.time() - self.keep_seconds
+            conn.execute('DELETE FROM job_events WHERE job_id IN'
+                         " (SELECT job_id FROM jobs WHERE status != 'running' AND updated < ?)", (expired,))
+            conn.execute("DELETE FROM jobs WHERE status != 'running' AND updated < ?", (expired,))
+            if admit:
+                admit()
+            if row is not None:
+                # The previous owner died without finishing; its job can never complete
+                self._end(conn, row[0], 'failed', 'Worker process exited')
+            conn.execute('INSERT OR REPLACE INTO inflight_jobs (key, job_id, owner) VALUES (?, ?, ?)',
+                         (key, job_id, owner))
+            conn.execute(
+                "INSERT INTO jobs (job_id, key, owner, status, created_at, updated) VALUES (?, ?, ?, 'running', ?, ?)",
+                (job_id, key, owner, created_at, time.time())
+            )
+            conn.execute('COMMIT')
+            return None
+        finally:
+            conn.close()
+    
+    def append(self, job_id: str, event_type: str, data: Dict[str, Any],
+               progress: Optional[Tuple[Optional[int], int, Optional[float]]] = None):
+        """Add an event; progress is (total_slides, slides_done, slide_seconds)"""
+        conn = self.state.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            self._append(conn, job_id, event_type, data)
+            if progress is not None:
+                conn.execute('UPDATE jobs SET total_slides = ?, slides_done = ?, slide_seconds = ? WHERE job_id = ?',
+                             (*progress, job_id))
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+    
+    def release(self, key: str, job_id: str, status: str, event_type: str, data: Dict[str, Any],
+                error: Optional[str] = None):
+        """Record the job's final event and status and free its key"""
+        conn = self.state.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            self._append(conn, job_id, event_type, data)
+            self._end(conn, job_id, status, error)
+            conn.execute('DELETE FROM inflight_jobs WHERE key = ? AND job_id = ?', (key, job_id))
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+    
+    def request_cancel(self, job_id: str) -> bool:
+        """Ask the worker running job_id to cancel it; False if it is not running"""
+        conn = self.state.connect()
+        try:
+            cursor = conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE job_id = ? AND status = 'running'",
+                                  (job_id,))
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+    
+    def cancel_requested(self, job_id: str) -> bool:
+        conn = self.state.connect()
+        try:
+            row = conn.execute('SELECT cancel_requested FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return bool(row and row[0])
+    
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self.state.connect()
+        try:
+            row = conn.execute('SELECT job_id, key, owner, status, error, created_at, attached FROM jobs'
+                               ' WHERE job_id = ?', (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(zip(['job_id', 'key', 'owner', 'status', 'error', 'created_at', 'attached'], row))
+        if job['status'] == 'running' and not process_alive(job['owner']):
+            job.update(status='failed', error='Worker process exited')
+        return job
+    
+    def events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        conn = self.state.connect()
+        try:
+            rows = conn.execute('SELECT seq, event, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq',
+                                (job_id, after)).fetchall()
+        finally:
+            conn.close()
+        return [{'seq': seq, 'event': event, 'data': json.loads(data)} for seq, event, data in rows]
+    
+    def in_flight(self) -> int:
+        return len(self.load())
+    
+    def load(self) -> List[Tuple[Optional[int], Optional[float]]]:
+        """(remaining slides, seconds per slide) of every job running in a live worker; None until parsed"""
+        conn = self.state.connect()
+        try:
+            rows = conn.execute(
+                'SELECT i.owner, j.total_slides, j.slides_done, j.slide_seconds'
+                ' FROM inflight_jobs i JOIN jobs j ON j.job_id = i.job_id'
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(max(0, total - done) if total is not None else None, seconds)
+                for owner, total, done, seconds in rows if process_alive(owner)]
+    
+    def _append(self, conn: sqlite3.Connection, job_id: str, event_type: str, data: Dict[str, Any]):
+        conn.execute(
+            'INSERT INTO job_events (job_id, seq, event, data) SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ?'
+            ' FROM job_events WHERE job_id = ?',
+            (job_id, event_type, json.dumps(data, ensure_ascii=False, default=str), job_id)
+        )
+    
+    def _end(self, conn: sqlite3.Connection, job_id: str, status: str, error: Optional[str]):
+        conn.execute('UPDATE jobs SET status = ?, error = ?, updated = ? WHERE job_id = ?',
+                     (status, error, time.time(), job_id))
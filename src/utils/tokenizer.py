@@ -0,0 +1,57 @@
+"""Token counting for cost estimates.
+
+Uses tiktoken's cl100k_base encoding when it is installed and its
+vocabulary can be loaded (it is downloaded on first use); otherwise a
+local heuristic. Neither is Gemini's own tokenizer, so counts are
+estimates within roughly 10-20% for Japanese/English slide text.
+"""
+
+import math
+import os
+import re
+import threading
+
+_CJK = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯＀-￯]')
+
+_encoding = None
+_encoding_loaded = False
+_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Load the tiktoken encoding once; remember a failure so it is not retried per call"""
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    with _lock:
+        if not _encoding_loaded:
+            if os.getenv('FACTCHECK_TOKENIZER', 'auto').lower() != 'heuristic':
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding('cl100k_base')
+                except Exception:
+                    _encoding = None
+            _encoding_loaded = True
+    return _encoding
+
+
+def heuristic_token_count(text: str) -> int:
+    """About one token per CJK character and per four characters of other text"""
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    other = len(re.sub(r'\s+', ' ', _CJK.sub('', text)).strip())
+    return cjk + math.ceil(other / 4)
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return heuristic_token_count(text)
+
+
+def tokenizer_name() -> str:
+    return 'tiktoken/cl100k_base' if _get_encoding() is not None else 'heuristic'
@@ -0,0 +1,169 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Optional, BinaryIO
+
+try:
+    import fcntl
+except ImportError:  # Windows: sidecar updates are only serialised within one process
+    fcntl = None
+
+_sidecar_lock = threading.Lock()
+
+
+class UploadStore:
+    """Content-addressed storage for uploaded presentations.
+    
+    Each distinct file is stored once as ``<sha256><ext>``. A JSON sidecar
+    (``<sha256>.json``) keeps the user-facing filenames and the reports that
+    were already generated for this content. Sidecar updates are
+    read-modify-writes under a per-hash lock file, so concurrent jobs and
+    worker processes do not drop each other's entries.
+    """
+    
+    CHUNK_SIZE = 1024 * 1024
+    
+    def __init__(self, upload_dir: str = "./uploads"):
+        self.upload_dir = upload_dir
+        os.makedirs(upload_dir, exist_ok=True)
+    
+    def save_stream(self, stream: BinaryIO, original_filename: str) -> Dict[str, Any]:
+        """Write an upload to disk while hashing it, deduplicating by content"""
+        ext = os.path.splitext(original_filename)[1].lower()
+        hasher = hashlib.sha256()
+        size = 0
+        
+        fd, tmp_path = tempfile.mkstemp(dir=self.upload_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                while True:
+                    chunk = stream.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    tmp_file.write(chunk)
+                    size += len(chunk)
+            
+            content_hash = hasher.hexdigest()
+            stored_filename = f"{content_hash}{ext}"
+            stored_path = os.path.join(self.upload_dir, stored_filename)
+            
+            deduplicated = os.path.exists(stored_path)
+            if deduplicated:
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, stored_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        with self._locked(content_hash):
+            metadata = self.get_metadata(content_hash) or {
+                'content_hash': content_hash,
+                'stored_filename': stored_filename,
+                'file_size': size,
+                'original_filenames': [],
+                'reports': {},
+                'created_at': datetime.now().isoformat()
+            }
+            if original_filename not in metadata['original_filenames']:
+                metadata['original_filenames'].append(original_filename)
+            self._write_metadata(content_hash, metadata)
+        
+        return {
+            'content_hash': content_hash,
+            'filename': stored_filename,
+            'filepath': stored_path,
+            'original_filename': original_filename,
+            'file_size': size,
+            'deduplicated': deduplicated
+        }
+    
+    def content_hash_for(self, stored_filename: str) -> Optional[str]:
+        """Return the content hash for a stored filename, if it is content-addressed"""
+        content_hash = os.path.splitext(stored_filename)[0]
+        if self.get_metadata(content_hash) is None:
+            return None
+        return content_hash
+    
+    def original_filename(self, stored_filename: str) -> str:
+        """Most recent user-facing filename for a stored file"""
+        content_hash = self.content_hash_for(stored_filename)
+        if content_hash:
+            names = self.get_metadata(content_hash)['original_filenames']
+            if names:
+                return names[-1]
+        return stored_filename
+    
+    def display_name(self, stored_filename: str) -> str:
+        """User-facing base name for a stored file (used for report names)"""
+        return os.path.splitext(self.original_filename(stored_filename))[0]
+    
+    def get_metadata(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        path = self._metadata_path(content_hash)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+    
+    def find_report(self, content_hash: str, report_key: str) -> Optional[Dict[str, Any]]:
+        """Return a finished report entry for this content and model/prompt key"""
+        metadata = self.get_metadata(content_hash)
+        if not metadata:
+            return None
+        
+        entry = metadata.get('reports', {}).get(report_key)
+        if not entry:
+            return None
+        
+        # Reports may have been cleaned up from the output folder
+        json_path = entry.get('saved_files', {}).get('json')
+        if not json_path or not os.path.exists(json_path):
+            return None
+        
+        return entry
+    
+    def record_report(self, content_hash: str, report_key: str, saved_files: Dict[str, str]):
+        with self._locked(content_hash):
+            metadata = self.get_metadata(content_hash)
+            if not metadata:
+                return
+            
+            metadata.setdefault('reports', {})[report_key] = {
+                'saved_files': saved_files,
+                'created_at': datetime.now().isoformat()
+            }
+            self._write_metadata(content_hash, metadata)
+    
+    def _metadata_path(self, content_hash: str) -> str:
+        return os.path.join(self.upload_dir, f"{content_hash}.json")
+    
+    @contextmanager
+    def _locked(self, content_hash: str):
+        """Exclusive lock on one sidecar, across threads and worker processes"""
+        if fcntl is None:
+            with _sidecar_lock:
+                yield
+            return
+        # flock locks belong to the open file, so threads of one process also exclude each other
+        with open(os.path.join(self.upload_dir, f"{content_hash}.lock"), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _write_metadata(self, content_hash: str, metadata: Dict[str, Any]):
+        # Write to a temporary file first so readers never see a partial sidecar
+        fd, tmp_path = tempfile.mkstemp(dir=self.upload_dir, suffix='.json.part')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self._metadata_path(content_hash))
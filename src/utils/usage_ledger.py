@@ -0,0 +1,153 @@
+"""Append-only log of every model API call, with rollups for cost reports.
+
+Each call is appended to `calls`; in the same transaction its tokens and
+cost are added to `rollup`, one row per (day, deck, API key, model). Cost
+reports and projections read the rollup rows only, so a year of usage
+aggregates in milliseconds regardless of how many calls were made.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+GROUP_COLUMNS = {'day': 'day', 'deck': 'deck', 'key': 'key_id', 'model': 'model'}
+
+_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS calls ('
+    ' id INTEGER PRIMARY KEY, ts REAL NOT NULL, day TEXT NOT NULL, job_id TEXT, deck TEXT NOT NULL,'
+    ' key_id TEXT NOT NULL, model TEXT NOT NULL, kind TEXT NOT NULL, slide_number INTEGER, tier INTEGER,'
+    ' input_tokens INTEGER NOT NULL, output_tokens INTEGER NOT NULL, cost REAL NOT NULL, shared INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS rollup ('
+    ' day TEXT NOT NULL, deck TEXT NOT NULL, key_id TEXT NOT NULL, model TEXT NOT NULL,'
+    ' calls INTEGER NOT NULL, slides INTEGER NOT NULL, input_tokens INTEGER NOT NULL,'
+    ' output_tokens INTEGER NOT NULL, cost REAL NOT NULL, PRIMARY KEY (day, deck, key_id, model))',
+    'CREATE INDEX IF NOT EXISTS rollup_deck ON rollup (deck, day)',
+    'CREATE INDEX IF NOT EXISTS rollup_key ON rollup (key_id, day)',
+    'CREATE INDEX IF NOT EXISTS rollup_model ON rollup (model, day)',
+    'CREATE TABLE IF NOT EXISTS decks (deck TEXT PRIMARY KEY, name TEXT NOT NULL)'
+]
+
+
+def api_key_id(api_key: Optional[str]) -> str:
+    """Stable, non-reversible id for an API key (keys are never stored)"""
+    return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+
+
+class UsageLedger:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(os.getenv('FACTCHECK_DATA_DIR', './data'), 'usage.sqlite3')
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            for statement in _SCHEMA:
+                conn.execute(statement)
+        finally:
+            conn.close()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+    
+    def record(self, model: str, input_tokens: int, output_tokens: int, cost: float, kind: str = 'slide',
+               slide_number: Optional[int] = None, tier: int = 0, shared: bool = False,
+               deck: Optional[str] = None, deck_name: Optional[str] = None, key_id: Optional[str] = None,
+               job_id: Optional[str] = None, day: Optional[str] = None):
+        """Append one API call. A slide counts once, on its first-tier call (its first chunk's when split)"""
+        day = day or date.today().isoformat()
+        deck = deck or 'unknown'
+        key_id = key_id or 'unknown'
+        slides = 1 if kind == 'slide' and tier == 0 else 0
+        
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'INSERT INTO calls (ts, day, job_id, deck, key_id, model, kind, slide_number, tier,'
+                ' input_tokens, output_tokens, cost, shared) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (time.time(), day, job_id, deck, key_id, model, kind, slide_number, tier,
+                 int(input_tokens), int(output_tokens), cost, int(shared))
+            )
+            conn.execute(
+                'INSERT INTO rollup (day, deck, key_id, model, calls, slides, input_tokens, output_tokens, cost)'
+                ' VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?) ON CONFLICT (day, deck, key_id, model) DO UPDATE SET'
+                ' calls = calls + 1, slides = slides + excluded.slides,'
+                ' input_tokens = input_tokens + excluded.input_tokens,'
+                ' output_tokens = output_tokens + excluded.output_tokens, cost = cost + excluded.cost',
+                (day, deck, key_id, model, slides, int(input_tokens), int(output_tokens), cost)
+            )
+            if deck_name:
+                conn.execute('INSERT OR REPLACE INTO decks (deck, name) VALUES (?, ?)', (deck, deck_name))
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+    
+    def _where(self, since: Optional[str], until: Optional[str], alias: str = ''):
+        clauses, params = [], []
+        if since:
+            clauses.append(f'{alias}day >= ?')
+            params.append(since)
+        if until:
+            clauses.append(f'{alias}day <= ?')
+            params.append(until)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+    
+    def rollup(self, group_by: str = 'day', since: Optional[str] = None,
+               until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Totals grouped by day, deck, key or model over an inclusive day range (YYYY-MM-DD)"""
+        column = GROUP_COLUMNS[group_by]
+        where, params = self._where(since, until, 'r.')
+        name = ', d.name' if group_by == 'deck' else ''
+        join = ' LEFT JOIN decks d ON d.deck = r.deck' if group_by == 'deck' else ''
+        query = (
+            f'SELECT r.{column}{name}, COUNT(DISTINCT r.deck), SUM(r.calls), SUM(r.slides),'
+            f' SUM(r.input_tokens), SUM(r.output_tokens), SUM(r.cost)'
+            f' FROM rollup r{join}{where} GROUP BY r.{column} ORDER BY r.{column}'
+        )
+        conn = self._connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        
+        groups = []
+        for row in rows:
+            if group_by == 'deck':
+                group, deck_name, *totals = row
+            else:
+                (group, *totals), deck_name = row, None
+            entry = {group_by: group, **self._totals(*totals)}
+            if group_by == 'deck':
+                entry['name'] = deck_name or group
+            groups.append(entry)
+        return groups
+    
+    def summary(self, since: Optional[str] = None, until: Optional[str] = None) -> Dict[str, Any]:
+        """Totals over a day range, including the number of distinct days and decks"""
+        where, params = self._where(since, until)
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT COUNT(DISTINCT deck), SUM(calls), SUM(slides), SUM(input_tokens), SUM(output_tokens),'
+                f' SUM(cost), COUNT(DISTINCT day), MIN(day), MAX(day) FROM rollup{where}', params
+            ).fetchone()
+        finally:
+            conn.close()
+        return dict(self._totals(*row[:6]), days=row[6], first_day=row[7], last_day=row[8])
+    
+    @staticmethod
+    def _totals(decks, calls, slides, input_tokens, output_tokens, cost) -> Dict[str, Any]:
+        return {
+            'files': decks or 0,
+            'calls': calls or 0,
+            'slides': slides or 0,
+            'input_tokens': input_tokens or 0,
+            'output_tokens': output_tokens or 0,
+            'cost': round(cost or 0.0, 6)
+        }
@@ -1,4 +1,5 @@
 let uploadedFile = null;
+let uploadedFilename = null;
 
 // File upload handling
 const uploadArea = document.getElementById('uploadArea');
@@ -44,14 +45,67 @@ function handleFileSelect(file) {
     }
     
     uploadedFile = file;
+    uploadedFilename = null;
     document.getElementById('fileName').textContent = file.name;
+    document.getElementById('fileEstimate').textContent = '';
     document.getElementById('fileInfo').style.display = 'flex';
     document.getElementById('uploadArea').style.display = 'none';
     document.getElementById('checkButton').disabled = false;
+    
+    // Upload right away so the cost estimate is shown before the check starts
+    uploadAndEstimate(file);
+}
+
+// Message for a 429 from /upload or /check (server saturated)
+function busyMessage(response) {
+    const retryAfter = response.headers.get('Retry-After') || '数';
+    return `サーバーが混雑しています。${retryAfter}秒ほど待ってから再試行してください`;
+}
+
+async function uploadFile(file) {
+    const formData = new FormData();
+    formData.append('file', file);
+    
+    const uploadResponse = await fetch('/upload', {
+        method: 'POST',
+        body: formData
+    });
+    
+    if (uploadResponse.status === 429) {
+        throw new Error(busyMessage(uploadResponse));
+    }
+    if (!uploadResponse.ok) {
+        throw new Error('ファイルのアップロードに失敗しました');
+    }
+    
+    const uploadData = await uploadResponse.json();
+    return uploadData.filename;
+}
+
+async function uploadAndEstimate(file) {
+    const estimateSpan = document.getElementById('fileEstimate');
+    estimateSpan.textContent = '見積もり中...';
+    
+    try {
+        const filename = await uploadFile(file);
+        if (uploadedFile !== file) return;
+        uploadedFilename = filename;
+        
+        const response = await fetch(`/cost-estimate/${filename}`);
+        if (!response.ok) throw new Error();
+        const estimate = await response.json();
+        if (uploadedFile !== file) return;
+        
+        estimateSpan.textContent =
+            `${estimate.slide_count}スライド / 約${estimate.tokens.total.toLocaleString()}トークン / 推定 $${estimate.total_cost.toFixed(4)}`;
+    } catch (error) {
+        estimateSpan.textContent = '';
+    }
 }
 
 function removeFile() {
     uploadedFile = null;
+    uploadedFilename = null;
     document.getElementById('fileInfo').style.display = 'none';
     document.getElementById('uploadArea').style.display = 'block';
     document.getElementById('checkButton').disabled = true;
@@ -63,26 +117,14 @@ async function startFactCheck() {
     
     const apiKey = document.getElementById('apiKey').value;
     
-    // Upload file
-    const formData = new FormData();
-    formData.append('file', uploadedFile);
-    
     document.getElementById('loading').style.display = 'flex';
     
     try {
-        const uploadResponse = await fetch('/upload', {
-            method: 'POST',
-            body: formData
-        });
-        
-        if (!uploadResponse.ok) {
-            throw new Error('ファイルのアップロードに失敗しました');
-        }
-        
-        const uploadData = await uploadResponse.json();
+        // Upload file (already done on selection unless that failed or is still running)
+        const filename = uploadedFilename || await uploadFile(uploadedFile);
         
         // Start fact checking
-        const checkResponse = await fetch(`/check/${uploadData.filename}`, {
+        const checkResponse = await fetch(`/check/${filename}`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -90,6 +132,9 @@ async function startFactCheck() {
             body: JSON.stringify({ api_key: apiKey })
         });
         
+        if (checkResponse.status === 429) {
+            throw new Error(busyMessage(checkResponse));
+        }
         if (!checkResponse.ok) {
             const error = await checkResponse.json();
             throw new Error(error.error || 'ファクトチェックに失敗しました');
@@ -135,6 +180,25 @@ function displayResults(data) {
         </div>
     `;
     
+    // A budget cut the check short: say which slides were not checked
+    if (report.budget_skipped_slides && report.budget_skipped_slides.length > 0) {
+        summaryDiv.innerHTML += `
+            <div class="issue issue-medium" style="margin-top: 15px;">
+                予算の上限により未チェックのスライド: ${report.budget_skipped_slides.join(', ')}
+            </div>
+        `;
+    }
+    
+    // Cancelled or past its deadline: a partial report
+    if (report.unchecked_slides && report.unchecked_slides.length > 0) {
+        const reason = report.stopped === 'deadline' ? '期限切れ' : 'キャンセル';
+        summaryDiv.innerHTML += `
+            <div class="issue issue-medium" style="margin-top: 15px;">
+                ${reason}により未チェックのスライド: ${report.unchecked_slides.join(', ')}
+            </div>
+        `;
+    }
+    
     // Display detailed results
     detailDiv.innerHTML = '<h3>詳細結果</h3>';
     
@@ -278,6 +342,7 @@ async function calculateCost() {
             <p>内訳:</p>
             <p>入力コスト: $${data.cost_breakdown.input_cost.toFixed(4)}</p>
             <p>出力コスト: $${data.cost_breakdown.output_cost.toFixed(4)}</p>
+            <p>画像コスト: $${data.cost_breakdown.image_cost.toFixed(4)}</p>
         `;
         
     } catch (error) {
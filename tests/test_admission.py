@@ -0,0 +1,162 @@
+import io
+import os
+import threading
+import pytest
+from src.api.backends import CassetteMiss, GenerationBackend
+from src.api.gemini_client import GeminiClient
+from src.core.admission import AdmissionController, Saturated
+from src.core.job_manager import JobManager
+from src.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class RaisingBackend(GenerationBackend):
+    def __init__(self, error):
+        self.error = error
+    
+    def generate(self, model_name, prompt, image_bytes=None, on_text=None, response_schema=None):
+        raise self.error
+
+
+def failing_client(api_key, error):
+    client = GeminiClient(api_key=api_key, backend=RaisingBackend(error))
+    client.max_retries, client.retry_backoff = 0, 0.0
+    return client
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('GOOGLE_API_KEY', os.environ.get('GOOGLE_API_KEY') or 'offline-test')
+    import app as web_app
+    return web_app.app.test_client(), web_app, monkeypatch
+
+
+class TestCircuitBreaker:
+    def test_circuit_opens_after_consecutive_failures_and_recovers(self):
+        circuit = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        circuit.record_failure()
+        assert circuit.state == CLOSED
+        circuit.record_failure()
+        assert circuit.state == OPEN and not circuit.allow()
+        
+        threading.Event().wait(0.06)
+        assert circuit.state == HALF_OPEN
+        # Exactly one trial call goes through
+        assert circuit.allow() and not circuit.allow()
+        circuit.record_success()
+        assert circuit.state == CLOSED
+    
+    def test_only_availability_errors_open_the_circuit_of_their_own_key(self):
+        bad_key = failing_client('circuit-bad-key', PermissionError('API key not valid'))
+        for _ in range(10):
+            with pytest.raises(PermissionError):
+                bad_key._generate('gemini-pro', 'prompt')
+        assert bad_key.circuit.to_dict()['consecutive_failures'] == 0
+        
+        down = failing_client('circuit-down', TimeoutError('upstream timed out'))
+        for _ in range(down.circuit.failure_threshold):
+            with pytest.raises(TimeoutError):
+                down._generate('gemini-pro', 'prompt')
+        
+        assert down.circuit.state == OPEN
+        assert bad_key.circuit.state == CLOSED
+        assert GeminiClient(api_key='circuit-other', backend=RaisingBackend(None)).circuit.allow()
+    
+    def test_half_open_trial_that_misses_the_cassette_frees_the_circuit(self):
+        client = failing_client('circuit-cassette', CassetteMiss('never recorded'))
+        client.circuit.reset_timeout = 0.01
+        for _ in range(client.circuit.failure_threshold):
+            client.circuit.record_failure()
+        threading.Event().wait(0.02)
+        
+        with pytest.raises(CassetteMiss):
+            client._generate('gemini-pro', 'prompt')
+        
+        assert client.circuit.state == HALF_OPEN and client.circuit.allow()
+
+
+class TestAdmission:
+    def test_new_jobs_are_refused_with_retry_after_but_can_attach(self):
+        job_manager = JobManager()
+        admission = AdmissionController(job_manager, CircuitBreaker(), max_jobs=1, default_slide_seconds=2.0)
+        release = threading.Event()
+        
+        def target(job):
+            job.publish('parsed', {'total_slides': 10})
+            release.wait(timeout=5)
+            return {}
+        
+        job, _ = job_manager.get_or_start('deck-a', target, admit=admission.admit)
+        while job.total_slides is None:
+            threading.Event().wait(0.01)
+        
+        with pytest.raises(Saturated) as refused:
+            job_manager.get_or_start('deck-b', target, admit=admission.admit)
+        assert refused.value.retry_after == 20
+        
+        attached, created = job_manager.get_or_start('deck-a', target, admit=admission.admit)
+        assert attached is job and not created
+        assert admission.health()['queued_slides'] == 10
+        release.set()
+        job.wait(timeout=5)
+        assert admission.saturation() is None
+    
+    def test_queued_slides_limit_uses_the_drain_rate(self):
+        job_manager = JobManager()
+        admission = AdmissionController(job_manager, CircuitBreaker(), max_queued_slides=5, default_slide_seconds=1.0)
+        release = threading.Event()
+        
+        def target(job):
+            job.publish('parsed', {'total_slides': 8})
+            release.wait(timeout=5)
+            return {}
+        
+        job, _ = job_manager.get_or_start('deck-a', target)
+        while job.total_slides is None:
+            threading.Event().wait(0.01)
+        
+        # 4 slides over the limit at one slide per second
+        assert admission.saturation() == ('Too many slides queued', 4)
+        assert admission.load()['drain_seconds'] == 8.0
+        release.set()
+        job.wait(timeout=5)
+    
+    def test_burst_of_unparsed_jobs_counts_against_the_slide_limit(self):
+        job_manager = JobManager()
+        admission = AdmissionController(job_manager, CircuitBreaker(), max_queued_slides=25,
+                                        default_slide_seconds=1.0, unparsed_job_slides=10)
+        release = threading.Event()
+        
+        def target(job):
+            # Still parsing while the rest of the burst arrives
+            release.wait(timeout=5)
+            return {}
+        
+        jobs = [job_manager.get_or_start(f'deck-{n}', target, admit=admission.admit)[0] for n in range(3)]
+        
+        with pytest.raises(Saturated) as refused:
+            job_manager.get_or_start('deck-3', target, admit=admission.admit)
+        assert admission.load()['queued_slides'] == 30
+        # 6 slides over the limit, worked off by three jobs at one slide per second each
+        assert refused.value.retry_after == 2
+        release.set()
+        for job in jobs:
+            job.wait(timeout=5)
+    
+    def test_health_reports_readiness_and_upload_is_refused_when_saturated(self, client):
+        client, web_app, monkeypatch = client
+        assert client.get('/api/health').json['ready'] is True
+        
+        monkeypatch.setattr(web_app, 'admission', AdmissionController(web_app.job_manager, CircuitBreaker(), max_jobs=0))
+        health = client.get('/api/health')
+        upload = client.post('/upload', data={'file': (io.BytesIO(b'%PDF-1.4'), 'deck.pdf')})
+        
+        assert health.status_code == 503
+        assert (health.json['status'], health.json['in_flight_jobs'], health.json['circuit']['state']) == (
+            'saturated', 0, 'closed')
+        assert upload.status_code == 429
+        assert upload.headers['Retry-After'] == '1'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
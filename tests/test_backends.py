@@ -0,0 +1,98 @@
+import pytest
+import os
+import json
+from unittest.mock import patch
+from src.api.backends import (
+    BackendResponse, GenerationBackend, RecordingBackend, ReplayBackend, CassetteMiss, create_backend, request_key
+)
+from src.api.gemini_client import GeminiClient
+
+
+class ScriptedBackend(GenerationBackend):
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+    
+    def generate(self, model_name, prompt, image_bytes=None):
+        self.calls += 1
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return BackendResponse(reply, input_tokens=100, output_tokens=20)
+
+
+class TestRecordReplay:
+    @pytest.fixture
+    def cassette_path(self, tmp_path):
+        return str(tmp_path / 'cassette.jsonl')
+    
+    def test_replay_serves_recorded_responses_in_order(self, cassette_path):
+        recorder = RecordingBackend(ScriptedBackend(['first', 'second']), cassette_path)
+        recorder.generate('gemini-pro', 'prompt')
+        recorder.generate('gemini-pro', 'prompt')
+        
+        replay = ReplayBackend(cassette_path, latency_scale=0)
+        
+        assert replay.generate('gemini-pro', 'prompt').text == 'first'
+        assert replay.generate('gemini-pro', 'prompt').text == 'second'
+        assert replay.generate('gemini-pro', 'prompt').text == 'first'
+        assert replay.generate('gemini-pro', 'prompt').input_tokens == 100
+    
+    def test_requests_are_keyed_by_model_prompt_and_image(self, cassette_path):
+        recorder = RecordingBackend(ScriptedBackend(['text reply', 'vision reply']), cassette_path)
+        recorder.generate('gemini-pro', 'prompt')
+        recorder.generate('gemini-pro-vision', 'prompt', b'png-bytes')
+        
+        replay = ReplayBackend(cassette_path, latency_scale=0)
+        
+        assert replay.generate('gemini-pro-vision', 'prompt', b'png-bytes').text == 'vision reply'
+        with pytest.raises(CassetteMiss):
+            replay.generate('gemini-pro-vision', 'prompt', b'other-image')
+        assert replay.misses == 1
+    
+    def test_recorded_errors_are_replayed(self, cassette_path):
+        recorder = RecordingBackend(ScriptedBackend([RuntimeError('429 quota')]), cassette_path)
+        with pytest.raises(RuntimeError):
+            recorder.generate('gemini-pro', 'prompt')
+        
+        with pytest.raises(RuntimeError, match='429 quota'):
+            ReplayBackend(cassette_path, latency_scale=0).generate('gemini-pro', 'prompt')
+    
+    def test_replayed_latency_is_scaled(self, cassette_path):
+        entry = {'key': request_key('gemini-pro', 'prompt'), 'text': 'ok', 'latency': 2.0, 'error': None}
+        with open(cassette_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+        
+        with patch('src.api.backends.time.sleep') as sleep:
+            ReplayBackend(cassette_path, latency_scale=0.25).generate('gemini-pro', 'prompt')
+        
+        sleep.assert_called_once_with(0.5)
+    
+    def test_malformed_reply_round_trips_through_client(self, cassette_path):
+        malformed = '```json\n{"slide_number": 3, "status": "issues_found", "issues": [{"type": '
+        client = GeminiClient(backend=RecordingBackend(ScriptedBackend([malformed]), cassette_path))
+        recorded = client.check_facts('Transformer was invented in 2015', 3)
+        
+        replayed = GeminiClient(backend=ReplayBackend(cassette_path, latency_scale=0)).check_facts(
+            'Transformer was invented in 2015', 3
+        )
+        
+        assert recorded['status'] == replayed['status'] == 'parse_error'
+        assert replayed['raw_response'] == malformed
+
+
+class TestCreateBackend:
+    def test_replay_mode_needs_no_api_key(self, tmp_path):
+        cassette = tmp_path / 'c.jsonl'
+        cassette.write_text('')
+        with patch.dict(os.environ, {'FACTCHECK_BACKEND': 'replay', 'FACTCHECK_CASSETTE': str(cassette)}):
+            assert isinstance(create_backend(None), ReplayBackend)
+    
+    def test_api_mode_requires_key(self):
+        with patch.dict(os.environ, {'FACTCHECK_BACKEND': 'genai'}):
+            with pytest.raises(ValueError, match='API key is required'):
+                create_backend(None)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,62 @@
+import pytest
+from benchmarks.deck_generator import generate_deck
+from benchmarks.harness import percentile, compare
+from benchmarks.run import run_scenario
+from benchmarks.stub_backend import make_stub_client
+from src.utils.file_parser import FileParser
+
+
+class TestBenchmarkHarness:
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 95) == 95.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([], 50) == 0.0
+    
+    def test_compare_flags_regressions(self):
+        def result(throughput, p95, rss):
+            return {'status': 'ok', 'throughput_per_s': throughput, 'latency_ms': {'p95': p95}, 'peak_rss_mb': rss}
+        
+        baseline = {'scenarios': {'check': result(100.0, 50.0, 100.0)}}
+        current = {'scenarios': {'check': result(80.0, 52.0, 100.0)}}
+        
+        comparison = compare(current, baseline, tolerance=0.10)
+        
+        assert [r['metric'] for r in comparison['regressions']] == ['throughput_per_s']
+
+
+class TestSyntheticDecks:
+    @pytest.mark.parametrize('file_type', ['pptx', 'pdf'])
+    def test_generated_deck_is_parseable(self, file_type, tmp_path):
+        deck = generate_deck(str(tmp_path), file_type=file_type, slides=3, words_per_slide=30, images_per_slide=1)
+        
+        slides = FileParser().parse_file(deck)
+        
+        assert len(slides) == 3
+        assert 'Slide 1' in slides[0].text_content or 'Page 1' in slides[0].text_content
+    
+    def test_stub_client_returns_parseable_results(self):
+        client = make_stub_client(latency='constant', latency_ms=0, issues_per_slide=2, fence_rate=1.0)
+        
+        result = client.check_facts('GPT-3 was introduced in 2015', 4)
+        
+        assert result['slide_number'] == 4
+        assert result['status'] == 'issues_found'
+        assert len(result['issues']) == 2
+        assert result['token_usage']['output_tokens'] > 0
+
+
+class TestScenarios:
+    def test_e2e_checks_a_deck_through_the_web_app(self):
+        config = {'file_type': 'pptx', 'slides': 2, 'words_per_slide': 30, 'images_per_slide': 0,
+                  'iterations': 1, 'seed': 7, 'stub': {'latency': 'constant', 'latency_ms': 0}}
+        
+        # In a child process, as benchmarks.run runs every scenario
+        result = run_scenario('e2e', config)
+        
+        assert result['status'] == 'ok', result
+        assert result['items'] == 2
+
+if __name__ == '__main__':
+    pytest.main([__file__])
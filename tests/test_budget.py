@@ -0,0 +1,182 @@
+import base64
+import json
+import os
+from datetime import date
+import pytest
+from src.api.backends import BackendResponse, GenerationBackend
+from src.api.gemini_client import GeminiClient
+from src.utils import budget as budget_module
+from src.utils.budget import BudgetManager, BudgetStore, JobBudget, parse_job_limits
+from src.utils.claims import claim_score
+
+
+OK_REPLY = json.dumps({'slide_number': 1, 'status': 'ok', 'issues': [], 'summary': ''})
+IMAGE = base64.b64encode(b'png').decode('ascii')
+
+
+class CountingBackend(GenerationBackend):
+    """Replies ok, reporting a fixed token usage per call"""
+    
+    def __init__(self, tokens=200):
+        self.tokens = tokens
+        self.calls = []
+    
+    def generate(self, model_name, prompt, image_bytes=None):
+        self.calls.append((model_name, image_bytes is not None))
+        return BackendResponse(OK_REPLY, input_tokens=self.tokens - 100, output_tokens=100)
+
+
+def make_client(tokens=200):
+    client = GeminiClient(api_key='test', backend=CountingBackend(tokens))
+    client.structured_output = False
+    return client
+
+
+def slides(count, text='GPT-3 has 175B parameters'):
+    return [{'slide_number': n, 'text_content': f"{text} ({n})\n", 'image_base64': IMAGE} for n in range(1, count + 1)]
+
+
+def budget(tmp_path, job_id='job', **job):
+    store = BudgetStore(str(tmp_path / 'budget.sqlite3'))
+    limits = {'job': {'usd': None, 'tokens': None}, 'key_daily': {}, 'daily': {}}
+    limits['job'].update(job)
+    return JobBudget(store, job_id, 'key', limits)
+
+
+class TestBudgetStore:
+    def test_reservations_are_shared_between_stores_on_the_same_file(self, tmp_path):
+        path = str(tmp_path / 'budget.sqlite3')
+        first, second = BudgetStore(path), BudgetStore(path)
+        scopes = [('key:abc', {'usd': 1.0, 'tokens': None})]
+        
+        assert first.reserve(scopes, 0.6, 10) is None
+        assert second.reserve(scopes, 0.6, 10) == 'key:abc'
+        assert second.spent('key:abc') == (0.6, 10)
+    
+    def test_job_running_past_midnight_settles_against_the_day_it_reserved(self, tmp_path, monkeypatch):
+        class Clock(date):
+            today_value = date(2026, 3, 1)
+            
+            @classmethod
+            def today(cls):
+                return cls.today_value
+        
+        monkeypatch.setattr(budget_module, 'date', Clock)
+        store = BudgetStore(str(tmp_path / 'budget.sqlite3'))
+        job_budget = JobBudget(store, 'job', 'key', {'job': {}, 'key_daily': {}, 'daily': {'usd': 10.0}})
+        estimate = {'full': (1.0, 100), 'text': (0.5, 50)}
+        
+        _, reservation = job_budget.admit(estimate, estimate, 1)
+        Clock.today_value = date(2026, 3, 2)
+        job_budget.settle(reservation, 0.25, 40)
+        
+        assert store.spent('all:2026-03-01') == (0.25, 40)
+        assert store.spent('all:2026-03-02') == (0.0, 0)
+
+
+class TestBatchBudget:
+    def test_batch_runs_everything_within_budget(self, tmp_path):
+        client = make_client()
+        job_budget = budget(tmp_path, tokens=1_000_000)
+        
+        check_results = client.batch_check_facts(slides(3), budget=job_budget)
+        
+        assert [r['status'] for r in check_results['results']] == ['ok', 'ok', 'ok']
+        assert all(with_image for _, with_image in client.backend.calls)
+        # Settled with the actual 200 tokens per slide, not the estimate
+        assert check_results['budget']['spent']['tokens'] == 600
+        assert check_results['budget']['decisions']['full'] == 3
+    
+    def test_batch_degrades_to_text_only(self, tmp_path):
+        client = make_client()
+        deck = slides(3)
+        estimate = client.estimate_slide(deck[0]['text_content'], 1, True)
+        # Enough for every slide without its image, not with
+        job_budget = budget(tmp_path, tokens=3 * estimate['text'][1] + 10)
+        
+        check_results = client.batch_check_facts(deck, budget=job_budget)
+        
+        assert [r['status'] for r in check_results['results']] == ['ok', 'ok', 'ok']
+        assert not any(with_image for _, with_image in client.backend.calls)
+        assert check_results['results'][0]['performance']['budget_degraded'] is True
+        assert check_results['budget']['level'] == 'text_only'
+    
+    def test_batch_skips_low_claim_slides_then_stops(self, tmp_path):
+        deck = slides(4)
+        deck[1]['text_content'] = 'Questions?'
+        estimate = make_client().estimate_slide(deck[0]['text_content'], 1, True)
+        # Slides use what they were estimated to use
+        client = make_client(tokens=estimate['text'][1])
+        # Two text-only slides fit, four do not
+        job_budget = budget(tmp_path, tokens=2 * estimate['text'][1] + 10)
+        
+        check_results = client.batch_check_facts(deck, budget=job_budget)
+        
+        statuses = [r['status'] for r in check_results['results']]
+        assert statuses == ['ok', 'skipped', 'ok', 'unchecked']
+        assert len(client.backend.calls) == 2
+        assert check_results['budget']['exceeded_scope'] == 'job'
+    
+    def test_partial_report_lists_budget_skipped_slides(self, tmp_path):
+        from src.core.fact_checker import FactChecker
+        
+        check_results = {
+            'results': [
+                {'slide_number': 1, 'status': 'ok', 'issues': [], 'summary': ''},
+                {'slide_number': 2, 'status': 'unchecked', 'issues': [], 'summary': 'Not checked: budget exhausted'}
+            ],
+            'total_cost_estimate': 0.0,
+            'budget': {'level': 'stop'}
+        }
+        report = FactChecker(gemini_api_key='test')._generate_report({'file_name': 'deck.pptx'}, check_results)
+        
+        assert report.budget_skipped_slides == [2]
+        assert report.failed_slides == []
+        assert report.budget == {'level': 'stop'}
+
+
+class TestBudgetManager:
+    def test_manager_without_limits_returns_no_budget(self, tmp_path, monkeypatch):
+        for name in ('JOB', 'KEY_DAILY', 'DAILY'):
+            monkeypatch.delenv(f'FACTCHECK_BUDGET_{name}_USD', raising=False)
+            monkeypatch.delenv(f'FACTCHECK_BUDGET_{name}_TOKENS', raising=False)
+        manager = BudgetManager(str(tmp_path))
+        
+        assert manager.for_job('job', 'key') is None
+        assert manager.for_job('job', 'key', {'usd': '0.5'}).limits['job'] == {'usd': 0.5, 'tokens': None}
+    
+    def test_invalid_job_limits_are_refused(self, tmp_path, monkeypatch):
+        with pytest.raises(ValueError, match='budget.usd'):
+            parse_job_limits({'usd': 'lots'})
+        with pytest.raises(ValueError, match='budget.tokens'):
+            parse_job_limits({'tokens': -5})
+        assert parse_job_limits({'usd': '0.5'}) == {'usd': 0.5, 'tokens': None}
+        
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv('GOOGLE_API_KEY', os.environ.get('GOOGLE_API_KEY') or 'offline-test')
+        import app as web_app
+        os.makedirs(web_app.app.config['UPLOAD_FOLDER'], exist_ok=True)
+        with open(os.path.join(web_app.app.config['UPLOAD_FOLDER'], 'deck.pptx'), 'wb') as f:
+            f.write(b'deck')
+        
+        response = web_app.app.test_client().post('/check/deck.pptx', json={'budget': {'usd': 'lots'}})
+        
+        assert response.status_code == 400
+        assert 'budget.usd' in response.json['error']
+    
+    def test_low_claim_skip_uses_the_claim_score(self, tmp_path):
+        job_budget = budget(tmp_path, tokens=100)
+        estimate = {'full': (0.0, 20), 'text': (0.0, 10)}
+        over = {'full': (0.0, 400), 'text': (0.0, 200)}
+        
+        def mode(text):
+            return job_budget.admit(estimate, over, claim_score(text))[0]
+        
+        assert mode('Introduction\nThank you') == 'skip'
+        assert mode('Released in 2017\nBERT-large: 340M params') == 'text_only'
+        # A citation without any digit is a claim here too, as it is for the claims order
+        assert mode('Vaswani et al. introduced the Transformer') == 'text_only'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
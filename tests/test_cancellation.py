@@ -0,0 +1,99 @@
+import json
+import re
+import threading
+import time
+import pytest
+from src.api.backends import BackendResponse, GenerationBackend
+from src.api.gemini_client import GeminiClient
+from src.core.job_manager import JobManager
+from src.utils.cancellation import CANCELLED, DEADLINE, CancellationToken, JobCancelled
+
+
+class SlowBackend(GenerationBackend):
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.calls = []
+    
+    def generate(self, model_name, prompt, image_bytes=None):
+        slide_number = int(re.search(r'スライド(\d+)', prompt).group(1))
+        self.calls.append((slide_number, image_bytes is not None))
+        time.sleep(self.seconds)
+        return BackendResponse(json.dumps({'slide_number': slide_number, 'status': 'ok', 'issues': [], 'summary': ''}))
+
+
+def make_slides(count, image=False):
+    return [{'slide_number': number, 'text_content': f'slide {number}',
+             **({'image_base64': 'aGVsbG8='} if image else {})} for number in range(1, count + 1)]
+
+
+class TestCancellationToken:
+    def test_token_deadline_and_cancel(self):
+        token = CancellationToken(deadline_seconds=0.05)
+        assert not token.cancelled and token.remaining() > 0
+        time.sleep(0.06)
+        assert token.cancelled and token.reason == DEADLINE
+        
+        token = CancellationToken()
+        token.cancel()
+        with pytest.raises(JobCancelled):
+            token.run(lambda: 'never run')
+        assert token.reason == CANCELLED
+    
+    def test_token_abandons_a_call_in_flight(self):
+        token = CancellationToken()
+        threading.Timer(0.05, token.cancel).start()
+        start = time.perf_counter()
+        
+        with pytest.raises(JobCancelled):
+            token.run(lambda: time.sleep(1))
+        
+        assert time.perf_counter() - start < 0.5
+
+
+class TestPartialResults:
+    def test_deadline_returns_partial_results_in_slide_order(self):
+        client = GeminiClient(api_key='test', backend=SlowBackend(0.1))
+        
+        results = client.batch_check_facts(make_slides(10), cancel=CancellationToken(deadline_seconds=0.35))
+        
+        statuses = [result['status'] for result in results['results']]
+        assert results['stopped'] == DEADLINE
+        assert [result['slide_number'] for result in results['results']] == list(range(1, 11))
+        assert 0 < statuses.count('ok') < 10
+        assert statuses == sorted(statuses, key=lambda status: status != 'ok')
+        assert all(result['stopped'] == DEADLINE for result in results['results'] if result['status'] == 'unchecked')
+    
+    def test_degrade_near_deadline_drops_images(self):
+        backend = SlowBackend(0.05)
+        client = GeminiClient(api_key='test', backend=backend)
+        
+        results = client.batch_check_facts(make_slides(6, image=True), cancel=CancellationToken(deadline_seconds=0.2),
+                                           degrade_near_deadline=True)
+        
+        assert backend.calls[0][1] is True
+        assert any(not with_image for _, with_image in backend.calls)
+        assert any(result.get('performance', {}).get('deadline_degraded') for result in results['results'])
+    
+    def test_cancelling_a_job_stops_its_slides(self):
+        client = GeminiClient(api_key='test', backend=SlowBackend(0.05))
+        manager = JobManager()
+        started = threading.Event()
+        
+        def target(job):
+            started.set()
+            return client.batch_check_facts(make_slides(50), cancel=job.cancel_token)
+        
+        job, _ = manager.get_or_start('deck', target)
+        started.wait(5)
+        time.sleep(0.1)
+        assert manager.cancel(job.job_id)
+        result = job.wait(timeout=5)
+        
+        assert result['stopped'] == CANCELLED
+        assert any(slide['status'] == 'unchecked' for slide in result['results'])
+        assert not manager.cancel(job.job_id)
+        assert not manager.cancel('missing')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
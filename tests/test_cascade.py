@@ -0,0 +1,101 @@
+import json
+import pytest
+from src.api.backends import BackendResponse, GenerationBackend
+from src.api.gemini_client import GeminiClient, parse_cascade
+from src.core.fact_checker import FactChecker
+
+
+def reply(severity=None, confidence=0.9):
+    issues = []
+    if severity:
+        issues.append({
+            'type': 'date_error',
+            'severity': severity,
+            'original_text': 'Transformer was invented in 2015',
+            'issue_description': 'It was introduced in 2017',
+            'confidence': confidence
+        })
+    return json.dumps({
+        'slide_number': 1,
+        'status': 'issues_found' if issues else 'ok',
+        'issues': issues,
+        'summary': ''
+    })
+
+
+class ModelBackend(GenerationBackend):
+    """Replies per model name; an Exception reply is raised"""
+    
+    def __init__(self, replies):
+        self.replies = replies
+        self.calls = []
+    
+    def generate(self, model_name, prompt, image_bytes=None):
+        self.calls.append(model_name)
+        response = self.replies[model_name]
+        if isinstance(response, Exception):
+            raise response
+        return BackendResponse(response, input_tokens=1000, output_tokens=1000)
+
+
+@pytest.fixture
+def cascade_env(monkeypatch):
+    monkeypatch.setenv('GEMINI_MODEL_CASCADE', 'gemini-1.5-flash,gemini-1.5-pro')
+    monkeypatch.setenv('GEMINI_ESCALATE_SEVERITY', 'medium')
+    monkeypatch.setenv('GEMINI_ESCALATE_CONFIDENCE', '0.5')
+    monkeypatch.setenv('GEMINI_MAX_RETRIES', '0')
+
+
+class TestCascade:
+    def test_parse_cascade(self):
+        assert parse_cascade('gemini-pro:gemini-pro-vision, gemini-1.5-pro') == [
+            ('gemini-pro', 'gemini-pro-vision'), ('gemini-1.5-pro', 'gemini-1.5-pro')
+        ]
+        assert parse_cascade('') == []
+    
+    def test_clean_slide_stays_on_first_tier(self, cascade_env):
+        backend = ModelBackend({'gemini-1.5-flash': reply('low'), 'gemini-1.5-pro': reply()})
+        
+        result = GeminiClient(backend=backend).check_facts('text', 1)
+        
+        assert backend.calls == ['gemini-1.5-flash']
+        assert result['performance']['escalated'] is False
+    
+    def test_suspicious_slide_escalates_and_costs_add_up(self, cascade_env):
+        backend = ModelBackend({'gemini-1.5-flash': reply('high'), 'gemini-1.5-pro': reply()})
+        client = GeminiClient(backend=backend)
+        
+        result = client.check_facts('text', 1)
+        
+        assert backend.calls == ['gemini-1.5-flash', 'gemini-1.5-pro']
+        assert result['status'] == 'ok'
+        assert result['performance']['model'] == 'gemini-1.5-pro'
+        assert [tier['status'] for tier in result['performance']['tiers']] == ['issues_found', 'ok']
+        assert result['token_usage']['estimated_cost'] == pytest.approx(
+            client._calculate_cost(1000, 1000, 'gemini-1.5-flash') + client._calculate_cost(1000, 1000, 'gemini-1.5-pro')
+        )
+    
+    def test_failed_stronger_tier_keeps_first_verdict(self, cascade_env):
+        backend = ModelBackend({'gemini-1.5-flash': reply('high'), 'gemini-1.5-pro': RuntimeError('503')})
+        
+        result = GeminiClient(backend=backend).check_facts('text', 1)
+        
+        assert result['status'] == 'issues_found'
+        assert result['performance']['tier'] == 0
+    
+    def test_report_has_per_tier_summary(self, cascade_env):
+        backend = ModelBackend({'gemini-1.5-flash': reply('high'), 'gemini-1.5-pro': reply('high')})
+        fact_checker = FactChecker(backend=backend)
+        results = fact_checker.gemini_client.batch_check_facts([{'slide_number': 1, 'text_content': 'text'}])['results']
+        
+        trace = fact_checker._build_performance_trace({'total': 1.0}, results)
+        
+        assert [(tier.tier, tier.calls, tier.verdicts) for tier in trace.tiers] == [(0, 1, 0), (1, 1, 1)]
+        assert trace.escalated_slides == 1
+    
+    def test_report_key_includes_cascade(self, cascade_env):
+        assert 'gemini-1.5-flash' in GeminiClient(backend=ModelBackend({})).report_key()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,94 @@
+import pytest
+import json
+import threading
+import time
+from src.api.backends import BackendResponse, GenerationBackend
+from src.api.gemini_client import GeminiClient
+from src.utils.chunking import split_text
+from src.utils.tokenizer import count_tokens
+from src.utils.usage_ledger import UsageLedger
+
+
+def sentences(count):
+    return ''.join(f"文{number}: Transformerは2017年に発表された。" for number in range(count))
+
+
+class ChunkBackend(GenerationBackend):
+    """Flags every mention of 'BERT' and records how many calls ran at once"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+    
+    def generate(self, model_name, prompt, image_bytes=None, on_text=None, response_schema=None):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        content = prompt.split('スライドの内容：')[1].split('以下の形式')[0]
+        issues = [{'type': 'date_error', 'severity': 'high', 'original_text': 'BERTは2019年に発表された',
+                   'issue_description': '2018年', 'confidence': 0.9}] if 'BERT' in content else []
+        text = json.dumps({'slide_number': 1, 'status': 'issues_found' if issues else 'ok',
+                           'issues': issues, 'summary': 'chunk'}, ensure_ascii=False)
+        if on_text:
+            on_text(text)
+        return BackendResponse(text, 100, 20)
+
+
+class TestSplitText:
+    def test_short_text_is_not_split(self):
+        assert split_text('Transformerは2017年に発表された。', 100, 10) == ['Transformerは2017年に発表された。']
+    
+    def test_split_on_sentences_with_overlap(self):
+        text = sentences(60)
+        
+        chunks = split_text(text, 150, 30)
+        
+        assert len(chunks) > 1
+        assert all(count_tokens(chunk) <= 150 for chunk in chunks)
+        # Every sentence survives, and each chunk starts with the tail of the previous one
+        assert all(f"文{number}:" in ''.join(chunks) for number in range(60))
+        assert all(following.splitlines()[0] in chunk.splitlines() for chunk, following in zip(chunks, chunks[1:]))
+    
+    def test_text_without_boundaries_is_cut_to_fit(self):
+        chunks = split_text('x' * 5000, 100)
+        
+        assert ''.join(chunks) == 'x' * 5000
+        assert all(count_tokens(chunk) <= 100 for chunk in chunks)
+
+
+class TestChunkedCheck:
+    def test_oversize_slide_is_checked_in_concurrent_chunks_and_merged(self):
+        backend = ChunkBackend()
+        client = GeminiClient(api_key='test', backend=backend)
+        client.chunk_tokens, client.chunk_overlap_tokens = 150, 30
+        text = sentences(30) + 'BERTは2019年に発表された。' + sentences(30)
+        streamed = []
+        
+        result = client.check_facts(text, 1, on_issue=streamed.append)
+        
+        chunks = len(split_text(text, 150, 30))
+        assert result['performance']['chunks'] == chunks
+        assert backend.peak > 1
+        assert result['status'] == 'issues_found'
+        assert len(result['issues']) == 1
+        assert streamed
+        assert result['token_usage']['input_tokens'] == 100 * chunks
+    
+    def test_chunked_slide_counts_once_in_the_ledger(self, tmp_path):
+        ledger = UsageLedger(str(tmp_path / 'usage.sqlite3'))
+        client = GeminiClient(api_key='test', backend=ChunkBackend(), ledger=ledger)
+        client.chunk_tokens, client.chunk_overlap_tokens = 150, 30
+        
+        client.check_facts(sentences(60), 1)
+        
+        summary = ledger.summary()
+        assert summary['calls'] == len(split_text(sentences(60), 150, 30)) > 1
+        assert summary['slides'] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,77 @@
+import pytest
+from benchmarks.deck_generator import generate_deck
+from src.utils.cost_estimator import CostEstimator
+from src.utils.file_parser import FileParser
+from src.utils.pricing import IMAGE_TOKENS, calculate_cost
+from src.utils.tokenizer import heuristic_token_count
+
+
+class TestTokenizer:
+    def test_heuristic_counts_cjk_per_character(self):
+        assert heuristic_token_count('') == 0
+        assert heuristic_token_count('事実確認') == 4
+        assert heuristic_token_count('abcd efgh') == 3
+
+
+class TestFileEstimate:
+    @pytest.mark.parametrize('file_type', ['pptx', 'pdf'])
+    def test_text_only_parse_counts_images(self, file_type, tmp_path):
+        deck = generate_deck(str(tmp_path), file_type=file_type, slides=3, words_per_slide=30, images_per_slide=2)
+        
+        slides = FileParser().extract_text_only(deck)
+        
+        assert [slide['image_count'] for slide in slides] == [2, 2, 2]
+        assert all(slide['text_content'] for slide in slides)
+    
+    def test_estimate_is_per_slide_and_sums_up(self, tmp_path):
+        deck = generate_deck(str(tmp_path), file_type='pptx', slides=5, words_per_slide=40, images_per_slide=1)
+        
+        estimate = CostEstimator().estimate_from_file(deck)
+        
+        assert estimate['slide_count'] == 5
+        assert estimate['image_count'] == 5
+        assert estimate['total_cost'] == pytest.approx(sum(slide['cost'] for slide in estimate['slides']))
+        slide = estimate['slides'][0]
+        assert slide['image_tokens'] == IMAGE_TOKENS
+        assert slide['prompt_tokens'] > slide['text_tokens'] > 0
+        assert slide['cost'] == calculate_cost(slide['prompt_tokens'] + IMAGE_TOKENS, slide['output_tokens'], slide['model'])
+    
+    def test_estimate_follows_figure_cropping(self, tmp_path, monkeypatch):
+        deck = generate_deck(str(tmp_path), file_type='pptx', slides=2, words_per_slide=40, images_per_slide=0)
+        
+        cropped = CostEstimator().estimate_from_file(deck)
+        monkeypatch.setenv('FACTCHECK_FIGURE_CROP', '0')
+        whole_page = CostEstimator().estimate_from_file(deck)
+        
+        # Slides without figures are sent text-only, to the text model
+        assert [slide['image_tokens'] for slide in cropped['slides']] == [0, 0]
+        assert cropped['slides'][0]['model'] == 'gemini-pro' and cropped['images_sent'] == 0
+        assert [slide['image_tokens'] for slide in whole_page['slides']] == [IMAGE_TOKENS, IMAGE_TOKENS]
+        assert whole_page['total_cost'] > cropped['total_cost']
+    
+    def test_slide_count_estimate_prices_images_from_shared_table(self):
+        estimator = CostEstimator()
+        
+        with_images = estimator.estimate_single_file(10, has_images=True)
+        text_only = estimator.estimate_single_file(10, has_images=False)
+        
+        assert with_images['cost_breakdown']['image_cost'] > 0
+        assert text_only['cost_breakdown']['image_cost'] == 0
+
+
+class TestProjections:
+    def test_without_a_ledger_usage_must_be_passed_in(self):
+        estimator = CostEstimator()
+        
+        with pytest.raises(ValueError, match='ledger'):
+            estimator.project_costs()
+        with pytest.raises(ValueError, match='ledger'):
+            estimator.generate_cost_report()
+        
+        projections = estimator.project_costs({'average_cost_per_file': 0.5, 'average_cost_per_slide': 0.02})
+        assert projections['by_files']['10_files'] == 5.0
+        assert 'コスト分析レポート' in estimator.generate_cost_report([{'date': '2026-01-05', 'slides': 20, 'cost': 0.4}])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,104 @@
+import pytest
+from io import BytesIO
+from PIL import Image
+from pptx import Presentation
+from pptx.enum.shapes import MSO_CONNECTOR
+from pptx.util import Inches
+from src.utils.figures import crop_to_figures, merge_regions, pdf_figure_regions, pptx_figure_regions
+from src.utils.file_parser import FileParser
+
+
+class PlumberPage:
+    """The parts of a pdfplumber page that pdf_figure_regions reads"""
+    
+    width, height = 1000, 1000
+    
+    def __init__(self, images=(), rects=(), lines=()):
+        self.images = [self.box(*bbox) for bbox in images]
+        self.rects = [self.box(*bbox) for bbox in rects]
+        self.lines = [self.box(*bbox) for bbox in lines]
+        self.curves = []
+    
+    @staticmethod
+    def box(x0, top, x1, bottom):
+        return {'x0': x0, 'top': top, 'x1': x1, 'bottom': bottom}
+    
+    def find_tables(self):
+        return []
+
+
+def make_pptx(path, with_picture):
+    presentation = Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+    slide.shapes.title.text = 'GPT-3は1750億パラメータ'
+    if with_picture:
+        picture = BytesIO()
+        Image.new('RGB', (200, 100), color='red').save(picture, format='PNG')
+        picture.seek(0)
+        slide.shapes.add_picture(picture, Inches(6), Inches(5), Inches(3), Inches(1.5))
+    presentation.save(path)
+
+
+class TestFigureRegions:
+    def test_nearby_regions_are_merged(self):
+        regions = merge_regions([(0.1, 0.1, 0.2, 0.2), (0.21, 0.1, 0.3, 0.2), (0.6, 0.6, 0.7, 0.7)])
+        
+        assert regions == [(0.1, 0.1, 0.3, 0.2), (0.6, 0.6, 0.7, 0.7)]
+    
+    def test_crop_to_figures(self):
+        page = Image.new('RGB', (1000, 800), color='white')
+        
+        assert crop_to_figures(page, []) is None
+        assert crop_to_figures(page, [(0.0, 0.0, 1.0, 0.9)]) is page
+        assert crop_to_figures(page, [(0.5, 0.5, 0.7, 0.7)], padding=0).size == (200, 160)
+        # Two figures are stacked into one image
+        stacked = crop_to_figures(page, [(0.0, 0.0, 0.2, 0.2), (0.5, 0.5, 0.7, 0.7)], padding=0)
+        assert stacked.size == (200, 160 + 160 + 8)
+    
+    def test_pdf_regions_from_images_and_vector_charts(self):
+        bars = [(600 + 60 * i, 800 - 100 * i, 640 + 60 * i, 900) for i in range(4)]
+        page = PlumberPage(images=[(50, 50, 350, 300)], rects=bars + [(0, 0, 1000, 1000)], lines=[(50, 400, 950, 401)])
+        
+        regions = pdf_figure_regions(page)
+        
+        # The photo and the bar chart; not the page frame or the lone rule
+        assert regions == [(0.05, 0.05, 0.35, 0.3), (0.6, 0.5, 0.82, 0.9)]
+    
+    def test_pptx_groups_count_only_when_they_hold_a_figure(self):
+        presentation = Presentation()
+        slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+        diagram = slide.shapes.add_group_shape()
+        diagram.shapes.add_textbox(Inches(1), Inches(1), Inches(2), Inches(1)).text_frame.text = 'Encoder'
+        diagram.shapes.add_textbox(Inches(4), Inches(1), Inches(2), Inches(1)).text_frame.text = 'Decoder'
+        diagram.shapes.add_connector(MSO_CONNECTOR.STRAIGHT, Inches(3), Inches(1.5), Inches(4), Inches(1.5))
+        picture = BytesIO()
+        Image.new('RGB', (200, 100), color='red').save(picture, format='PNG')
+        figure = slide.shapes.add_group_shape()
+        nested = figure.shapes.add_group_shape()
+        nested.shapes.add_picture(picture, Inches(1), Inches(4), Inches(3), Inches(1.5))
+        figure.shapes.add_textbox(Inches(4.5), Inches(4), Inches(2), Inches(1)).text_frame.text = 'Figure 1'
+        
+        regions = pptx_figure_regions(slide.shapes, presentation.slide_width, presentation.slide_height)
+        
+        # Only the group around the picture, with its caption
+        assert len(regions) == 1
+        assert regions[0][1] == pytest.approx(4 / 7.5)
+
+
+class TestFigureCrop:
+    def test_pptx_slides_send_only_their_pictures(self, tmp_path):
+        parser = FileParser()
+        make_pptx(tmp_path / 'figure.pptx', with_picture=True)
+        make_pptx(tmp_path / 'text.pptx', with_picture=False)
+        
+        [figure_slide] = parser.parse_file(str(tmp_path / 'figure.pptx'))
+        [text_slide] = parser.parse_file(str(tmp_path / 'text.pptx'))
+        
+        image = Image.open(BytesIO(figure_slide.image_content))
+        assert image.width < 1024 and image.height < 768
+        assert image.getpixel((image.width // 2, image.height // 2)) == (255, 0, 0)
+        assert text_slide.image_content is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
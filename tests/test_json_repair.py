@@ -0,0 +1,97 @@
+import json
+import pytest
+from src.api.backends import BackendResponse, GenerationBackend
+from src.api.gemini_client import GeminiClient
+from src.api.json_repair import repair_json
+from src.core.fact_checker import FactChecker
+from src.core.models import reply_json_schema
+
+
+VALID_ISSUE = {
+    'type': 'date_error',
+    'severity': 'high',
+    'original_text': 'Transformer was invented in 2015',
+    'issue_description': 'It was introduced in 2017',
+    'correct_information': '2017',
+    'confidence': 0.9
+}
+VALID_REPLY = json.dumps({'slide_number': 3, 'status': 'issues_found', 'issues': [VALID_ISSUE], 'summary': 'one issue'})
+
+
+class PromptRecordingBackend(GenerationBackend):
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.requests = []
+    
+    def generate(self, model_name, prompt, image_bytes=None):
+        self.requests.append((model_name, prompt, image_bytes))
+        return BackendResponse(self.replies.pop(0), input_tokens=100, output_tokens=20)
+
+
+class TestRepairJson:
+    @pytest.mark.parametrize('text, expected', [
+        ('```json\n{"a": [1, 2,],}\n```', {'a': [1, 2]}),
+        ('{"a": "truncated', {'a': 'truncated'}),
+        ('{"a": {"b": 1}, "c', {'a': {'b': 1}}),
+        ('{"a": [1, {"b": 2', {'a': [1, {'b': 2}]}),
+        ('{"a": "x, ]", "b": 1,}', {'a': 'x, ]', 'b': 1}),
+    ])
+    def test_local_repairs(self, text, expected):
+        assert repair_json(text) == expected
+    
+    def test_unrepairable_text(self):
+        assert repair_json('The slide looks fine to me.') is None
+
+
+class TestReplySchema:
+    def test_schema_is_derived_from_models(self):
+        schema = reply_json_schema()
+        issue_schema = schema['properties']['issues']['items']
+        
+        assert 'token_usage' not in schema['properties']
+        assert 'slide_number' not in issue_schema['properties']
+        assert issue_schema['properties']['severity']['enum'] == ['high', 'medium', 'low']
+        assert '$ref' not in json.dumps(schema)
+
+
+class TestReplyRepair:
+    def test_trailing_comma_is_repaired_locally(self):
+        backend = PromptRecordingBackend([VALID_REPLY[:-1] + ',}'])
+        
+        result = GeminiClient(backend=backend).check_facts('Transformer was invented in 2015', 3)
+        
+        assert result['status'] == 'issues_found'
+        assert result['repair'] == 'local'
+        assert len(backend.requests) == 1
+    
+    def test_broken_reply_gets_a_small_repair_request(self):
+        broken = '{"slide_number": 3, "status": "issues_found", "issues": [{"type": '
+        backend = PromptRecordingBackend([broken, VALID_REPLY])
+        
+        result = GeminiClient(backend=backend).check_facts('Transformer was invented in 2015', 3, 'aW1hZ2U=')
+        
+        assert result['status'] == 'issues_found'
+        assert result['repair'] == 'request'
+        repair_model, repair_prompt, repair_image = backend.requests[1]
+        assert repair_model == GeminiClient.TEXT_MODEL_NAME
+        assert repair_image is None
+        assert 'Transformer was invented in 2015' not in repair_prompt.split('JSON：')[0]
+        assert result['token_usage']['input_tokens'] == 200
+    
+    def test_unrecoverable_slides_are_reported_as_failed(self):
+        backend = PromptRecordingBackend(['not json', 'still not json', VALID_REPLY])
+        fact_checker = FactChecker(backend=backend)
+        check_results = fact_checker.gemini_client.batch_check_facts([
+            {'slide_number': 1, 'text_content': 'a'},
+            {'slide_number': 2, 'text_content': 'b'}
+        ])
+        
+        report = fact_checker._generate_report({'file_name': 'deck.pptx'}, check_results)
+        
+        assert report.failed_slides == [1]
+        assert report.slides_with_issues == 1
+        assert 'deck.pptx' in fact_checker.export_report(report, 'markdown')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
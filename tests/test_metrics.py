@@ -0,0 +1,57 @@
+import pytest
+from src.utils.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    @pytest.fixture
+    def registry(self):
+        return MetricsRegistry()
+    
+    def test_counter_exposition(self, registry):
+        counter = registry.counter('factcheck_test_total', 'Test counter', ['model'])
+        counter.inc(model='gemini-pro')
+        counter.inc(2, model='gemini-pro')
+        
+        output = registry.render()
+        
+        assert '# TYPE factcheck_test_total counter' in output
+        assert 'factcheck_test_total{model="gemini-pro"} 3' in output
+    
+    def test_histogram_buckets_are_cumulative(self, registry):
+        histogram = registry.histogram('factcheck_latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5.0)
+        
+        output = registry.render()
+        
+        assert 'factcheck_latency_seconds_bucket{le="0.1"} 1' in output
+        assert 'factcheck_latency_seconds_bucket{le="1"} 2' in output
+        assert 'factcheck_latency_seconds_bucket{le="+Inf"} 3' in output
+        assert 'factcheck_latency_seconds_count 3' in output
+        assert 'factcheck_latency_seconds_sum 5.55' in output
+    
+    def test_histogram_timer(self, registry):
+        histogram = registry.histogram('factcheck_stage_seconds', 'Stages', ['stage'])
+        with histogram.time(stage='open'):
+            pass
+        
+        assert histogram.count(stage='open') == 1
+    
+    def test_gauge_function(self, registry):
+        registry.gauge('factcheck_jobs_in_flight', 'Jobs').set_function(lambda: 4)
+        
+        assert 'factcheck_jobs_in_flight 4' in registry.render()
+    
+    def test_label_mismatch_raises(self, registry):
+        counter = registry.counter('factcheck_labels_total', 'Labels', ['model'])
+        with pytest.raises(ValueError):
+            counter.inc(stage='open')
+    
+    def test_registering_twice_returns_existing_metric(self, registry):
+        first = registry.counter('factcheck_dup_total', 'Dup')
+        assert registry.counter('factcheck_dup_total', 'Dup') is first
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
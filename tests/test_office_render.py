@@ -0,0 +1,97 @@
+import os
+import stat
+import sys
+import threading
+import pytest
+from src.utils import file_parser
+from src.utils.file_parser import FileParser
+from src.utils.office_render import OfficePool, OfficeTimeout
+
+# Stands in for soffice: initialises the profile, or "converts" by copying the
+# input; inputs named hang* never finish. Every run is logged
+FAKE_SOFFICE = '''#!{python}
+import os, sys, time
+args = sys.argv[1:]
+profile = next(a for a in args if a.startswith('-env:UserInstallation=file://'))[len('-env:UserInstallation=file://'):]
+with open({log!r}, 'a') as log:
+    log.write(' '.join(a for a in args if not a.startswith('-env')) + '\\n')
+if '--terminate_after_init' in args:
+    os.makedirs(profile, exist_ok=True)
+    sys.exit(0)
+if not os.path.isdir(profile):
+    sys.exit('profile not initialised')
+fmt = args[args.index('--convert-to') + 1]
+outdir = args[args.index('--outdir') + 1]
+source = args[-1]
+if os.path.basename(source).startswith('hang'):
+    time.sleep(30)
+with open(source, 'rb') as f, open(os.path.join(outdir, os.path.splitext(os.path.basename(source))[0] + '.' + fmt), 'wb') as out:
+    out.write(fmt.encode() + b':' + f.read())
+'''
+
+
+@pytest.fixture
+def pool(tmp_path):
+    log = tmp_path / 'soffice.log'
+    binary = tmp_path / 'soffice'
+    binary.write_text(FAKE_SOFFICE.format(python=sys.executable, log=str(log)))
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    pool = OfficePool(workers=2, cache_dir=str(tmp_path / 'cache'), timeout=2.0, binary=str(binary))
+    pool.log = log
+    return pool
+
+
+def runs(pool, flag):
+    return sum(1 for line in pool.log.read_text().splitlines() if flag in line) if pool.log.exists() else 0
+
+
+def write(path, content):
+    path.write_bytes(content)
+    return str(path)
+
+
+class TestOfficePool:
+    def test_conversions_are_cached_by_content(self, pool, tmp_path):
+        first = pool.convert(write(tmp_path / 'lecture.ppt', b'deck'), 'pptx')
+        again = pool.convert(write(tmp_path / 'renamed.ppt', b'deck'), 'pptx')
+        
+        assert first == again
+        assert open(first, 'rb').read() == b'pptx:deck'
+        assert runs(pool, '--convert-to') == 1
+        # The worker's profile was initialised once and reused
+        assert runs(pool, '--terminate_after_init') == 1
+    
+    def test_concurrent_requests_share_one_conversion(self, pool, tmp_path):
+        deck = write(tmp_path / 'lecture.ppt', b'shared deck')
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(pool.convert(deck, 'pdf'))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        
+        assert len(set(results)) == 1 and len(results) == 4
+        assert runs(pool, '--convert-to') == 1
+    
+    def test_wedged_worker_is_killed_and_restarted(self, pool, tmp_path):
+        pool.timeout = 0.5
+        
+        with pytest.raises(OfficeTimeout):
+            pool.convert(write(tmp_path / 'hang.ppt', b'wedged'), 'pptx')
+        
+        assert pool.stats()['restarts'] == 1
+        assert pool.stats()['idle'] == 2
+        pool.timeout = 5.0
+        assert os.path.exists(pool.convert(write(tmp_path / 'fine.ppt', b'fine'), 'pptx'))
+
+
+class TestLegacyPpt:
+    def test_ppt_needs_libreoffice(self, monkeypatch):
+        monkeypatch.setattr(file_parser, 'office_pool', lambda: None)
+        
+        with pytest.raises(ValueError, match='LibreOffice'):
+            FileParser().parse_file('lecture.ppt')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,72 @@
+import pytest
+from benchmarks.deck_generator import generate_deck
+from src.utils import file_parser, pdf_text
+from src.utils.file_parser import FileParser
+from src.utils.pdf_text import available_engines, extract_pdf_text, page_count, page_ranges, resolve_engine
+
+
+@pytest.fixture(scope='module')
+def deck(tmp_path_factory):
+    return generate_deck(str(tmp_path_factory.mktemp('decks')), file_type='pdf', slides=6, words_per_slide=30)
+
+
+class TestPdfTextEngines:
+    def test_page_ranges_cover_every_page_once(self):
+        assert page_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+        assert page_ranges(2, 4) == [(0, 1), (1, 2)]
+    
+    @pytest.mark.parametrize('engine', ['pypdf2', 'pypdf', 'pdfplumber'])
+    def test_engines_extract_every_page_in_order(self, deck, engine):
+        if engine not in available_engines():
+            pytest.skip(f"{engine} is not installed")
+        
+        texts = extract_pdf_text(deck, 6, engine, workers=1)
+        
+        assert len(texts) == 6
+        assert all(f"Page {number}" in text for number, text in enumerate(texts, 1))
+    
+    @pytest.mark.parametrize('engine', ['pypdf2', 'pypdf', 'pdfplumber', 'pdftotext'])
+    def test_engines_count_pages(self, deck, engine):
+        if engine not in available_engines():
+            pytest.skip(f"{engine} is not installed")
+        
+        assert page_count(deck, engine) == 6
+    
+    def test_parallel_page_ranges_match_sequential_extraction(self, deck):
+        sequential = extract_pdf_text(deck, 6, 'pypdf2', workers=1)
+        
+        assert extract_pdf_text(deck, 6, 'pypdf2', workers=2, parallel_min_pages=2) == sequential
+    
+    def test_missing_engine_falls_back_to_pypdf2(self, monkeypatch):
+        monkeypatch.setitem(pdf_text.ENGINES, 'pdftotext', (None, lambda: False, True))
+        
+        assert resolve_engine('pdftotext') == 'pypdf2'
+        with pytest.raises(ValueError, match='Unknown PDF text engine'):
+            resolve_engine('ocr')
+
+
+class TestFileParserEngine:
+    def test_file_parser_uses_the_configured_engine(self, deck, monkeypatch):
+        monkeypatch.setenv('FACTCHECK_PDF_TEXT_ENGINE', 'pypdf')
+        
+        parser = FileParser()
+        slides = parser.parse_file(deck)
+        
+        assert parser.pdf_text_engine == 'pypdf'
+        assert [slide.slide_number for slide in slides] == list(range(1, 7))
+        assert 'Page 3' in slides[2].text_content
+    
+    def test_other_engines_do_not_open_the_pdf_with_pypdf2(self, deck, monkeypatch):
+        def unused(path):
+            raise AssertionError('PyPDF2 opened the PDF')
+        
+        monkeypatch.setenv('FACTCHECK_PDF_TEXT_ENGINE', 'pdfplumber')
+        monkeypatch.setattr(file_parser.PyPDF2, 'PdfReader', unused)
+        
+        slides = FileParser().parse_file(deck)
+        
+        assert len(slides) == 6 and 'Page 6' in slides[5].text_content
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,43 @@
+import pytest
+from benchmarks.deck_generator import generate_deck
+from benchmarks.stub_backend import StubBackend
+from src.core.fact_checker import FactChecker, FactCheckReport
+from src.utils.report_generator import ReportGenerator
+
+
+@pytest.fixture
+def report(tmp_path):
+    deck = generate_deck(str(tmp_path), file_type='pptx', slides=4, words_per_slide=30, images_per_slide=1)
+    fact_checker = FactChecker(backend=StubBackend(latency='constant', latency_ms=0))
+    return fact_checker.check_presentation(deck)
+
+
+class TestPerformanceTrace:
+    def test_report_carries_performance_trace(self, report):
+        performance = report.performance
+        
+        assert set(performance.stages) == {'metadata', 'parse', 'check', 'aggregate', 'total'}
+        assert [slide.slide_number for slide in performance.slides] == [1, 2, 3, 4]
+        assert sum(performance.routing.values()) == 4
+        assert performance.total_bytes_sent > 0
+        assert len(performance.slowest_slides) <= 5
+        assert performance.slides_per_second > 0
+    
+    def test_trace_survives_json_round_trip(self, report):
+        restored = FactCheckReport.model_validate_json(report.model_dump_json())
+        
+        assert restored.performance == report.performance
+    
+    def test_dashboard_renders_performance_charts(self, report, tmp_path):
+        untraced = report.model_copy(update={'performance': None})
+        
+        path = ReportGenerator(str(tmp_path / 'output')).generate_summary_dashboard([report, untraced])
+        
+        with open(path, encoding='utf-8') as f:
+            dashboard = f.read()
+        assert '<svg' in dashboard
+        assert 'スループット' in dashboard
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
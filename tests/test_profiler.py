@@ -0,0 +1,78 @@
+import os
+import tracemalloc
+import pytest
+from contextlib import nullcontext
+from src.utils.cancellation import CancellationToken
+from src.utils.profiler import JobProfiler, profile_job, profiling_enabled
+
+
+def busy_work():
+    data = [str(i) * 10 for i in range(5000)]
+    return sum(len(item) for item in data)
+
+
+class TestProfiler:
+    def test_disabled_profiler_is_a_no_op(self, tmp_path):
+        profiler = profile_job(False, str(tmp_path), 'deck')
+        
+        assert isinstance(profiler, nullcontext)
+    
+    def test_flag_overrides_environment(self, monkeypatch):
+        monkeypatch.setenv('FACTCHECK_PROFILE', '1')
+        
+        assert profiling_enabled() is True
+        assert profiling_enabled(False) is False
+    
+    def test_writes_collapsed_stacks_and_allocations(self, tmp_path):
+        with JobProfiler(str(tmp_path), 'deck', interval=0.001) as profiler:
+            for _ in range(5):
+                busy_work()
+        
+        assert set(profiler.saved_files) == {'profile_cpu', 'profile_memory'}
+        with open(profiler.saved_files['profile_cpu'], encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert any('busy_work' in line for line in lines)
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+        assert os.path.getsize(profiler.saved_files['profile_memory']) > 0
+    
+    def test_samples_helper_threads_of_the_job(self, tmp_path):
+        def model_call():
+            for _ in range(20):
+                busy_work()
+        
+        with JobProfiler(str(tmp_path), 'deck', interval=0.001) as profiler:
+            CancellationToken().run(model_call)
+        
+        with open(profiler.saved_files['profile_cpu'], encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert any(line.startswith('[cancellable-call];') and 'model_call' in line for line in lines)
+    
+    def test_overlapping_profilers_share_tracemalloc(self, tmp_path):
+        was_tracing = tracemalloc.is_tracing()
+        first = JobProfiler(str(tmp_path), 'first', interval=0.001)
+        second = JobProfiler(str(tmp_path), 'second', interval=0.001)
+        
+        first.__enter__()
+        second.__enter__()
+        first.__exit__(None, None, None)
+        assert tracemalloc.is_tracing()
+        second.__exit__(None, None, None)
+        
+        assert second.error is None and 'profile_memory' in second.saved_files
+        assert tracemalloc.is_tracing() == was_tracing
+    
+    def test_profiling_errors_do_not_fail_the_job(self, tmp_path):
+        was_tracing = tracemalloc.is_tracing()
+        # Not a directory, so the profile files cannot be written
+        blocker = tmp_path / 'blocker'
+        blocker.write_text('')
+        
+        with JobProfiler(str(blocker / 'profiles'), 'deck') as profiler:
+            busy_work()
+        
+        assert profiler.error and profiler.saved_files == {}
+        assert tracemalloc.is_tracing() == was_tracing
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,74 @@
+import gzip
+import os
+import pytest
+from tests.test_report_store import make_report
+from src.utils.report_store import ReportStore
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('GOOGLE_API_KEY', os.environ.get('GOOGLE_API_KEY') or 'offline-test')
+    import app as web_app
+    
+    store = ReportStore(str(tmp_path / 'output'))
+    monkeypatch.setattr(web_app, 'report_store', store)
+    monkeypatch.setitem(web_app.app.config, 'OUTPUT_FOLDER', str(tmp_path / 'output'))
+    report_id = store.save(make_report(), 'lecture')['report_id']
+    return web_app.app.test_client(), store, report_id
+
+
+class TestReportDownloads:
+    def test_html_is_rendered_on_first_download_with_compressed_variants(self, client):
+        client, store, report_id = client
+        html_path = store.variant_path(report_id, 'html')
+        assert not os.path.exists(html_path)
+        
+        response = client.get(f'/download/html/{report_id}.html', headers={'Accept-Encoding': 'gzip'})
+        
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        assert 'ファクトチェックレポート' in gzip.decompress(response.data).decode('utf-8')
+        assert os.path.exists(html_path) and os.path.exists(html_path + '.gz')
+    
+    def test_conditional_get_returns_not_modified(self, client):
+        client, store, report_id = client
+        
+        first = client.get(f'/download/markdown/{report_id}.md')
+        again = client.get(f'/download/markdown/{report_id}.md', headers={'If-None-Match': first.headers['ETag']})
+        
+        assert first.status_code == 200
+        assert first.headers['ETag'] == f'"{store.etag(store.variant_path(report_id, "markdown"))}"'
+        assert 'Content-Encoding' not in first.headers
+        assert again.status_code == 304
+    
+    def test_byte_ranges(self, client):
+        client, _, report_id = client
+        
+        full = client.get(f'/download/html/{report_id}.html')
+        partial = client.get(f'/download/html/{report_id}.html', headers={'Range': 'bytes=10-19'})
+        
+        assert partial.status_code == 206
+        assert partial.data == full.data[10:20]
+        assert partial.headers['Content-Range'] == f'bytes 10-19/{len(full.data)}'
+    
+    def test_json_is_served_from_the_stored_gzip(self, client):
+        client, store, report_id = client
+        
+        compressed = client.get(f'/download/json/{report_id}.json.gz', headers={'Accept-Encoding': 'gzip, br'})
+        plain = client.get(f'/download/json/{report_id}.json')
+        
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(compressed.data) == plain.data
+        assert compressed.headers['ETag'] != plain.headers['ETag']
+        assert b'lecture.pptx' in plain.data
+    
+    def test_unknown_report_is_not_found(self, client):
+        client, _, _ = client
+        
+        assert client.get('/download/html/missing.html').status_code == 404
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
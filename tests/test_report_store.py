@@ -0,0 +1,174 @@
+import time
+import pytest
+from src.core.models import FactCheckReport, FactCheckResult, FactIssue
+from src.utils.report_generator import ReportGenerator
+from src.utils.report_store import ReportStore, read_report
+
+
+def make_report(file_name='lecture.pptx', timestamp='2026-04-01T10:00:00', cost=0.01):
+    issue = FactIssue(type='numerical_error', severity='high', original_text='BERT has 1B parameters',
+                      issue_description='BERT-large has 340M', confidence=0.9, slide_number=1)
+    return FactCheckReport(
+        file_metadata={'file_name': file_name, 'content_hash': 'a' * 64},
+        total_slides=2,
+        slides_with_issues=1,
+        total_issues=1,
+        issues_by_type={'numerical_error': 1},
+        issues_by_severity={'high': 1},
+        results=[
+            FactCheckResult(slide_number=1, status='issues_found', issues=[issue], summary=''),
+            FactCheckResult(slide_number=2, status='error', issues=[], summary='')
+        ],
+        total_cost_estimate=cost,
+        timestamp=timestamp,
+        failed_slides=[2]
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReportStore(str(tmp_path))
+
+
+def make_issue_report(text, issue_type='numerical_error', severity='high', confidence=0.9,
+                      timestamp='2026-04-01T10:00:00', file_name='lecture.pptx'):
+    issue = FactIssue(type=issue_type, severity=severity, original_text=text,
+                      issue_description='要確認', confidence=confidence, slide_number=3)
+    report = make_report(file_name=file_name, timestamp=timestamp)
+    report.results[0].issues = [issue]
+    return report
+
+
+class TestReportStore:
+    def test_report_is_written_once_compressed_and_indexed(self, store):
+        saved = store.save(make_report(), 'lecture')
+        
+        assert saved['path'].endswith('.json.gz')
+        assert read_report(saved['path']) == make_report()
+        assert store.load(saved['report_id']) == make_report()
+        
+        listing = store.list()
+        assert listing['total'] == 1
+        row = listing['reports'][0]
+        assert row['report_id'] == saved['report_id']
+        assert row['issues_by_type']['numerical_error'] == 1
+        assert row['issues_by_severity']['high'] == 1
+        assert row['failed_slides'] == 1
+    
+    def test_listing_paginates_newest_first(self, store):
+        for day in range(1, 6):
+            store.save(make_report(timestamp=f'2026-04-0{day}T10:00:00'), f'deck{day}')
+        
+        first = store.list(page=1, per_page=2)
+        last = store.list(page=3, per_page=2)
+        
+        assert (first['total'], first['pages']) == (5, 3)
+        assert [row['timestamp'][:10] for row in first['reports']] == ['2026-04-05', '2026-04-04']
+        assert [row['timestamp'][:10] for row in last['reports']] == ['2026-04-01']
+        assert store.totals()['issues_by_severity']['high'] == 5
+    
+    def test_dashboard_over_ten_thousand_reports_renders_from_index(self, tmp_path, store):
+        store.save(make_report(), 'lecture')
+        conn = store._connect()
+        conn.execute(
+            'WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 9999) '
+            "INSERT INTO reports SELECT 'r' || i, path, file_name, content_hash, timestamp, total_slides,"
+            ' slides_with_issues, total_issues, failed_slides, cost, type_date_error, type_numerical_error,'
+            ' type_technical_claim, type_citation_error, type_knowledge_consistency, severity_high,'
+            ' severity_medium, severity_low, performance FROM reports, n'
+        )
+        conn.close()
+        
+        start = time.perf_counter()
+        dashboard = ReportGenerator(str(tmp_path), store=store).render_dashboard(page=2)
+        elapsed = time.perf_counter() - start
+        
+        assert elapsed < 1.0
+        assert '10000' in dashboard
+        assert dashboard.count('class="report-card"') == 50
+        assert 'ページ 2 / 200' in dashboard
+    
+    def test_loose_json_reports_from_before_the_store_are_imported_once(self, tmp_path):
+        with open(tmp_path / 'lecture_20250101_120000.json', 'w', encoding='utf-8') as f:
+            f.write(make_report(timestamp='2025-01-01T12:00:00').model_dump_json(indent=2))
+        (tmp_path / 'cost_analysis_20250101_120000.json').write_text('{"total_cost": 0.01}')
+        store = ReportStore(str(tmp_path))
+        
+        assert store.import_legacy_reports() == 1
+        assert store.import_legacy_reports() == 0
+        assert store.list()['reports'][0]['report_id'] == 'lecture_20250101_120000'
+        assert store.totals()['issues_by_severity']['high'] == 1
+        assert store.report_id_for('lecture_20250101_120000.json') == 'lecture_20250101_120000'
+        assert store.load('lecture_20250101_120000') == make_report(timestamp='2025-01-01T12:00:00')
+        assert (tmp_path / 'lecture_20250101_120000.json').exists()
+
+
+class TestIssueSearch:
+    def test_search_filters_issues_across_reports(self, store):
+        store.save(make_issue_report('BERT-large has 1B parameters'), 'a')
+        store.save(make_issue_report('BERT was released in 2015', issue_type='date_error'), 'b')
+        store.save(make_issue_report('GPT-3 has 17B parameters'), 'c')
+        store.save(make_issue_report('BERT-base has 1B parameters', severity='low'), 'd')
+        store.save(make_issue_report('BERT uses 12 layers', timestamp='2024-01-01T10:00:00'), 'e')
+        
+        results = store.search('BERT', types=['numerical_error'], severities=['high'], since='2025-04-01')
+        
+        assert results['total'] == 1
+        assert results['issues'][0]['original_text'] == 'BERT-large has 1B parameters'
+        assert results['issues'][0]['slide_number'] == 3
+        assert store.search('parameters')['total'] == 3
+        assert store.search(min_confidence=0.95)['total'] == 0
+        assert store.search(deck='a' * 64, page=2, per_page=2)['issues'][0]['file_name'] == 'lecture.pptx'
+    
+    def test_search_matches_japanese_and_short_terms(self, store):
+        store.save(make_issue_report('Transformerは2015年に発表された'), 'a')
+        
+        assert store.search('発表された')['total'] == 1
+        assert store.search('年に')['total'] == 1
+        assert store.search('2015年 Transformer')['total'] == 1
+        assert store.search('2016年')['total'] == 0
+    
+    def test_backfill_indexes_reports_saved_before_search(self, store):
+        saved = store.save(make_issue_report('BERT-large has 1B parameters'), 'a')
+        conn = store._connect()
+        conn.execute('DELETE FROM issues_indexed')
+        conn.execute("INSERT INTO issues_fts (issues_fts) VALUES ('delete-all')")
+        conn.execute('DELETE FROM issues')
+        conn.close()
+        
+        assert store.search('BERT')['total'] == 0
+        assert store.backfill_issues() == 1
+        assert store.search('BERT')['issues'][0]['report_id'] == saved['report_id']
+        assert store.backfill_issues() == 0
+    
+    def test_backfill_skips_unreadable_reports(self, store):
+        broken = store.save(make_issue_report('GPT-3 has 17B parameters'), 'broken')
+        saved = store.save(make_issue_report('BERT-large has 1B parameters'), 'fine')
+        conn = store._connect()
+        conn.execute('DELETE FROM issues_indexed')
+        conn.execute("INSERT INTO issues_fts (issues_fts) VALUES ('delete-all')")
+        conn.execute('DELETE FROM issues')
+        conn.close()
+        with open(broken['path'], 'r+b') as f:
+            f.truncate(20)
+        
+        assert store.backfill_issues() == 1
+        assert store.search('BERT')['issues'][0]['report_id'] == saved['report_id']
+        assert store.search('GPT')['total'] == 0
+    
+    def test_issues_of_loose_json_reports_are_searchable(self, tmp_path):
+        with open(tmp_path / 'lecture_20250101_120000.json', 'w', encoding='utf-8') as f:
+            f.write(make_issue_report('BERT-large has 1B parameters').model_dump_json(indent=2))
+        (tmp_path / 'truncated_20250101_120000.json').write_text('{"file_metadata": {')
+        store = ReportStore(str(tmp_path))
+        
+        store.import_legacy_reports()
+        
+        results = store.search('BERT')
+        assert results['total'] == 1
+        assert results['issues'][0]['report_id'] == 'lecture_20250101_120000'
+        assert store.backfill_issues() == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
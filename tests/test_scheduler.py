@@ -0,0 +1,106 @@
+import pytest
+import json
+import re
+import threading
+import time
+from src.api.backends import BackendResponse, GenerationBackend
+from src.api.gemini_client import GeminiClient
+from src.utils.scheduler import BULK, DECK, INTERACTIVE, CallScheduler
+
+
+def queue_calls(scheduler, calls, granted):
+    """Start one thread per (priority, tenant), each queued behind the previous one"""
+    threads = []
+    for priority, tenant in calls:
+        def run(priority=priority, tenant=tenant):
+            with scheduler.slot(priority, tenant):
+                granted.append((priority, tenant))
+        
+        waiting = sum(value for key, value in scheduler.stats().items() if key.startswith('waiting_'))
+        thread = threading.Thread(target=run)
+        thread.start()
+        while sum(value for key, value in scheduler.stats().items() if key.startswith('waiting_')) == waiting:
+            time.sleep(0.001)
+        threads.append(thread)
+    return threads
+
+
+def run_behind_a_held_slot(scheduler, calls):
+    granted = []
+    with scheduler.slot(DECK, 'holder'):
+        threads = queue_calls(scheduler, calls, granted)
+    for thread in threads:
+        thread.join(timeout=5)
+    return granted
+
+
+class EchoBackend(GenerationBackend):
+    def generate(self, model_name, prompt, image_bytes=None):
+        slide_number = int(re.search(r'スライド(\d+)', prompt).group(1))
+        return BackendResponse(json.dumps({'slide_number': slide_number, 'status': 'ok', 'issues': [], 'summary': ''}))
+
+
+class TestCallScheduler:
+    def test_interactive_calls_jump_the_queue(self):
+        scheduler = CallScheduler(slots=1, interactive_reserve=0)
+        
+        granted = run_behind_a_held_slot(scheduler, [(BULK, 'a'), (DECK, 'b'), (INTERACTIVE, 'c'), (BULK, 'd')])
+        
+        assert granted == [(INTERACTIVE, 'c'), (DECK, 'b'), (BULK, 'a'), (BULK, 'd')]
+    
+    def test_api_keys_share_fairly_by_weight(self):
+        scheduler = CallScheduler(slots=1, interactive_reserve=0, weights={'heavy': 2.0})
+        
+        calls = [(BULK, 'prof')] * 4 + [(BULK, 'student')] * 2 + [(BULK, 'heavy')] * 4
+        granted = [tenant for _, tenant in run_behind_a_held_slot(scheduler, calls)]
+        
+        # While all three are waiting, 'heavy' gets two turns for every one of the others
+        assert granted[:8] == ['prof', 'student', 'heavy', 'heavy', 'prof', 'student', 'heavy', 'heavy']
+        assert sorted(granted) == sorted(tenant for _, tenant in calls)
+    
+    def test_reserved_slot_keeps_interactive_calls_waiting_free(self):
+        scheduler = CallScheduler(slots=2, interactive_reserve=1)
+        
+        with scheduler.slot(BULK, 'prof'):
+            granted = []
+            blocked = queue_calls(scheduler, [(BULK, 'prof')], granted)
+            start = time.perf_counter()
+            with scheduler.slot(INTERACTIVE, 'student'):
+                assert time.perf_counter() - start < 0.1
+            assert granted == []
+        blocked[0].join(timeout=5)
+        assert granted == [(BULK, 'prof')]
+
+
+class TestSlideOrder:
+    def test_slide_order_is_configurable_but_results_stay_in_file_order(self):
+        client = GeminiClient(api_key='test', backend=EchoBackend())
+        slides = [{'slide_number': number, 'text_content': 'x' * length}
+                  for number, length in [(1, 300), (2, 10), (3, 100)]]
+        sent = []
+        
+        results = client.batch_check_facts(slides, on_result=lambda result: sent.append(result['slide_number']),
+                                           order='short_first')
+        
+        assert sent == [2, 3, 1]
+        assert [result['slide_number'] for result in results['results']] == [1, 2, 3]
+    
+    def test_claims_order_sends_claim_heavy_slides_first(self):
+        client = GeminiClient(api_key='test', backend=EchoBackend())
+        slides = [
+            {'slide_number': 1, 'text_content': '本日の講義について'},
+            {'slide_number': 2, 'text_content': 'Transformerは2017年に発表された [3]。BLEUは28.4、従来比+2.0ポイント'},
+            {'slide_number': 3, 'text_content': 'まとめ: 深層学習の発展'},
+            {'slide_number': 4, 'text_content': 'GPT-3は1750億パラメータ'}
+        ]
+        sent = []
+        
+        results = client.batch_check_facts(slides, on_result=lambda result: sent.append(result['slide_number']),
+                                           order='claims')
+        
+        assert sent == [2, 4, 1, 3]
+        assert [result['slide_number'] for result in results['results']] == [1, 2, 3, 4]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,81 @@
+import threading
+import time
+import pytest
+from src.api.backends import BackendResponse
+from src.api.gemini_client import _decode_response, _encode_response
+from src.core.job_manager import JobManager, RemoteJob
+from src.utils.shared_state import SharedJobs, SharedRateLimiter, SharedSingleFlight, SharedState
+
+
+@pytest.fixture
+def state(tmp_path):
+    return SharedState(str(tmp_path / 'shared.sqlite3'))
+
+
+class TestSharedState:
+    def test_single_flight_is_shared_between_workers(self, state):
+        # Two instances stand in for two worker processes: they share only the file
+        workers = [SharedSingleFlight(state, _encode_response, _decode_response, poll_interval=0.01) for _ in range(2)]
+        calls = []
+        release = threading.Event()
+        
+        def slow_call():
+            calls.append(1)
+            release.wait(timeout=5)
+            return BackendResponse('{"status": "ok"}', input_tokens=100, output_tokens=20)
+        
+        results = []
+        threads = [threading.Thread(target=lambda w=worker: results.append(w.do('slide-1', slow_call)))
+                   for worker in workers]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        assert len(calls) == 1
+        assert sorted(shared for _, shared in results) == [False, True]
+        assert {(response.text, response.input_tokens) for response, _ in results} == {('{"status": "ok"}', 100)}
+        # Finished flights are not reused as a cache
+        assert workers[1].do('slide-1', lambda: BackendResponse('again'))[0].text == 'again'
+    
+    def test_rate_limiter_paces_all_workers(self, state):
+        limiters = [SharedRateLimiter(state, 'gemini', per_minute=600, burst=1) for _ in range(2)]
+        
+        start = time.perf_counter()
+        for _ in range(3):
+            for limiter in limiters:
+                limiter.acquire()
+        
+        # 6 requests at 10/s with a burst of 1 take 0.5s whichever worker sends them
+        assert time.perf_counter() - start >= 0.45
+    
+    def test_jobs_are_coalesced_and_streamed_across_workers(self, state):
+        owner, other = JobManager(shared=SharedJobs(state)), JobManager(shared=SharedJobs(state))
+        release = threading.Event()
+        runs = []
+        
+        def target(job):
+            runs.append(job.job_id)
+            job.publish('slide', {'slide_number': 1})
+            release.wait(timeout=5)
+            return {'report': 'done'}
+        
+        job, created = owner.get_or_start('deck:key', target)
+        remote, remote_created = other.get_or_start('deck:key', target)
+        
+        assert created and not remote_created
+        assert isinstance(remote, RemoteJob) and remote.job_id == job.job_id
+        assert other.get(job.job_id).status == 'running'
+        assert other.in_flight() == 1
+        
+        release.set()
+        assert remote.wait(timeout=5) == {'report': 'done'}
+        assert [event['event'] for event in remote.iter_events()] == ['slide', 'complete']
+        assert runs == [job.job_id]
+        assert other.in_flight() == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,98 @@
+import pytest
+import threading
+import time
+from src.utils.single_flight import SingleFlight
+from src.core.job_manager import JobManager
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_execution(self):
+        single_flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+        
+        def slow_call():
+            calls.append(1)
+            release.wait(timeout=5)
+            return 'response'
+        
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(single_flight.do('slide-1', slow_call)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        # Give every caller the chance to attach before the leader finishes
+        while single_flight.in_flight() == 0:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        assert len(calls) == 1
+        assert [result for result, _ in results] == ['response'] * 5
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        assert single_flight.in_flight() == 0
+    
+    def test_errors_propagate_and_key_is_released(self):
+        single_flight = SingleFlight()
+        
+        def failing_call():
+            raise RuntimeError('quota exceeded')
+        
+        with pytest.raises(RuntimeError, match='quota exceeded'):
+            single_flight.do('slide-1', failing_call)
+        
+        assert single_flight.do('slide-1', lambda: 'ok') == ('ok', False)
+
+
+class TestJobManager:
+    def test_identical_jobs_are_coalesced(self):
+        job_manager = JobManager()
+        release = threading.Event()
+        runs = []
+        
+        def target(job):
+            runs.append(job.job_id)
+            job.publish('slide', {'slide_number': 1})
+            release.wait(timeout=5)
+            return {'report': 'done'}
+        
+        first, created_first = job_manager.get_or_start('deck:model', target)
+        second, created_second = job_manager.get_or_start('deck:model', target)
+        
+        assert created_first is True
+        assert created_second is False
+        assert first is second
+        assert job_manager.in_flight() == 1
+        
+        release.set()
+        assert first.wait(timeout=5) == {'report': 'done'}
+        assert second.wait(timeout=5) == {'report': 'done'}
+        assert len(runs) == 1
+        assert job_manager.in_flight() == 0
+    
+    def test_late_subscriber_replays_events(self):
+        job_manager = JobManager()
+        job, _ = job_manager.get_or_start('deck:model', lambda job: (job.publish('slide', {'n': 1}), {'ok': True})[1])
+        job.wait(timeout=5)
+        
+        events = [event['event'] for event in job.iter_events() if event]
+        assert events == ['slide', 'complete']
+    
+    def test_failed_job_raises_for_waiters(self):
+        job_manager = JobManager()
+        
+        def target(job):
+            raise ValueError('broken deck')
+        
+        job, _ = job_manager.get_or_start('deck:model', target)
+        with pytest.raises(RuntimeError, match='broken deck'):
+            job.wait(timeout=5)
+        assert job_manager.get(job.job_id).status == 'failed'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,63 @@
+import json
+import pytest
+from benchmarks.stub_backend import make_stub_client
+from src.api.streaming_json import IncrementalIssueParser
+
+
+REPLY = json.dumps({
+    'slide_number': 3,
+    'status': 'issues_found',
+    'issues': [
+        {'type': 'date_error', 'severity': 'high', 'original_text': 'in {2015}', 'issue_description': 'a "quoted" ] value'},
+        {'type': 'numerical_error', 'severity': 'low', 'original_text': '175B', 'issue_description': 'nested [1, {"x": 2}]'}
+    ],
+    'summary': 'two issues'
+}, ensure_ascii=False, indent=2)
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestIncrementalIssueParser:
+    @pytest.mark.parametrize('size', [1, 7, 64, 10000])
+    def test_emits_each_issue_once_regardless_of_chunking(self, size):
+        parser = IncrementalIssueParser()
+        
+        issues = []
+        for chunk in chunked(f"```json\n{REPLY}\n```", size):
+            issues.extend(parser.feed(chunk))
+        
+        assert issues == json.loads(REPLY)['issues']
+    
+    def test_issue_is_emitted_before_the_reply_finishes(self):
+        parser = IncrementalIssueParser()
+        first_issue_end = REPLY.index('},') + 1
+        
+        assert len(parser.feed(REPLY[:first_issue_end])) == 1
+        assert len(parser.feed(REPLY[first_issue_end:])) == 1
+    
+    def test_reset_does_not_repeat_emitted_issues(self):
+        received = []
+        parser = IncrementalIssueParser(on_issue=received.append)
+        parser.feed(REPLY[:REPLY.index('},') + 1])
+        
+        parser.reset()
+        parser.feed(REPLY)
+        
+        assert [issue['type'] for issue in received] == ['date_error', 'numerical_error']
+
+
+class TestStreamingCheck:
+    def test_check_facts_streams_issues(self):
+        client = make_stub_client(latency='constant', latency_ms=0, issues_per_slide=3, fence_rate=1.0)
+        received = []
+        
+        result = client.check_facts('GPT-3 was introduced in 2015', 5, on_issue=received.append)
+        
+        assert len(received) == len(result['issues']) == 3
+        assert all(issue['slide_number'] == 5 for issue in received)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,81 @@
+import pytest
+import os
+import json
+import threading
+import time
+from io import BytesIO
+from src.utils.upload_store import UploadStore
+
+
+class TestUploadStore:
+    @pytest.fixture
+    def upload_store(self, tmp_path):
+        return UploadStore(str(tmp_path))
+    
+    def test_save_stream_stores_by_content_hash(self, upload_store, tmp_path):
+        stored = upload_store.save_stream(BytesIO(b'%PDF-1.4 test'), 'lecture.pdf')
+        
+        assert stored['filename'] == f"{stored['content_hash']}.pdf"
+        assert os.path.exists(stored['filepath'])
+        assert stored['deduplicated'] is False
+        assert stored['file_size'] == len(b'%PDF-1.4 test')
+        # No temporary files are left behind
+        assert not [name for name in os.listdir(tmp_path) if name.endswith('.part')]
+    
+    def test_duplicate_upload_is_stored_once(self, upload_store, tmp_path):
+        first = upload_store.save_stream(BytesIO(b'same content'), 'week1.pdf')
+        second = upload_store.save_stream(BytesIO(b'same content'), 'week1_copy.pdf')
+        
+        assert second['deduplicated'] is True
+        assert first['filename'] == second['filename']
+        assert len([name for name in os.listdir(tmp_path) if name.endswith('.pdf')]) == 1
+        
+        metadata = upload_store.get_metadata(first['content_hash'])
+        assert metadata['original_filenames'] == ['week1.pdf', 'week1_copy.pdf']
+        assert upload_store.display_name(second['filename']) == 'week1_copy'
+    
+    def test_find_report_requires_matching_key_and_existing_file(self, upload_store, tmp_path):
+        stored = upload_store.save_stream(BytesIO(b'deck'), 'deck.pptx')
+        report_path = tmp_path / 'deck_report.json'
+        report_path.write_text(json.dumps({}))
+        
+        upload_store.record_report(stored['content_hash'], 'model-a:prompt-v1', {'json': str(report_path)})
+        
+        assert upload_store.find_report(stored['content_hash'], 'model-a:prompt-v1') is not None
+        assert upload_store.find_report(stored['content_hash'], 'model-a:prompt-v2') is None
+        
+        os.remove(report_path)
+        assert upload_store.find_report(stored['content_hash'], 'model-a:prompt-v1') is None
+    
+    def test_concurrent_reports_for_one_upload_are_all_recorded(self, upload_store, tmp_path, monkeypatch):
+        stored = upload_store.save_stream(BytesIO(b'deck'), 'deck.pptx')
+        report_path = tmp_path / 'deck_report.json'
+        report_path.write_text(json.dumps({}))
+        read_metadata = upload_store.get_metadata
+        
+        def slow_get_metadata(content_hash):
+            # Widen the window between reading and rewriting the sidecar
+            metadata = read_metadata(content_hash)
+            time.sleep(0.01)
+            return metadata
+        
+        monkeypatch.setattr(upload_store, 'get_metadata', slow_get_metadata)
+        keys = [f'model-a:prompt-v1:priority-{n}' for n in range(8)]
+        threads = [
+            threading.Thread(target=upload_store.record_report,
+                             args=(stored['content_hash'], key, {'json': str(report_path)}))
+            for key in keys
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert sorted(read_metadata(stored['content_hash'])['reports']) == sorted(keys)
+    
+    def test_content_hash_for_unknown_file(self, upload_store):
+        assert upload_store.content_hash_for('20240101_120000_old_upload.pdf') is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,82 @@
+import pytest
+import json
+import time
+from src.api.backends import BackendResponse, GenerationBackend
+from src.api.gemini_client import GeminiClient
+from src.utils.cost_estimator import CostEstimator
+from src.utils.usage_ledger import UsageLedger, api_key_id
+
+
+class OkBackend(GenerationBackend):
+    def generate(self, model_name, prompt, image_bytes=None):
+        reply = json.dumps({'slide_number': 1, 'status': 'ok', 'issues': [], 'summary': ''})
+        return BackendResponse(reply, input_tokens=1000, output_tokens=200)
+
+
+class TestUsageLedger:
+    def test_client_records_every_call(self, tmp_path):
+        ledger = UsageLedger(str(tmp_path / 'usage.sqlite3'))
+        client = GeminiClient(api_key='secret', backend=OkBackend(), ledger=ledger)
+        client.usage_labels = {'deck': 'abc.pptx', 'deck_name': 'lecture.pptx', 'job_id': 'job-1'}
+        
+        client.batch_check_facts([
+            {'slide_number': 1, 'text_content': 'Transformer (2017)'},
+            {'slide_number': 2, 'text_content': 'BERT (2018)'}
+        ])
+        
+        decks = ledger.rollup('deck')
+        assert decks == [{
+            'deck': 'abc.pptx', 'name': 'lecture.pptx', 'files': 1, 'calls': 2, 'slides': 2,
+            'input_tokens': 2000, 'output_tokens': 400, 'cost': 0.0007
+        }]
+        assert ledger.rollup('key')[0]['key'] == api_key_id('secret')
+        assert ledger.rollup('model')[0]['model'] == 'gemini-pro'
+    
+    def test_rollups_filter_by_day_range(self, tmp_path):
+        ledger = UsageLedger(str(tmp_path / 'usage.sqlite3'))
+        for day, deck in [('2026-01-01', 'a'), ('2026-01-01', 'b'), ('2026-01-02', 'a'), ('2026-02-01', 'c')]:
+            ledger.record('gemini-pro', 100, 10, 0.5, deck=deck, day=day)
+        
+        days = ledger.rollup('day', since='2026-01-01', until='2026-01-31')
+        assert [(row['day'], row['files'], row['cost']) for row in days] == [('2026-01-01', 2, 1.0), ('2026-01-02', 1, 0.5)]
+        
+        summary = ledger.summary()
+        assert (summary['files'], summary['slides'], summary['days']) == (3, 4, 3)
+    
+    def test_year_of_rollups_is_fast(self, tmp_path):
+        ledger = UsageLedger(str(tmp_path / 'usage.sqlite3'))
+        conn = ledger._connect()
+        conn.executemany(
+            'INSERT INTO rollup VALUES (?, ?, ?, ?, 20, 20, 20000, 4000, 0.01)',
+            [(f"2025-{month:02d}-{day:02d}", f"deck{deck}", 'key', 'gemini-pro')
+             for month in range(1, 13) for day in range(1, 29) for deck in range(10)]
+        )
+        conn.close()
+        
+        start = time.perf_counter()
+        CostEstimator(ledger=ledger).generate_cost_report()
+        assert time.perf_counter() - start < 0.5
+
+
+class TestCostReport:
+    def test_cost_report_from_ledger(self, tmp_path):
+        ledger = UsageLedger(str(tmp_path / 'usage.sqlite3'))
+        estimator = CostEstimator(ledger=ledger)
+        
+        # An empty ledger (or an empty list) must not divide by zero
+        assert '処理ファイル数: 0' in estimator.generate_cost_report()
+        assert '処理ファイル数: 0' in estimator.generate_cost_report([])
+        
+        ledger.record('gemini-pro', 100, 10, 0.25, deck='a', day='2026-03-01')
+        ledger.record('gemini-pro', 100, 10, 0.75, deck='b', day='2026-03-02')
+        report = estimator.generate_cost_report()
+        assert '### 2026-03-02' in report
+        assert '平均コスト/ファイル: $0.5000' in report
+        
+        projections = estimator.project_costs()
+        assert projections['by_files']['10_files'] == 5.0
+        assert projections['monthly_estimates']['current_rate']['cost'] == 15.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
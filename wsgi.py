@@ -0,0 +1,13 @@
+"""Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+Worker processes share job state, in-flight model calls and the request
+rate limit through FACTCHECK_DATA_DIR/shared.sqlite3.
+"""
+
+import os
+
+os.environ.setdefault('FACTCHECK_SHARED_STATE', '1')
+
+from app import app  # noqa: E402
+
+application = app